@@ -0,0 +1,86 @@
+# -*- coding:utf-8 -*-
+"""
+单回调气缸反应器 (EngineCylinderReactor) 与多回调 Wall/MassFlowController 接线的耗时对比
+用法: python scripts/benchmark_cylinder_reactor.py [双区模型计算的曲轴转角范围 deg]
+@Author: MoonCake Without Moon
+@Time: 2025/7/8
+"""
+import sys
+import time
+
+from cantera import ReactorNet
+from loguru import logger
+from numpy import pi, deg2rad, linspace, array, abs
+
+from moon.combustion_models import ZeroDimensional, TwoZoneModel, FractalTurbulent
+from moon.flame_speed import MethanolHydrogenFlameSpeed
+from moon.geometry import EngineGeometry, SITwoZoneGeometry
+from moon.heat_transfer import Hohenberg
+from moon.reaction_mechanism import Li
+
+SPEED = 2000 / 60  # 转速 [r/s]
+STROKE = 0.1  # 冲程 [m]
+EPSILON = 10  # 压缩比
+BORE = 0.09  # 缸径 [m]
+LAMBDA = 0.3  # 曲柄连杆比
+MIXTURE = {'CH3OH': 1, 'O2': 1.5, 'N2': 1.5 * 3.76}  # 当量比为 1 的甲醇空气混合气
+
+
+def run_zero_dimensional(single_callback: bool) -> tuple[float, array]:
+    """
+    零维模型从进气门关闭附近压缩到上止点后
+    :param single_callback: 是否使用单回调的气缸反应器
+    :return: 耗时 [s], 压力曲线 [Pa]
+    """
+    geometry = EngineGeometry(SPEED, STROKE, EPSILON, BORE, LAMBDA, STROKE / (EPSILON - 1))
+    start = deg2rad(540) / (2 * pi * SPEED)
+    end = deg2rad(760) / (2 * pi * SPEED)
+    model = ZeroDimensional(str(Li), geometry, Hohenberg(), single_callback=single_callback)
+    result = model.build((330, 1e5, MIXTURE), geometry.cylinder_volume(start))
+    net = ReactorNet(result["reactors"])
+    net.initial_time = start
+    pressures = []
+    tic = time.perf_counter()
+    for t in linspace(start, end, 200)[1:]:
+        net.advance(t)
+        pressures.append(result["cylinder"].thermo.P)
+    return time.perf_counter() - tic, array(pressures)
+
+
+def run_two_zone(single_callback: bool, window: float) -> tuple[float, array]:
+    """
+    双区模型从点火开始计算
+    :param single_callback: 是否使用单回调的气缸反应器
+    :param window: 计算的曲轴转角范围 [deg]
+    :return: 耗时 [s], 已燃区压力曲线 [Pa]
+    """
+    geometry = SITwoZoneGeometry(SPEED, STROKE, EPSILON, BORE, LAMBDA)
+    ignition_time = deg2rad(700) / (2 * pi * SPEED)
+
+    def ignition(t: float) -> float:
+        return 2e5 if ignition_time <= t <= ignition_time + 1e-4 else 0.
+
+    entrain_rate = FractalTurbulent(geometry, MethanolHydrogenFlameSpeed())
+    model = TwoZoneModel(str(Li), geometry, ignition, entrain_rate, Hohenberg(), single_callback=single_callback)
+    start = ignition_time - 2e-4
+    result = model.build_ignition((700, 2e6, MIXTURE), geometry.cylinder_volume(start))
+    net = ReactorNet(result["reactors"])
+    net.initial_time = start
+    pressures = []
+    tic = time.perf_counter()
+    for t in linspace(start, start + deg2rad(window) / (2 * pi * SPEED), 30)[1:]:
+        net.advance(t)
+        pressures.append(result["burned zone"].thermo.P)
+    return time.perf_counter() - tic, array(pressures)
+
+
+if __name__ == '__main__':
+    logger.remove()
+    window = float(sys.argv[1]) if len(sys.argv) > 1 else 2.
+    for name, run in (('zero dimensional', run_zero_dimensional),
+                      (f'two zone ({window:g} deg)', lambda single: run_two_zone(single, window))):
+        multi_time, multi_pressure = run(False)
+        single_time, single_pressure = run(True)
+        deviation = float((abs(single_pressure - multi_pressure) / multi_pressure).max())
+        print(f'{name}: multi-callback {multi_time:.3f} s, single-callback {single_time:.3f} s, '
+              f'speed-up {multi_time / single_time:.2f}x, max relative pressure deviation {deviation:.1e}')
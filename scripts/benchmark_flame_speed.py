@@ -0,0 +1,68 @@
+# -*- coding:utf-8 -*-
+"""
+MethanolHydrogenFlameSpeed 标量计算的耗时对比与数值一致性检查,
+参考实现为改写前逐次构造系数矩阵并求和的版本
+用法: python scripts/benchmark_flame_speed.py
+@Author: MoonCake Without Moon
+@Time: 2025/7/10
+"""
+import timeit
+
+from numpy import array, sum, abs
+from numpy.random import default_rng
+
+from moon.flame_speed import MethanolHydrogenFlameSpeed
+
+
+def reference_s_l(model: MethanolHydrogenFlameSpeed, phi: float, t_u: float, p: float, y_dil: float,
+                  alpha_h2: float) -> float:
+    """
+    改写前的层流火焰速度计算
+    :param model: 甲醇-氢火焰速度 (提供拟合系数)
+    :param phi: 当量比
+    :param t_u: 未燃气体温度 [K]
+    :param p: 压力 [Pa]
+    :param y_dil: 残余气体质量分数
+    :param alpha_h2: 氢气体积分数
+    :return: 层流火焰速度 [m/s]
+    """
+    matrix_1 = array(
+        [1, phi, phi ** 2, alpha_h2, alpha_h2 ** 2, phi * alpha_h2,
+         phi ** 2 * alpha_h2, phi * alpha_h2 ** 2, phi ** 2 * alpha_h2 ** 2]
+    )
+    t_t_ref = t_u / model._T_ref
+    matrix_2 = array(
+        [1, phi, phi ** 2, alpha_h2, alpha_h2 ** 2, t_t_ref, t_t_ref ** 2,
+         phi * alpha_h2, phi * t_t_ref, alpha_h2 * t_t_ref,
+         phi ** 2 * alpha_h2, phi * alpha_h2 ** 2, phi ** 2 * alpha_h2 ** 2,
+         phi * t_t_ref ** 2, alpha_h2 * t_t_ref ** 2]
+    )
+    if phi <= 1:
+        s_l0 = sum(model._a_lower * matrix_1)
+        alpha = sum(model._b_lower * matrix_1)
+    else:
+        s_l0 = sum(model._a_upper * matrix_1)
+        alpha = sum(model._b_upper * matrix_1)
+    beta = sum(model._c * matrix_2)
+    gamma = sum(model._d * matrix_1)
+    return s_l0 * t_t_ref ** alpha * (p / model._p_ref) ** beta * (1 - gamma * y_dil) * 1e-2
+
+
+if __name__ == '__main__':
+    model = MethanolHydrogenFlameSpeed()
+    rng = default_rng(0)
+    n = 100_000
+    samples = array([rng.uniform(0.6, 1.5, n), rng.uniform(400, 2600, n), rng.uniform(1e5, 5e6, n),
+                     rng.uniform(0, 0.2, n), rng.uniform(0, 0.1, n)])
+    reference = array([reference_s_l(model, *sample) for sample in samples.T])
+    scalar = array([model._s_l(*sample) for sample in samples.T])
+    batch = model.laminar_flame_speed_batch(*samples)
+    print(f'max relative deviation: scalar {float((abs(scalar - reference) / abs(reference)).max()):.1e}, '
+          f'batch {float((abs(batch - reference.clip(0)) / abs(reference)).max()):.1e}')
+    point = tuple(float(value) for value in samples[:, 0])
+    repeat = 20_000
+    reference_time = timeit.timeit(lambda: reference_s_l(model, *point), number=repeat) / repeat
+    scalar_time = timeit.timeit(lambda: model._s_l(*point), number=repeat) / repeat
+    batch_time = timeit.timeit(lambda: model.laminar_flame_speed_batch(*samples), number=5) / 5 / n
+    print(f'per evaluation: reference {reference_time * 1e6:.2f} us, scalar {scalar_time * 1e6:.2f} us '
+          f'({reference_time / scalar_time:.1f}x), batch {batch_time * 1e9:.1f} ns')
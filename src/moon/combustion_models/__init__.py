@@ -4,4 +4,9 @@
 @Time: 2025/1/22
 """
 from ._combustion_models import *
+from ._cylinder_reactor import *
 from ._entrain_rate import *
+from ._adaptive_chemistry import *
+from ._knock import *
+from ._cycle_simulation import *
+from ._periodic_steady_state import *
@@ -0,0 +1,145 @@
+# -*- coding:utf-8 -*-
+"""
+提供自适应化学反应开关: 区域在廉价指标 (着火延迟积分或温度) 越过阈值前关闭化学反应, 之后开启
+@Author: MoonCake Without Moon
+@Time: 2025/7/17
+"""
+__all__ = ['ArrheniusIgnitionDelay', 'AdaptiveChemistry', 'ChemistrySwitch']
+
+from dataclasses import dataclass
+from typing import Callable
+
+from cantera import IdealGasReactor, ReactorNet
+from loguru import logger
+from numpy import exp, rad2deg
+
+from ._knock import TabulatedIgnitionDelay, IgnitionDelayIntegrator
+from ..geometry import *
+
+
+@dataclass(frozen=True)
+class ArrheniusIgnitionDelay:
+    """
+    Arrhenius 型着火延迟关联式 τ = a * (p / 1 atm) ** (-n) * exp(b / T) [s]
+    """
+    a: float  # 指前系数 [s]
+    n: float  # 压力指数
+    b: float  # 活化温度 [K]
+
+    @classmethod
+    def douaud_eyzat(cls, octane_number: float = 100.) -> 'ArrheniusIgnitionDelay':
+        """
+        Douaud-Eyzat 末端气体着火延迟关联式 τ = 17.68 ms * (ON / 100) ** 3.402 * (p / 1 atm) ** (-1.7) * exp(3800 / T)
+        :param octane_number: 辛烷值
+        :return: 着火延迟关联式
+        """
+        return cls(17.68e-3 * (octane_number / 100) ** 3.402, 1.7, 3800.)
+
+    def __call__(self, temperature: float, pressure: float) -> float:
+        """
+        着火延迟
+        :param temperature: 温度 [K]
+        :param pressure: 压力 [Pa]
+        :return: 着火延迟 [s]
+        """
+        return self.a * (pressure / 101325) ** -self.n * exp(self.b / temperature)
+
+
+class AdaptiveChemistry:
+    """
+    自适应化学反应开关的配置
+
+        所选区域在构建时关闭化学反应 (chemistry_enabled = False), 只计算物理过程;
+        每次推进反应器网络后以区域的温度与压力累积着火延迟积分 ∫dt/τ(T, p) (梯形公式),
+        着火延迟为 TabulatedIgnitionDelay 时以区域的当量比、温度、压力与残余气体质量分数查表,
+        积分达到 integral_threshold 或温度达到 temperature_threshold 时开启化学反应并重新初始化积分器。
+        积分阈值小于 1 (自燃时刻) 以留出余量, 保证开启时化学反应尚未显著进行。
+        关闭化学反应的区域组分不变, 因此不提供自由基判据
+    """
+
+    def __init__(self,
+                 ignition_delay: Callable[[float, float], float] | TabulatedIgnitionDelay | None = None,
+                 integral_threshold: float | None = 0.2,
+                 temperature_threshold: float | None = None,
+                 zones: tuple[str, ...] = ('unburned zone',)):
+        """
+        自适应化学反应开关的配置
+        :param ignition_delay: 着火延迟函数, 输入为温度 [K] 与压力 [Pa], 输出为着火延迟 [s];
+                               也可为 TabulatedIgnitionDelay (与爆震预测共用同一数据表);
+                               为 None 时使用 Douaud-Eyzat 关联式 (辛烷值 100)
+        :param integral_threshold: 着火延迟积分的开启阈值, 为 None 时不使用积分判据
+        :param temperature_threshold: 温度的开启阈值 [K], 为 None 时不使用温度判据
+        :param zones: 使用开关的区域, 为构建结果中的反应器字段名 ('unburned zone' 或 'burned zone');
+                      两区模型的 kinetics 燃烧计算方式靠已燃区的化学反应烧掉卷吸的预混气, 只能选 'unburned zone'
+        """
+        if integral_threshold is None and temperature_threshold is None:
+            raise ValueError('at least one of integral_threshold and temperature_threshold must be set')
+        for zone in zones:
+            if zone not in ('unburned zone', 'burned zone'):
+                raise ValueError("zones can only contain 'unburned zone' or 'burned zone'")
+        self.ignition_delay = ArrheniusIgnitionDelay.douaud_eyzat() if ignition_delay is None else ignition_delay
+        self.integral_threshold = integral_threshold  # 着火延迟积分的开启阈值
+        self.temperature_threshold = temperature_threshold  # 温度的开启阈值 [K]
+        self.zones = zones  # 使用开关的区域
+
+    def switch(self, reactor: IdealGasReactor, name: str,
+               geometry: EngineGeometry | None = None) -> 'ChemistrySwitch':
+        """
+        关闭反应器的化学反应并返回其开关
+        :param reactor: 反应器
+        :param name: 区域名称, 用于日志
+        :param geometry: 发动机几何, 用于在日志中给出开启时的曲轴转角, 为 None 时只给出时间
+        :return: 化学反应开关
+        """
+        return ChemistrySwitch(self, reactor, name, geometry)
+
+
+class ChemistrySwitch(IgnitionDelayIntegrator):
+    """
+    一个区域的化学反应开关, 由 AdaptiveChemistry.switch 创建; 每次推进反应器网络后调用 update,
+    推进间隔的要求见 IgnitionDelayIntegrator
+    """
+
+    def __init__(self, config: AdaptiveChemistry, reactor: IdealGasReactor, name: str,
+                 geometry: EngineGeometry | None = None):
+        """
+        一个区域的化学反应开关
+        :param config: 开关配置
+        :param reactor: 反应器
+        :param name: 区域名称
+        :param geometry: 发动机几何
+        """
+        super().__init__(reactor, config.ignition_delay)
+        self.config = config  # 开关配置
+        self.name = name  # 区域名称
+        self.geometry = geometry  # 发动机几何
+        self.switch_time: float | None = None  # 开启化学反应的时间 [s], 尚未开启时为 None
+        reactor.chemistry_enabled = False
+
+    @property
+    def enabled(self) -> bool:
+        """化学反应是否已开启"""
+        return self.switch_time is not None
+
+    def update(self, reactor_net: ReactorNet) -> bool:
+        """
+        以反应器当前状态累积着火延迟积分, 越过阈值时开启化学反应并重新初始化积分器
+        :param reactor_net: 反应器网络
+        :return: 本次是否开启了化学反应
+        """
+        if self.switch_time is not None:
+            return False
+        config = self.config
+        integral = self.integrate(reactor_net)
+        temperature = self.state.T
+        if not ((config.integral_threshold is not None and integral >= config.integral_threshold) or
+                (config.temperature_threshold is not None and temperature >= config.temperature_threshold)):
+            return False
+        time = reactor_net.time
+        self.reactor.chemistry_enabled = True
+        reactor_net.reinitialize()
+        self.switch_time = time
+        angle = '' if self.geometry is None else f' ({rad2deg(self.geometry.crank_angle(time)):.2f} deg)'
+        logger.info(f'chemistry enabled in {self.name} at {time:.6g} s{angle}, '
+                    f'ignition delay integral {integral:.3g}, temperature {temperature:.1f} K')
+        return True
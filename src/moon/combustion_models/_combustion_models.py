@@ -12,7 +12,35 @@ from numpy import pi
 
 from ..geometry import *
 from ..heat_transfer import *
+from ..flame_speed import ParameterRangeInfo
 from ._entrain_rate import *
+from ._cylinder_reactor import *
+from ._adaptive_chemistry import *
+from ._knock import *
+from ..tools.reactor_state import ReactorState
+
+
+def _equilibrium_solution(reaction_mechanism: str,
+                          compositions: list[tuple[float, float, dict[str, float] | list]],
+                          threshold: float = 1e-6) -> Solution:
+    """
+    平衡燃烧模式使用的无反应气体: 只保留给定组成中出现的组分与其定焓定压平衡产物中摩尔分数超过阈值的组分,
+    反应器网络的状态量随之减少, 数值雅可比矩阵的计算量相应降低
+    :param reaction_mechanism: 反应机理 (提供组分热力学与输运数据)
+    :param compositions: 各反应器与外界环境的初始温度、压力、组分
+    :param threshold: 平衡产物组分的摩尔分数阈值
+    :return: 无反应的理想气体
+    """
+    gas = Solution(reaction_mechanism)
+    keep = set()
+    for tpx in compositions:
+        gas.TPX = tpx
+        keep.update(name for name, x in zip(gas.species_names, gas.X) if x > 0)
+        gas.equilibrate('HP')
+        keep.update(name for name, x in zip(gas.species_names, gas.X) if x > threshold)
+    species = [gas.species(name) for name in gas.species_names if name in keep]
+    return Solution(thermo='ideal-gas', kinetics='gas', species=species, reactions=[],
+                    transport_model=gas.transport_model)
 
 
 class ZeroDimensional:
@@ -21,10 +49,20 @@ class ZeroDimensional:
     def __init__(self,
                  reaction_mechanism: str,
                  geometry: EngineGeometry,
-                 heat_transfer: HeatTransferBase | None = None):
+                 heat_transfer: HeatTransferBase | None = None,
+                 single_callback: bool = False):
+        """
+        零维模型
+        :param reaction_mechanism: 反应机理
+        :param geometry: 发动机几何
+        :param heat_transfer: 传热模型
+        :param single_callback: 是否使用单回调的气缸反应器 (EngineCylinderReactor),
+                                活塞做功与传热在一个钩子中计算, 不再注册 Wall 的 Python 回调
+        """
         self._reaction_mechanism = reaction_mechanism  # 反应机理
         self._geometry = geometry  # 发动机几何
         self._heat_transfer = heat_transfer  # 传热模型
+        self._single_callback = single_callback  # 是否使用单回调的气缸反应器
 
     def build(self, init_tpx: tuple[float, float, dict[str, float] | list],
               init_volume: float) -> dict[str, Any]:
@@ -38,11 +76,13 @@ class ZeroDimensional:
             "environment": 外界环境 Cantera Reservoir
             "heat transfer": 传热 Cantera Wall, 如果 heat_transfer 设置为 None 则为 None
             "reactors": 所有反应器组成的列表
+            "evaluator": 单回调模式下的右端项钩子 SingleZoneEvaluator, 否则为 None;
+                         单回调模式下活塞 Wall 不设置速度与热流, "heat transfer" 为 None
         """
         gas = Solution(self._reaction_mechanism)
         gas.TPX = init_tpx
         # 气缸
-        cylinder = IdealGasReactor(gas)
+        cylinder = EngineCylinderReactor(gas) if self._single_callback else IdealGasReactor(gas)
         cylinder.volume = init_volume
         # 外界环境
         gas.TPX = 300, 101325, {'N2': 0.79, 'O2': 0.21}
@@ -50,15 +90,21 @@ class ZeroDimensional:
         # 活塞
         piston = Wall(cylinder, environment)
         piston.area = self._geometry.area_bore
-        piston.velocity = self._geometry.piston_velocity
         # 如果没有传热则返回结果
         result = {
             "cylinder": cylinder,
             "piston": piston,
             "environment": environment,
             "heat transfer": None,
-            "reactors": [cylinder]
+            "reactors": [cylinder],
+            "evaluator": None
         }
+        if self._single_callback:
+            evaluator = SingleZoneEvaluator(self._geometry, self._heat_transfer)
+            evaluator.bind(cylinder)
+            result["evaluator"] = evaluator
+            return result
+        piston.velocity = self._geometry.piston_velocity
         if self._heat_transfer is None:
             return result
         # 如果有传热则加上传热
@@ -91,13 +137,64 @@ class TwoZoneModel:
                  ignition_time_function: Callable[[float], float],
                  entrain_rate: EntrainRateBase,
                  heat_transfer: HeatTransferBase | None = None,
-                 fire_core_volume_fraction: float = 0.001):
+                 fire_core_volume_fraction: float = 0.001,
+                 single_callback: bool = False,
+                 burn_mode: str = 'kinetics',
+                 adaptive_chemistry: AdaptiveChemistry | None = None,
+                 knock: LivengoodWu | None = None):
+        """
+        双区模型
+        :param reaction_mechanism: 反应机理
+        :param geometry: 发动机几何
+        :param ignition_time_function: 点火时间函数 (火花塞传给已燃区的热流 [W])
+        :param entrain_rate: 卷吸模型
+        :param heat_transfer: 传热模型
+        :param fire_core_volume_fraction: 初始火核体积百分比
+        :param single_callback: 是否使用单回调的气缸反应器 (EngineCylinderReactor),
+                                活塞做功、传热、点火与卷吸在一个钩子中计算, 只保留两区间的压力平衡 Wall;
+                                'kinetics' 燃烧计算方式下并不比各自回调的接法快 (卷吸的组分与能量项在 Python 中计算,
+                                抵消了回调次数的减少), 因此默认关闭; 'equilibrium' 方式需要由钩子把平衡产物加入已燃区,
+                                总是使用
+        :param burn_mode: 燃烧计算方式
+                          'kinetics': 两区均按详细反应机理计算
+                          'equilibrium': 两区使用只含初始组分与主要平衡产物的无反应气体,
+                                         卷吸质量以平衡产物进入已燃区, 已燃区保持平衡,
+                                         需在每次 (或每隔几次) 推进反应器网络后调用
+                                         result["evaluator"].equilibrate(net);
+                                         不计未燃区自燃 (爆震), 配合 Wiebe 卷吸用于快速标定与方案筛选,
+                                         总是使用单回调的气缸反应器
+        :param adaptive_chemistry: 自适应化学反应开关, 所选区域在指标越过阈值前关闭化学反应,
+                                   需在每次推进反应器网络后对 result["chemistry switches"] 中的每个开关调用
+                                   update(net); 为 None 时各区始终计算化学反应, 只用于 'kinetics' 燃烧计算方式
+        :param knock: Livengood-Wu 爆震预测, 需在每次推进反应器网络后调用 result["knock integrator"].update(net);
+                      为 None 时不预测爆震
+        """
+        if burn_mode not in ('kinetics', 'equilibrium'):
+            raise ValueError("burn_mode can only be 'kinetics' or 'equilibrium'")
+        if adaptive_chemistry is not None and burn_mode != 'kinetics':
+            raise ValueError("adaptive_chemistry can only be used with burn_mode 'kinetics'")
+        if adaptive_chemistry is not None and 'burned zone' in adaptive_chemistry.zones:
+            # kinetics 方式下卷吸进已燃区的预混气由化学反应烧掉, 关闭已燃区的化学反应会使其不再燃烧
+            raise ValueError("adaptive_chemistry cannot switch the 'burned zone' with burn_mode 'kinetics'")
         self._reaction_mechanism = reaction_mechanism  # 反应机理
         self._geometry = geometry  # 发动机几何
         self._ignition_time_function = ignition_time_function  # 点火时间函数
         self._entrain_rate = entrain_rate  # 卷吸模型
         self._heat_transfer = heat_transfer  # 传热模型
         self._fire_core_volume_fraction = fire_core_volume_fraction  # 初始火核体积百分比
+        self._burn_mode = burn_mode  # 燃烧计算方式
+        self._adaptive_chemistry = adaptive_chemistry  # 自适应化学反应开关
+        self._knock = knock  # 爆震预测
+        self._single_callback = single_callback or burn_mode == 'equilibrium'  # 是否使用单回调的气缸反应器
+
+    def report_ranges(self, reset: bool = True) -> list[ParameterRangeInfo]:
+        """
+        输出卷吸模型所用经验关联式 (火焰速度) 的适用范围汇总日志 (仅在存在越界时);
+        右端项中只计数, 在一次燃烧计算 (推进反应器网络到燃烧结束) 后调用一次
+        :param reset: 输出后是否清零
+        :return: 各参数的诊断信息
+        """
+        return self._entrain_rate.report_ranges(reset)
 
     def build_ignition(self, init_tpx: tuple[float, float, dict[str, float] | list],
                        init_volume: float) -> dict[str, Any]:
@@ -106,7 +203,8 @@ class TwoZoneModel:
         :param init_tpx: 初始温度、压力、组分
         :param init_volume: 初始体积
         :return: 包含了反应器网络各组件的字典
-            "spark plug": 火花塞 Cantera Wall
+            "spark plug": 火花塞 Cantera Wall, 单回调模式下点火热流由钩子计算, 为 None;
+                          平衡燃烧模式下火核直接设为平衡产物, 不使用点火时间函数
             其余字段见 self.build_combustion() 函数文档
         """
         result = self.build_combustion(
@@ -115,7 +213,12 @@ class TwoZoneModel:
             unburned_tpx=init_tpx,
             unburned_volume=init_volume * (1 - self._fire_core_volume_fraction)
         )
-        # 添加火花塞
+        # 添加火花塞; 平衡燃烧模式下火核在构建时已设为平衡产物, 不再加入点火热流
+        if self._single_callback:
+            if self._burn_mode == 'kinetics':
+                result["evaluator"].ignition = self._ignition_time_function
+            result["spark plug"] = None
+            return result
         spark_plug = Wall(result["environment"], result["burned zone"])
         spark_plug.heat_flux = self._ignition_time_function
         result["spark plug"] = spark_plug
@@ -137,34 +240,78 @@ class TwoZoneModel:
             "piston": 活塞 Cantera Wall
             "environment": 外界环境 Cantera Reservoir
             "burning rate": 燃烧速率，即已燃区中气体进入未燃区速度 Cantera MassFlowController
+            "entrain rate": 卷吸策略返回的燃烧速率计算函数 (例如 FractalTurbulentEvaluator, 可查询缓存统计)
             "flame front": 火焰前锋 Cantera Wall
             "burned heat transfer": 已燃区传热 Cantera Wall
             "unburned heat transfer": 未燃区传热 Cantera Wall
             "reactors": 所有反应器组成的列表
+            "chemistry switches": 自适应化学反应开关 ChemistrySwitch 组成的列表, 未设置 adaptive_chemistry 时为空
+            "knock integrator": 未燃区的 Livengood-Wu 积分器 KnockIntegrator, 未设置 knock 时为 None
+            "evaluator": 单回调模式下的右端项钩子 TwoZoneEvaluator, 否则为 None;
+                         单回调模式下活塞 Wall 不设置速度与热流, "burning rate" 与两个传热字段为 None;
+                         平衡燃烧模式下已燃区在构建时即设为平衡状态
         """
-        gas = Solution(self._reaction_mechanism)
+        environment_tpx = 300, 101325, {'O2': 0.21, 'N2': 0.79}  # 外界环境
+        if self._burn_mode == 'equilibrium':
+            gas = _equilibrium_solution(self._reaction_mechanism, [burned_tpx, unburned_tpx, environment_tpx])
+        else:
+            gas = Solution(self._reaction_mechanism)
+        reactor_type = EngineCylinderReactor if self._single_callback else IdealGasReactor
         # 已燃区
         gas.TPX = burned_tpx
-        burned = IdealGasReactor(gas)
+        burned = reactor_type(gas)
         burned.volume = burned_volume
         # 未燃区
         gas.TPX = unburned_tpx
-        unburned = IdealGasReactor(gas)
+        unburned = reactor_type(gas)
         unburned.volume = unburned_volume
         # 外界环境
-        gas.TPX = 300, 101325, {'O2': 0.21, 'N2': 0.79}
+        gas.TPX = environment_tpx
         environment = Reservoir(gas)
         # 活塞
         piston = Wall(unburned, environment)
         piston.area = self._geometry.area_bore
-        piston.velocity = self._geometry.piston_velocity
         # 压力平衡
         flame_front = Wall(burned, unburned)
         flame_front.area = self._geometry.area_bore * 2
         flame_front.expansion_rate_coeff = unburned.thermo.sound_speed
+        # 自适应化学反应开关
+        switches = []
+        if self._adaptive_chemistry is not None:
+            zones = {"burned zone": burned, "unburned zone": unburned}
+            switches = [self._adaptive_chemistry.switch(zones[zone], zone, self._geometry)
+                        for zone in self._adaptive_chemistry.zones]
+        knock = None if self._knock is None else self._knock.integrator(unburned, self._geometry)  # 爆震积分器
+        if self._single_callback:
+            # 卷吸、火焰速度与传热策略共用两区的状态快照, 由钩子在每次右端项计算时刷新
+            burned_state = ReactorState(burned)
+            unburned_state = ReactorState(unburned)
+            entrain_rate = self._entrain_rate.mass_flow_rate(burned_state, unburned_state)  # 燃烧速率计算函数
+            evaluator = TwoZoneEvaluator(self._geometry, entrain_rate, self._heat_transfer)
+            evaluator.bind(burned, unburned, burned_state, unburned_state)
+            if self._burn_mode == 'equilibrium':
+                evaluator.equilibrate()
+                burned_state.refresh()
+            return {
+                "burned zone": burned,
+                "unburned zone": unburned,
+                "piston": piston,
+                "environment": environment,
+                "burning rate": None,
+                "entrain rate": entrain_rate,
+                "flame front": flame_front,
+                "burned heat transfer": None,
+                "unburned heat transfer": None,
+                "reactors": [burned, unburned],
+                "chemistry switches": switches,
+                "knock integrator": knock,
+                "evaluator": evaluator
+            }
+        piston.velocity = self._geometry.piston_velocity
         # 设置燃烧速率为分形湍流燃烧模型
         burning_rate = MassFlowController(unburned, burned)
-        burning_rate.mass_flow_rate = self._entrain_rate.mass_flow_rate(burned, unburned)
+        entrain_rate = self._entrain_rate.mass_flow_rate(burned, unburned)  # 燃烧速率计算函数
+        burning_rate.mass_flow_rate = entrain_rate
         # 如果没有传热则返回结果
         result = {
             "burned zone": burned,
@@ -172,10 +319,14 @@ class TwoZoneModel:
             "piston": piston,
             "environment": environment,
             "burning rate": burning_rate,
+            "entrain rate": entrain_rate,
             "flame front": flame_front,
             "burned heat transfer": None,
             "unburned heat transfer": None,
-            "reactors": [burned, unburned]
+            "reactors": [burned, unburned],
+            "chemistry switches": switches,
+            "knock integrator": knock,
+            "evaluator": None
         }
         if self._heat_transfer is None:
             return result
@@ -187,10 +338,10 @@ class TwoZoneModel:
             def burned_heat_flux(time: float) -> float:
                 """已燃区热流量"""
                 alpha = burned_heat_transfer(time)
-                burned_volume_percentage = burned.volume / self._geometry.cylinder_volume(time)
-                a_cover = self._geometry.burned_cover_area(time, burned_volume_percentage)
-                a_wall = self._geometry.burned_wall_area(time, burned_volume_percentage)
-                a_crown = self._geometry.burned_piston_area(time, burned_volume_percentage)
+                flame = self._geometry.flame_geometry_by_volume(time, burned.volume)  # 双区几何快照
+                a_cover = flame.burned_cover_area
+                a_wall = flame.burned_wall_area
+                a_crown = flame.burned_piston_area
                 t = burned.T
                 return (((t - self._heat_transfer.cover_temperature) * a_cover +
                          (t - self._heat_transfer.wall_temperature) * a_wall +
@@ -201,10 +352,10 @@ class TwoZoneModel:
             def unburned_heat_flux(time: float) -> float:
                 """未燃区热流量, 认为全从活塞面积流出"""
                 alpha = unburned_heat_transfer(time)
-                burned_volume_percentage = burned.volume / self._geometry.cylinder_volume(time)
-                a_cover = self._geometry.unburned_cover_area(time, burned_volume_percentage)
-                a_wall = self._geometry.unburned_wall_area(time, burned_volume_percentage)
-                a_crown = self._geometry.unburned_piston_area(time, burned_volume_percentage)
+                flame = self._geometry.flame_geometry_by_volume(time, burned.volume)  # 双区几何快照
+                a_cover = flame.unburned_cover_area
+                a_wall = flame.unburned_wall_area
+                a_crown = flame.unburned_piston_area
                 t = unburned.T
                 return (((t - self._heat_transfer.cover_temperature) * a_cover +
                          (t - self._heat_transfer.wall_temperature) * a_wall +
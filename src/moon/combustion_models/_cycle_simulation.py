@@ -0,0 +1,315 @@
+# -*- coding:utf-8 -*-
+"""
+提供全循环多循环计算: 进气、压缩、燃烧、膨胀、排气, 残余废气在循环间保留
+@Author: MoonCake Without Moon
+@Time: 2025/7/15
+"""
+__all__ = ['ValveTiming', 'CycleRecord', 'CycleSimulation']
+
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from cantera import Reservoir, Valve, ReactorNet
+from loguru import logger
+from numpy import pi, sin, linspace, empty, zeros, ndarray, interp, argmax, abs as np_abs
+from scipy.integrate import trapezoid
+
+from ._combustion_models import ZeroDimensional
+from ._cylinder_reactor import _wall_heat
+from ..geometry import EngineGeometry
+from ..heat_transfer import HeatTransferBase, WallTemperatureModel
+
+
+@dataclass
+class ValveTiming:
+    """
+    气阀正时, 字段与 ECS 的 ValveComponent 相同, CycleSimulation 也可直接使用 ValveComponent
+    """
+    open: float = 0  # 开启角 [rad]
+    close: float = 0  # 关闭角 [rad]
+    valve_coefficient: float = 1e-5  # 阀系数 [kg/(s*Pa)]
+    time_function: Callable[[float], float] = None  # 升程系数, 输入为曲轴转角 [rad], 为 None 时由开启角与关闭角生成
+    valve: Valve | None = None  # cantera阀门, 由 CycleSimulation 设置
+    reverse_valve: Valve | None = None  # 反向cantera阀门 (回流), 由 CycleSimulation 设置
+
+    @property
+    def mass_flow_rate(self) -> float:
+        """上游流向下游的净质量流量 [kg/s], 回流为负"""
+        forward = 0 if self.valve is None else self.valve.mass_flow_rate
+        return forward if self.reverse_valve is None else forward - self.reverse_valve.mass_flow_rate
+
+
+def _lift_function(open_angle: float, close_angle: float) -> Callable[[float], float]:
+    """
+    默认的升程系数: 开启角到关闭角之间为 sin² 曲线, 其余为 0, 允许跨过 4π
+    :param open_angle: 开启角 [rad]
+    :param close_angle: 关闭角 [rad]
+    :return: 升程系数函数, 输入为曲轴转角 [rad], 输出 0 到 1
+    """
+    duration = (close_angle - open_angle) % (4 * pi)  # 开启持续角 [rad]
+    if duration == 0:
+        raise ValueError('valve open and close angles must differ')
+
+    def lift(angle: float) -> float:
+        x = (angle - open_angle) % (4 * pi) / duration
+        return float(sin(pi * x) ** 2) if x < 1 else 0.
+
+    return lift
+
+
+@dataclass(slots=True)
+class CycleRecord:
+    """单个循环的记录, 数组按采样角排列, 首尾分别为循环起点与终点"""
+    cycle: int  # 循环序号, 从 1 开始
+    angle: ndarray  # 曲轴转角 [rad], 从循环起始角开始连续增加 4π
+    pressure: ndarray  # 缸压 [Pa]
+    temperature: ndarray  # 缸内温度 [K]
+    mass: ndarray  # 缸内质量 [kg]
+    volume: ndarray  # 气缸容积 [m**3]
+    imep: float  # 平均指示压力 (包含泵气功) [Pa]
+    peak_pressure: float  # 最高缸压 [Pa]
+    peak_pressure_angle: float  # 最高缸压对应的曲轴转角 [rad]
+    trapped_mass: float  # 进气门关闭时的缸内质量 [kg]
+    residual_mass: float  # 排气门关闭时的缸内质量 (残余废气) [kg]
+    residual_fraction: float  # 残余废气系数, 残余废气质量与缸内总质量之比
+    wall_heat: float  # 本循环气体传给缸盖、缸壁、活塞冠的热量 [J], 不计传热时为 0
+    wall_temperature_change: float | None  # 本循环起止时壁面表面温度的最大变化 [K], 无壁面温度模型时为 None
+    cycle_residual: float | None  # 与上一循环缸压的最大差值与本循环最高缸压之比, 第一个循环为 None
+
+
+class CycleSimulation:
+    """
+    全循环多循环计算
+
+        单区气缸 (单回调气缸反应器, 详细化学反应) 通过 cantera Valve 与进气、排气环境相连,
+        气阀由 ValveTiming 或 ValveComponent 的开启角、关闭角、阀系数与升程系数驱动。
+        cantera Valve 只允许上游压力高于下游时的单向流动, backflow 为 True 时每个气阀另设一个阀系数与升程相同的
+        反向 Valve, 以模拟气门重叠期的回流: 排气回流带入排气环境的组分, 进气道回流的气体并入进气环境,
+        重新流入时按进气组分计 (不追踪进气道中的废气)。反向 Valve 挂在对应正时的 reverse_valve 上,
+        正时的 mass_flow_rate 为两者之差 (净流量)。
+        反应器网络只构建一次, 循环之间不重建也不重新初始化积分器: 上一循环终了时的缸内气体 (残余废气)
+        直接作为下一循环的初值, 积分器连续推进, 时间跨循环增加 (各时间函数按曲轴转角取值)。
+        每个循环的采样写入预先分配的数组, 循环间只传递标量统计量。
+        设置壁面温度模型时, 每隔 wall_step_angle 以采样时的燃气温度与传热系数推进壁面导热,
+        并把表面温度写回本气缸的右端项钩子。
+        曲轴转角 0 (4π) 为压缩上止点, 默认从换气上止点 (2π) 开始一个循环
+    """
+
+    def __init__(self,
+                 reaction_mechanism: str,
+                 geometry: EngineGeometry,
+                 inlet_tpx: tuple[float, float, dict[str, float] | str],
+                 outlet_tpx: tuple[float, float, dict[str, float] | str],
+                 intake_valves: list[Any],
+                 exhaust_valves: list[Any],
+                 heat_transfer: HeatTransferBase | None = None,
+                 ignition: Callable[[float], float] | None = None,
+                 init_tpx: tuple[float, float, dict[str, float] | str] | None = None,
+                 start_angle: float = 2 * pi,
+                 resolution: float = pi / 180,
+                 wall_model: WallTemperatureModel | None = None,
+                 wall_step_angle: float = 5 * pi / 180,
+                 steady_wall: bool = False,
+                 backflow: bool = True):
+        """
+        全循环多循环计算
+        :param reaction_mechanism: 反应机理
+        :param geometry: 发动机几何
+        :param inlet_tpx: 进气环境的温度、压力、组分 (进气道喷射时为预混气)
+        :param outlet_tpx: 排气环境的温度、压力、组分
+        :param intake_valves: 进气阀正时 (ValveTiming 或 ValveComponent)
+        :param exhaust_valves: 排气阀正时 (ValveTiming 或 ValveComponent)
+        :param heat_transfer: 传热模型, 为 None 时不计传热
+        :param ignition: 点火热流函数 (传给气缸的热流 [W]), 输入为曲轴转角 [rad], 为 None 时不点火
+        :param init_tpx: 第一个循环起点的缸内温度、压力、组分, 为 None 时为排气环境
+        :param start_angle: 循环起始角 [rad]
+        :param resolution: 采样间隔 [rad]
+        :param wall_model: 壁面温度模型, 绑定到本气缸的右端项钩子, 为 None 时壁面温度不变
+        :param wall_step_angle: 壁面温度模型的更新间隔 [rad], 取为采样间隔的整数倍
+        :param steady_wall: 每个循环结束时是否把壁面设为循环平均边界条件下的稳态温度场 (加速壁面温度收敛),
+                            默认不设, 壁面按瞬态导热连续推进
+        :param backflow: 是否为每个气阀设置反向 Valve 以模拟回流, 为 False 时回流被截断为 0
+        """
+        if not intake_valves or not exhaust_valves:
+            raise ValueError('at least one intake valve and one exhaust valve are required')
+        if resolution <= 0:
+            raise ValueError('resolution must be positive')
+        self.geometry = geometry  # 发动机几何
+        self.intake_valves = intake_valves  # 进气阀正时
+        self.exhaust_valves = exhaust_valves  # 排气阀正时
+        self.start_angle = start_angle  # 循环起始角 [rad]
+        self.heat_transfer = heat_transfer  # 传热模型
+        self.wall_model = wall_model  # 壁面温度模型
+        self.steady_wall = steady_wall  # 循环结束时是否把壁面设为稳态温度场
+        self._wall_stride = max(1, int(round(wall_step_angle / resolution)))  # 壁面温度模型每隔几个采样更新一次
+        omega = 2 * pi * geometry.speed  # 曲轴角速度 [rad/s]
+        self._omega = omega
+        samples = int(round(4 * pi / resolution))  # 每个循环的采样间隔数
+        self._offsets = linspace(0, 4 * pi, samples + 1)  # 采样角相对循环起始角的偏移 [rad]
+        sample_times = (start_angle + self._offsets) / omega
+        self._volumes = geometry.cylinder_volume(sample_times)  # 采样角处的气缸容积
+        self._wall_area = geometry.piston_position(sample_times) * geometry.bore * pi  # 采样角处的缸壁面积
+        # 进气门关闭与排气门关闭相对循环起始角的偏移, 用于统计充量与残余废气
+        self._ivc_offset = max((valve.close - start_angle) % (4 * pi) for valve in intake_valves)
+        self._evc_offset = max((valve.close - start_angle) % (4 * pi) for valve in exhaust_valves)
+
+        # 气缸: 与零维模型相同的单回调气缸反应器 (活塞做功、传热与点火在一个钩子中计算)
+        start_time = start_angle / omega  # 第一个循环的起始时间 [s]
+        model = ZeroDimensional(reaction_mechanism, geometry, heat_transfer, single_callback=True)
+        network = model.build(outlet_tpx if init_tpx is None else init_tpx, geometry.cylinder_volume(start_time))
+        self.cylinder = network["cylinder"]  # 气缸反应器
+        self.evaluator = network["evaluator"]  # 右端项钩子
+        if ignition is not None:
+            self.evaluator.ignition = lambda time: ignition(geometry.crank_angle(time))
+        if wall_model is not None:
+            wall_model.bind(self.evaluator)
+        # 进排气环境
+        gas = self.cylinder.thermo
+        gas.TPX = inlet_tpx
+        self.inlet = Reservoir(gas)  # 进气环境
+        gas.TPX = outlet_tpx
+        self.outlet = Reservoir(gas)  # 排气环境
+        # 气阀
+        self.valves: list[Valve] = []  # 正向 cantera 阀门, 与进气阀、排气阀正时一一对应
+        self.reverse_valves: list[Valve] = []  # 反向 cantera 阀门 (回流), 挂在对应正时的 reverse_valve 上
+        for specs, upstream, downstream in ((intake_valves, self.inlet, self.cylinder),
+                                            (exhaust_valves, self.cylinder, self.outlet)):
+            for spec in specs:
+                lift = spec.time_function or _lift_function(spec.open, spec.close)
+                valve = Valve(upstream, downstream)
+                valve.valve_coeff = spec.valve_coefficient
+                valve.time_function = lambda time, lift=lift: lift(geometry.crank_angle(time))
+                spec.valve = valve
+                self.valves.append(valve)
+                if backflow:
+                    reverse = Valve(downstream, upstream)  # 反向阀门, 模拟回流
+                    reverse.valve_coeff = spec.valve_coefficient
+                    reverse.time_function = lambda time, lift=lift: lift(geometry.crank_angle(time))
+                    spec.reverse_valve = reverse
+                    self.reverse_valves.append(reverse)
+
+        # 采样时的传热系数, 与钩子中的传热计算相同的公式
+        self._alpha = (None if heat_transfer is None
+                       else heat_transfer.heat_transfer_coefficient(self.cylinder, geometry))
+        self.reactor_net = ReactorNet([self.cylinder])  # 反应器网络, 只构建一次
+        self.reactor_net.initial_time = start_time
+        self.cycles = 0  # 已计算的循环数
+        self._previous_pressure: ndarray | None = None  # 上一循环的缸压
+
+    def state(self) -> ndarray:
+        """
+        当前 (循环边界处) 的气缸状态量
+        :return: 质量、体积、温度、各组分质量分数
+        """
+        return self.cylinder.get_state()
+
+    def set_state(self, state: ndarray) -> None:
+        """
+        在循环边界处原地设置气缸状态量并重新初始化积分器, 用于周期稳态的加速求解
+        :param state: 质量、体积、温度、各组分质量分数 (与 state() 的排列相同)
+        """
+        gas = self.cylinder.thermo
+        gas.TDY = state[2], state[0] / state[1], state[3:]
+        self.cylinder.volume = state[1]
+        self.cylinder.syncState()
+        self.reactor_net.reinitialize()
+
+    def update_boundary(self,
+                        inlet_tpx: tuple[float, float, dict[str, float] | str] | None = None,
+                        outlet_tpx: tuple[float, float, dict[str, float] | str] | None = None) -> None:
+        """
+        原地修改进排气环境 (例如工况扫描中的进气压力), 不重建反应器网络, 残余废气保留
+        :param inlet_tpx: 进气环境的温度、压力、组分, 为 None 时不变
+        :param outlet_tpx: 排气环境的温度、压力、组分, 为 None 时不变
+        """
+        for reservoir, tpx in ((self.inlet, inlet_tpx), (self.outlet, outlet_tpx)):
+            if tpx is not None:
+                reservoir.thermo.TPX = tpx
+                reservoir.syncState()
+        self.reactor_net.reinitialize()
+
+    def run_cycle(self) -> CycleRecord:
+        """
+        从当前状态连续计算一个循环
+        :return: 循环记录
+        """
+        cylinder = self.cylinder
+        reactor_net = self.reactor_net
+        offsets = self._offsets
+        n = len(offsets)
+        pressure = empty(n)
+        temperature = empty(n)
+        mass = empty(n)
+        heat = zeros(n)  # 传热率 [W]
+        alpha_fn = self._alpha
+        wall_model = self.wall_model
+        wall_stride = self._wall_stride
+        area_bore = self.geometry.area_bore
+        wall_area = self._wall_area
+        start_time = reactor_net.time
+        angle = self.start_angle + offsets
+        times = start_time + offsets / self._omega
+        for i in range(n):
+            if i:
+                reactor_net.advance(times[i])
+            gas = cylinder.thermo
+            pressure[i] = gas.P
+            temperature[i] = gas.T
+            mass[i] = cylinder.mass
+            if alpha_fn is not None:
+                alpha = alpha_fn(times[i])
+                heat[i] = _wall_heat(self.evaluator.wall_temperatures, alpha, temperature[i], area_bore, wall_area[i],
+                                     area_bore * 1.3)
+                if wall_model is not None and i % wall_stride == 0:
+                    wall_model.update(times[i], temperature[i], alpha)
+        volume = self._volumes
+        self.cycles += 1
+        wall_change = None if wall_model is None else wall_model.end_cycle(self.steady_wall)
+        peak = int(argmax(pressure))
+        trapped_mass = float(interp(self._ivc_offset, offsets, mass))
+        residual_mass = float(interp(self._evc_offset, offsets, mass))
+        previous = self._previous_pressure
+        cycle_residual = None if previous is None else float(np_abs(pressure - previous).max() / pressure[peak])
+        self._previous_pressure = pressure
+        return CycleRecord(
+            cycle=self.cycles,
+            angle=angle,
+            pressure=pressure,
+            temperature=temperature,
+            mass=mass,
+            volume=volume,
+            imep=float(trapezoid(pressure, volume) / self.geometry.working_volume),
+            peak_pressure=float(pressure[peak]),
+            peak_pressure_angle=float(angle[peak]),
+            trapped_mass=trapped_mass,
+            residual_mass=residual_mass,
+            residual_fraction=residual_mass / trapped_mass,
+            wall_heat=float(trapezoid(heat, times)),
+            wall_temperature_change=wall_change,
+            cycle_residual=cycle_residual
+        )
+
+    def run(self, cycles: int, tolerance: float | None = None,
+            callback: Callable[[CycleRecord], None] | None = None) -> list[CycleRecord]:
+        """
+        连续计算多个循环
+        :param cycles: 最大循环数, 至少为 1
+        :param tolerance: 周期收敛判据 (相邻两循环缸压的最大差值与最高缸压之比), 达到后提前结束, 为 None 时算满
+        :param callback: 每个循环结束后调用, 输入为该循环的记录
+        :return: 各循环的记录
+        """
+        if cycles < 1:
+            raise ValueError('cycles must be at least 1')
+        records = []
+        for _ in range(cycles):
+            record = self.run_cycle()
+            records.append(record)
+            if callback is not None:
+                callback(record)
+            if tolerance is not None and record.cycle_residual is not None and record.cycle_residual < tolerance:
+                break
+        else:
+            if tolerance is not None:
+                logger.warning(f'cycle simulation did not converge in {cycles} cycles, the relative '
+                               f'cycle-to-cycle pressure difference is {records[-1].cycle_residual}')
+        return records
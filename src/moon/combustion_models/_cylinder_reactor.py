@@ -0,0 +1,257 @@
+# -*- coding:utf-8 -*-
+"""
+提供单回调的发动机气缸反应器: 活塞做功、传热与区间卷吸在每次右端项计算时由一个钩子统一计算
+@Author: MoonCake Without Moon
+@Time: 2025/7/8
+"""
+__all__ = ['EngineCylinderReactor', 'SingleZoneEvaluator', 'TwoZoneEvaluator']
+
+from typing import Callable
+
+from cantera import ExtensibleIdealGasReactor, IdealGasReactor, ReactorNet
+from numpy import pi, asarray, dot, ndarray
+
+from ..geometry import *
+from ..heat_transfer import *
+from ..tools.reactor_state import ReactorState
+
+
+class EngineCylinderReactor(ExtensibleIdealGasReactor):
+    """
+    发动机气缸反应器
+
+        在 IdealGasReactor 的右端项 (状态量依次为质量、体积、温度、各组分质量分数) 计算之后调用 evaluator,
+        由其把活塞运动、壁面传热、区间质量交换等项直接加到右端项上。
+        与 Wall、MassFlowController 各自注册 Python 回调相比, 每次右端项计算每个反应器只回调一次,
+        且各项共用同一组中间量 (缸内几何、传热系数等)。
+    """
+    evaluator = None  # 右端项钩子, 调用形式为 evaluator(reactor, time, rhs), rhs 为右端项的 memoryview
+
+    def after_eval(self, t, LHS, RHS):
+        self.evaluator(self, t, RHS)
+
+
+def _wall_heat(wall_temperatures: tuple[float, float, float], alpha: float, temperature: float,
+               cover_area: float, wall_area: float, crown_area: float) -> float:
+    """
+    气体传给缸盖、缸壁、活塞冠的总传热率
+    :param wall_temperatures: 缸盖、缸壁、活塞冠温度 [K]
+    :param alpha: 传热系数 [W/(m**2*K)]
+    :param temperature: 气体温度 [K]
+    :param cover_area: 缸盖面积 [m**2]
+    :param wall_area: 缸壁面积 [m**2]
+    :param crown_area: 活塞冠面积 [m**2]
+    :return: 传热率 [W]
+    """
+    cover_temperature, wall_temperature, crown_temperature = wall_temperatures
+    return ((temperature - cover_temperature) * cover_area +
+            (temperature - wall_temperature) * wall_area +
+            (temperature - crown_temperature) * crown_area) * alpha
+
+
+def _strategy_wall_temperatures(heat_transfer: HeatTransferBase | None) -> tuple[float, float, float] | None:
+    """
+    传热策略给出的 (初始) 壁面温度
+    :param heat_transfer: 传热模型
+    :return: 缸盖、缸壁、活塞冠温度 [K], 不计传热时为 None
+    """
+    if heat_transfer is None:
+        return None
+    return heat_transfer.cover_temperature, heat_transfer.wall_temperature, heat_transfer.crown_temperature
+
+
+class SingleZoneEvaluator:
+    """
+    零维模型的右端项钩子: 活塞做功与壁面传热, 与 ZeroDimensional.build 中活塞 Wall 的 velocity、heat_flux 等价,
+    可选地加入点火热流
+
+        壁面温度保存在钩子的 wall_temperatures 中 (初始为传热策略的壁面温度), 可由 WallTemperatureModel 更新,
+        传热策略本身无状态, 可被多个气缸共用
+    """
+
+    def __init__(self, geometry: EngineGeometry, heat_transfer: HeatTransferBase | None = None,
+                 ignition: Callable[[float], float] | None = None):
+        """
+        零维模型的右端项钩子
+        :param geometry: 发动机几何
+        :param heat_transfer: 传热模型, 为 None 时不计传热
+        :param ignition: 点火热流函数 (传给气缸的热流 [W]), 输入为仿真时间 [s], 为 None 时不点火
+        """
+        self.geometry = geometry  # 发动机几何
+        self.heat_transfer = heat_transfer  # 传热模型
+        self.ignition = ignition  # 点火热流函数
+        self.wall_temperatures = _strategy_wall_temperatures(heat_transfer)  # 缸盖、缸壁、活塞冠温度 [K]
+        self._alpha: Callable[[float], float] | None = None  # 传热系数计算函数
+        self.state: ReactorState | None = None  # 气缸状态快照, 每次右端项计算刷新一次, 与传热策略共用
+        self.calls = 0  # 钩子调用次数
+
+    def bind(self, cylinder: EngineCylinderReactor) -> None:
+        """
+        绑定气缸反应器
+        :param cylinder: 气缸反应器
+        """
+        cylinder.evaluator = self
+        self.state = ReactorState(cylinder)
+        if self.heat_transfer is not None:
+            self._alpha = self.heat_transfer.heat_transfer_coefficient(self.state, self.geometry)
+
+    def __call__(self, reactor: IdealGasReactor, time: float, rhs) -> None:
+        self.calls += 1
+        state = self.state
+        state.refresh()
+        geometry = self.geometry
+        area_bore = geometry.area_bore
+        v_dot = area_bore * geometry.piston_velocity(time)  # 体积变化率 [m**3/s]
+        q_dot = 0.
+        if self._alpha is not None:
+            q_dot = _wall_heat(self.wall_temperatures, self._alpha(time), state.T,
+                               area_bore, geometry.piston_position(time) * geometry.bore * pi, area_bore * 1.3)
+        if self.ignition is not None:
+            q_dot -= self.ignition(time)
+        rhs[1] += v_dot
+        if reactor.energy_enabled:
+            rhs[2] += -state.P * v_dot - q_dot
+
+
+class TwoZoneEvaluator:
+    """
+    双区模型的右端项钩子: 活塞做功、两区传热、点火能量与未燃区到已燃区的卷吸,
+    与 TwoZoneModel.build_combustion 中的 Wall、MassFlowController 等价 (两区间的压力平衡 Wall 保留)
+
+        共用量以 (仿真时间, 已使用过的区) 为键: 时间变化或同一区再次被调用时说明开始了新的右端项计算,
+        此时刷新两区的状态快照并重新计算全部共用量, 否则另一区直接使用; 不依赖两区的调用顺序,
+        漏掉一次调用也不会使之后的计算错位。卷吸、火焰速度与传热策略都从快照读取状态,
+        每个量每次右端项计算只从反应器读取一次。壁面温度保存在 wall_temperatures 中, 与 SingleZoneEvaluator 相同
+    """
+
+    def __init__(self,
+                 geometry: SITwoZoneGeometry,
+                 entrain_rate: Callable[[float], float],
+                 heat_transfer: HeatTransferBase | None = None,
+                 ignition: Callable[[float], float] | None = None):
+        """
+        双区模型的右端项钩子
+        :param geometry: 发动机几何
+        :param entrain_rate: 卷吸速率计算函数, 输入为仿真时间 [s], 输出为质量燃烧速率 [kg/s]
+        :param heat_transfer: 传热模型, 为 None 时不计传热
+        :param ignition: 点火热流函数 (火花塞传给已燃区的热流 [W]), 为 None 时不点火
+        """
+        self.geometry = geometry  # 发动机几何
+        self.entrain_rate = entrain_rate  # 卷吸速率计算函数
+        self.heat_transfer = heat_transfer  # 传热模型
+        self.ignition = ignition  # 点火热流函数
+        self.wall_temperatures = _strategy_wall_temperatures(heat_transfer)  # 缸盖、缸壁、活塞冠温度 [K]
+        self.burned: EngineCylinderReactor | None = None  # 已燃区
+        self.unburned: EngineCylinderReactor | None = None  # 未燃区
+        self.burned_state: ReactorState | None = None  # 已燃区状态快照
+        self.unburned_state: ReactorState | None = None  # 未燃区状态快照
+        self._burned_alpha: Callable[[float], float] | None = None  # 已燃区传热系数计算函数
+        self._unburned_alpha: Callable[[float], float] | None = None  # 未燃区传热系数计算函数
+        self._time: float | None = None  # 共用量对应的仿真时间 [s]
+        self._served: set[int] = set()  # 已使用当前共用量的区 (反应器 id)
+        self._molecular_weights: ndarray | None = None  # 各组分摩尔质量 [kg/kmol]
+        # 共用量
+        self._v_dot = 0.  # 未燃区因活塞运动的体积变化率 [m**3/s]
+        self._q_burned = 0.  # 已燃区净得热 (点火减传热) [W]
+        self._q_unburned = 0.  # 未燃区传热 [W]
+        self._m_dot = 0.  # 卷吸质量流率 [kg/s]
+        self._h_unburned = 0.  # 未燃区比焓 [J/kg]
+        self._y_unburned = None  # 未燃区质量分数
+        self.products: ndarray | None = None  # 卷吸质量进入已燃区时的组成 (平衡燃烧模式), 为 None 时为未燃区组成
+        self.calls = 0  # 钩子调用次数
+        self.evaluations = 0  # 共用量计算次数
+
+    def bind(self, burned: EngineCylinderReactor, unburned: EngineCylinderReactor,
+             burned_state: ReactorState | None = None, unburned_state: ReactorState | None = None) -> None:
+        """
+        绑定两区反应器
+        :param burned: 已燃区
+        :param unburned: 未燃区
+        :param burned_state: 已燃区状态快照 (卷吸策略已使用的快照), 为 None 时新建
+        :param unburned_state: 未燃区状态快照 (卷吸策略已使用的快照), 为 None 时新建
+        """
+        self.burned = burned
+        self.unburned = unburned
+        burned.evaluator = self
+        unburned.evaluator = self
+        self.burned_state = ReactorState(burned) if burned_state is None else burned_state
+        self.unburned_state = ReactorState(unburned) if unburned_state is None else unburned_state
+        self.unburned_state.track_all_species()
+        self._molecular_weights = burned.thermo.molecular_weights
+        self._time = None
+        self._served.clear()
+        if self.heat_transfer is not None:
+            self._burned_alpha = self.heat_transfer.heat_transfer_coefficient(self.burned_state, self.geometry)
+            self._unburned_alpha = self.heat_transfer.heat_transfer_coefficient(self.unburned_state, self.geometry)
+
+    def _evaluate(self, time: float) -> None:
+        """
+        计算共用量
+        :param time: 仿真时间 [s]
+        """
+        self.evaluations += 1
+        geometry = self.geometry
+        burned = self.burned_state
+        unburned = self.unburned_state
+        burned.refresh()
+        unburned.refresh()
+        self._v_dot = geometry.area_bore * geometry.piston_velocity(time)
+        self._m_dot = max(self.entrain_rate(time), 0.)
+        q_burned = 0. if self.ignition is None else self.ignition(time)
+        q_unburned = 0.
+        if self.heat_transfer is not None:
+            flame = geometry.flame_geometry_by_volume(time, burned.volume)  # 双区几何快照
+            q_burned -= _wall_heat(self.wall_temperatures, self._burned_alpha(time), burned.T,
+                                   flame.burned_cover_area, flame.burned_wall_area, flame.burned_piston_area)
+            q_unburned = _wall_heat(self.wall_temperatures, self._unburned_alpha(time), unburned.T,
+                                    flame.unburned_cover_area, flame.unburned_wall_area, flame.unburned_piston_area)
+        self._q_burned = q_burned
+        self._q_unburned = q_unburned
+        self._h_unburned = unburned.enthalpy_mass
+        self._y_unburned = unburned.Y
+
+    def __call__(self, reactor: IdealGasReactor, time: float, rhs) -> None:
+        self.calls += 1
+        zone = id(reactor)
+        served = self._served
+        if time != self._time or zone in served:
+            self._evaluate(time)
+            self._time = time
+            served.clear()
+        served.add(zone)
+        m_dot = self._m_dot
+        energy = reactor.energy_enabled
+        if reactor is self.burned:
+            # 卷吸进入已燃区: 质量、组分与焓的输入
+            thermo = reactor.thermo  # 同时把共用的热力学对象恢复到本区状态
+            y = thermo.Y
+            y_in = self._y_unburned if self.products is None else self.products  # 进入已燃区的组成
+            rhs[0] += m_dot
+            asarray(rhs)[3:] += m_dot * (y_in - y)
+            if energy:
+                u_k = thermo.partial_molar_int_energies / self._molecular_weights
+                rhs[2] += self._h_unburned * m_dot - m_dot * dot(u_k, y_in) + self._q_burned
+        else:
+            # 卷吸流出未燃区与活塞做功
+            state = self.unburned_state
+            rhs[0] -= m_dot
+            rhs[1] += self._v_dot
+            if energy:
+                rhs[2] += (-m_dot * state.P * state.volume / state.mass -
+                           state.P * self._v_dot - self._q_unburned)
+
+    def equilibrate(self, reactor_net: ReactorNet | None = None) -> None:
+        """
+        平衡燃烧模式: 以未燃区当前状态的定焓定压平衡产物作为之后卷吸进入已燃区的组成,
+        并把已燃区设为定内能定容平衡 (计入膨胀过程中离解平衡的移动); 每次推进反应器网络后调用
+        :param reactor_net: 反应器网络, 不为 None 时重新初始化积分器
+        """
+        thermo = self.unburned.thermo
+        thermo.equilibrate('HP')
+        self.products = thermo.Y
+        thermo = self.burned.thermo
+        thermo.equilibrate('UV')
+        self.burned.syncState()
+        self._time = None  # 状态已改变, 下次调用时重新计算共用量
+        if reactor_net is not None:
+            reactor_net.reinitialize()
@@ -3,59 +3,165 @@
 @Author: MoonCake Without Moon
 @Time: 2025/6/20
 """
-__all__ = ['EntrainRateBase', 'Wiebe', 'FractalTurbulent']
+__all__ = ['EntrainRateBase', 'Wiebe', 'FractalTurbulent', 'FractalTurbulentEvaluator', 'BurningRateCacheInfo']
 
+import math
 from abc import ABC, abstractmethod
-from typing import Callable
+from collections import OrderedDict
+from typing import Callable, NamedTuple
 
 from cantera import IdealGasReactor
-from numpy import exp, sqrt
+from numpy import exp, sqrt, pi, ndarray, asarray, zeros, clip, round as np_round
 
 from ..geometry import *
 from ..flame_speed import *
+from ..tools.reactor_state import ReactorState, as_reactor_state
 
 
 class EntrainRateBase(ABC):
     """卷吸速率基类"""
 
     @abstractmethod
-    def mass_flow_rate(self, burned: IdealGasReactor,
-                       unburned: IdealGasReactor) -> Callable[[float], float]:
+    def mass_flow_rate(self, burned: IdealGasReactor | ReactorState,
+                       unburned: IdealGasReactor | ReactorState) -> Callable[[float], float]:
         """
         从未燃区到已燃区的质量流率 [kg/s]
-        :param burned: 已燃区
-        :param unburned: 未燃区
+        :param burned: 已燃区或其状态快照
+        :param unburned: 未燃区或其状态快照
         :return: 燃烧速率计算函数, 输入为仿真时间 [s], 输出为质量燃烧速率 [kg/s]
         """
         pass
 
+    def report_ranges(self, reset: bool = True) -> list[ParameterRangeInfo]:
+        """
+        输出所用经验关联式的适用范围汇总日志 (仅在存在越界时)
+        :param reset: 输出后是否清零
+        :return: 各参数的诊断信息, 不使用关联式时为空列表
+        """
+        return []
+
 
 class Wiebe(EntrainRateBase):
-    """Wiebe燃烧模型"""
+    """
+    Wiebe燃烧模型
+
+        已燃质量分数 x_b = 1 - exp(-a * ((θ - θ_s) / Δθ) ** (m + 1)), 卷吸速率为 m_total * dx_b/dθ * ω;
+        双 Wiebe 为两条曲线按质量份额加权之和 (例如预混段与扩散段, 或快燃段与后燃段)。
+        燃烧规律由曲轴转角给定, 不依赖火焰速度与缸内湍流, 用于快速标定与方案筛选
+    """
+
+    def __init__(self,
+                 geometry: EngineGeometry,
+                 start_angle: float,
+                 duration: float,
+                 shape: float = 2.,
+                 efficiency: float = 6.908,
+                 second_start_angle: float | None = None,
+                 second_duration: float | None = None,
+                 second_shape: float = 2.,
+                 second_fraction: float = 0.):
+        """
+        Wiebe燃烧模型, 设置 second_start_angle、second_duration 与 second_fraction 时为双 Wiebe
+        :param geometry: 发动机几何
+        :param start_angle: 燃烧始点 (曲轴转角) [rad]
+        :param duration: 燃烧持续角 [rad]
+        :param shape: 品质指数 m
+        :param efficiency: 燃烧效率系数 a, 6.908 对应持续角结束时已燃 99.9%
+        :param second_start_angle: 第二条曲线的燃烧始点 [rad], 为 None 时为单 Wiebe
+        :param second_duration: 第二条曲线的燃烧持续角 [rad]
+        :param second_shape: 第二条曲线的品质指数
+        :param second_fraction: 第二条曲线的质量份额, 0 到 1
+        """
+        if duration <= 0:
+            raise ValueError('duration must be positive')
+        if not 0 <= second_fraction <= 1:
+            raise ValueError('second_fraction must be between 0 and 1')
+        self._geometry = geometry  # 发动机几何
+        self._efficiency = efficiency  # 燃烧效率系数
+        # 各条 Wiebe 曲线: (质量份额, 燃烧始点 [rad], 持续角 [rad], 品质指数)
+        self.curves: list[tuple[float, float, float, float]] = [(1 - second_fraction, start_angle, duration, shape)]
+        if second_fraction > 0:
+            if second_start_angle is None or second_duration is None or second_duration <= 0:
+                raise ValueError('double Wiebe requires second_start_angle and a positive second_duration')
+            self.curves.append((second_fraction, second_start_angle, second_duration, second_shape))
 
     def _wiebe_function(self, start: float, end: float, m: float) -> Callable[[float], float]:
         """
         Wiebe函数
-        :param start: 起始点
-        :param end: 终止点
+        :param start: 起始点 [rad]
+        :param end: 终止点 [rad]
         :param m: 品质指数
-        :return: Wiebe函数
+        :return: 已燃质量分数对曲轴转角的导数 dx_b/dθ [1/rad], 输入为曲轴转角 [rad]
         """
-        raise NotImplementedError
+        a = self._efficiency
+        duration = end - start
+        coefficient = a * (m + 1) / duration
+
+        def rate(angle: float) -> float:
+            y = math.remainder(angle - start, 4 * math.pi) / duration  # 无量纲燃烧进程
+            if y <= 0 or y >= 1:
+                return 0.
+            y_m = y ** m
+            return coefficient * y_m * math.exp(-a * y_m * y)
+
+        return rate
 
-    def mass_flow_rate(self, burned: IdealGasReactor,
-                       unburned: IdealGasReactor) -> Callable[[float], float]:
+    def burned_fraction(self, angle: float | ndarray) -> float | ndarray:
+        """
+        已燃质量分数, 用于标定时与放热分析结果比较
+        :param angle: 曲轴转角 [rad], 标量或数组
+        :return: 已燃质量分数
+        """
+        angle = asarray(angle, dtype=float)
+        fraction = zeros(angle.shape)
+        for weight, start, duration, m in self.curves:
+            delta = angle - start
+            delta = delta - 4 * pi * np_round(delta / (4 * pi))  # 与 math.remainder 相同, 取值在 [-2π, 2π]
+            y = clip(delta / duration, 0, 1)
+            fraction = fraction + weight * (1 - exp(-self._efficiency * y ** (m + 1)))
+        return fraction if fraction.ndim else float(fraction)
+
+    def mass_flow_rate(self, burned: IdealGasReactor | ReactorState,
+                       unburned: IdealGasReactor | ReactorState) -> Callable[[float], float]:
         """
         从未燃区到已燃区的质量流率 [kg/s]
-        :param burned: 已燃区
-        :param unburned: 未燃区
+        :param burned: 已燃区或其状态快照
+        :param unburned: 未燃区或其状态快照
         :return: 燃烧速率计算函数, 输入为仿真时间 [s], 输出为质量燃烧速率 [kg/s]
         """
-        raise NotImplementedError
+        burned, _ = as_reactor_state(burned)
+        unburned, unburned_owned = as_reactor_state(unburned)
+        total_mass = burned.mass + unburned.mass  # 缸内总质量 [kg], 燃烧期间不变
+        omega = 2 * math.pi * self._geometry.speed  # 曲轴角速度 [rad/s]
+        rates = [(weight * total_mass * omega, self._wiebe_function(start, start + duration, m))
+                 for weight, start, duration, m in self.curves]
+
+        def burning_rate(time: float) -> float:
+            mass_u = unburned.reactor.mass if unburned_owned else unburned.mass  # 未燃区质量
+            if mass_u <= 1e-6 * total_mass:
+                return 0.
+            angle = omega * time
+            return sum(scale * rate(angle) for scale, rate in rates)
+
+        return burning_rate
+
+
+class BurningRateCacheInfo(NamedTuple):
+    """燃烧速率缓存统计信息"""
+    hits: int  # 命中次数
+    misses: int  # 未命中次数 (实际计算次数)
+    maxsize: int  # 最大条目数
+    currsize: int  # 当前条目数
 
 
 class FractalTurbulent(EntrainRateBase):
-    """分形湍流模型"""
+    """
+    分形湍流模型
+
+        策略只保存配置, mass_flow_rate() 每次返回一个新的 FractalTurbulentEvaluator,
+        燃烧过程中变化的量 (近壁燃烧切换、缓存) 都保存在该对象中,
+        同一策略实例可同时用于多个气缸或多个线程中的仿真
+    """
 
     def __init__(self,
                  geometry: SITwoZoneGeometry,
@@ -63,7 +169,8 @@ class FractalTurbulent(EntrainRateBase):
                  volume_fraction_to_stop: float = 0.001,
                  init_u_rms: float = 4,
                  reference_flame_radius: float = 0.006,
-                 reference_engine_speed: float = 1000 / 60):
+                 reference_engine_speed: float = 1000 / 60,
+                 cache_size: int = 4):
         """
         分形湍流燃烧模型
         :param geometry: 发动机几何
@@ -72,78 +179,156 @@ class FractalTurbulent(EntrainRateBase):
         :param init_u_rms: 初始均方根湍流速度
         :param reference_flame_radius: 参考火焰半径 [m]
         :param reference_engine_speed: 参考转速 [r/s]
+        :param cache_size: 燃烧速率缓存的最大条目数, 为 0 时不缓存
         """
-        self._geometry = geometry  # 发动机几何
-        self._flame_speed = flame_speed  # 火焰速度计算类
-        self._end_volume_fraction = volume_fraction_to_stop  # 结束时的未燃区体积百分比
-        self._u_rms_0 = init_u_rms  # 初始均方根湍流速度
-        self._reference_flame_radius = reference_flame_radius  # 参考火焰半径 [m]
-        self._reference_engine_speed = reference_engine_speed  # 参考转速 [r/s]
+        if cache_size < 0:
+            raise ValueError('cache_size cannot be negative')
+        self.geometry = geometry  # 发动机几何
+        self.flame_speed = flame_speed  # 火焰速度计算类
+        self.end_volume_fraction = volume_fraction_to_stop  # 结束时的未燃区体积百分比
+        self.u_rms_0 = init_u_rms  # 初始均方根湍流速度
+        self.reference_flame_radius = reference_flame_radius  # 参考火焰半径 [m]
+        self.reference_engine_speed = reference_engine_speed  # 参考转速 [r/s]
+        self.cache_size = cache_size  # 燃烧速率缓存的最大条目数
+
+    def mass_flow_rate(self, burned: IdealGasReactor | ReactorState,
+                       unburned: IdealGasReactor | ReactorState) -> 'FractalTurbulentEvaluator':
+        """
+        从未燃区到已燃区的质量流率 [kg/s]
+        :param burned: 已燃区或其状态快照
+        :param unburned: 未燃区或其状态快照
+        :return: 燃烧速率计算函数 (FractalTurbulentEvaluator), 输入为仿真时间 [s], 输出为质量燃烧速率 [kg/s]
+        """
+        return FractalTurbulentEvaluator(self, burned, unburned)
+
+    def report_ranges(self, reset: bool = True) -> list[ParameterRangeInfo]:
+        return self.flame_speed.report_ranges(reset)
+
+
+class FractalTurbulentEvaluator:
+    """
+    一对两区反应器的分形湍流燃烧速率计算对象
+
+        保存近壁燃烧切换的中间量与燃烧速率缓存。缓存以 (时间, 未燃区温度、质量、体积与组成, 已燃区体积,
+        是否已切换近壁燃烧) 为键保存最近的结果: CVODES 以差分构造雅可比矩阵时, 扰动已燃区温度与组分的各次
+        右端项计算中这些输入不变, 直接复用上次结果, 不再重复计算火焰速度、粘度、火焰几何与分形维数;
+        命中时的结果与重新计算完全一致
+    """
+
+    def __init__(self, model: FractalTurbulent, burned: IdealGasReactor | ReactorState,
+                 unburned: IdealGasReactor | ReactorState):
+        """
+        分形湍流燃烧速率计算对象
+        :param model: 分形湍流模型 (配置)
+        :param burned: 已燃区或其状态快照
+        :param unburned: 未燃区或其状态快照
+        """
+        self.model = model  # 分形湍流模型
+        self.burned, self._burned_owned = as_reactor_state(burned)  # 已燃区状态快照
+        self.unburned, self._unburned_owned = as_reactor_state(unburned)  # 未燃区状态快照
+        self._rho_u0 = self.unburned.density  # 初始密度
+        # 火焰速度计算函数, 与本对象共用未燃区快照
+        self._flame_speed = FlameSpeedContext(model.flame_speed).laminar_flame_speed(self.unburned)
 
         # 分形湍流燃烧模型计算中间参数
-        self._tau: float = 0  # 特征时间尺度 [s]
-        self._m_u_tr: float = 0  # 壁面燃烧切换时刻的未燃区质量 [kg]
-        self._is_tr: float = False  # 是否开始分形与壁面燃烧切换
+        self.tau: float = 0  # 特征时间尺度 [s]
+        self.m_u_tr: float = 0  # 壁面燃烧切换时刻的未燃区质量 [kg]
+        self.is_tr: bool = False  # 是否开始分形与壁面燃烧切换
+
+        # 燃烧速率缓存
+        self._cache_size = model.cache_size  # 最大条目数
+        self._cache: OrderedDict = OrderedDict()  # 缓存数据
+        self._hits = 0  # 命中次数
+        self._misses = 0  # 未命中次数
+        if self._cache_size:
+            self.unburned.track_all_species()  # 组成作为缓存键的一部分
 
-    def mass_flow_rate(self, burned: IdealGasReactor,
-                       unburned: IdealGasReactor) -> Callable[[float], float]:
+    def cache_info(self) -> BurningRateCacheInfo:
         """
-        从未燃区到已燃区的质量流率 [kg/s]
-        :param burned: 已燃区
-        :param unburned: 未燃区
-        :return: 燃烧速率计算函数, 输入为仿真时间 [s], 输出为质量燃烧速率 [kg/s]
+        燃烧速率缓存统计信息
+        :return: 命中次数、未命中次数、最大条目数、当前条目数
         """
-        rho_u0 = unburned.thermo.density_mass  # 初始密度
-        bore = self._geometry.bore  # 缸径
-        flame_speed_context = FlameSpeedContext(self._flame_speed)  # 火焰速度策略上下文
-        flame_speed = flame_speed_context.laminar_flame_speed(unburned)  # 火焰速度计算函数
-        self._tau = 0  # 特征时间尺度 [s]
-        self._m_u_tr = 0  # 壁面燃烧切换时刻的未燃区质量 [kg]
-        self._is_tr = False  # 是否开始分形与壁面燃烧切换
+        return BurningRateCacheInfo(self._hits, self._misses, self._cache_size, len(self._cache))
 
-        def burning_rate(time: float) -> float:
-            h_gap = self._geometry.piston_position(time)  # 活塞顶端到气缸盖距离
-            volume = self._geometry.cylinder_volume(time)  # 气缸体积
-            # 当未燃区小于设置的停止体积时，认为已燃烧完全
-            if unburned.volume < volume * self._end_volume_fraction:
+    def __call__(self, time: float) -> float:
+        """
+        从未燃区到已燃区的质量流率
+        :param time: 仿真时间 [s]
+        :return: 质量燃烧速率 [kg/s]
+        """
+        unburned = self.unburned
+        # 快照由本对象自建时, 每次调用刷新一次 (已燃区只用到体积, 直接读取)
+        if self._unburned_owned:
+            unburned.refresh()
+        burned_volume = self.burned.reactor.volume if self._burned_owned else self.burned.volume  # 已燃区体积
+        cache_size = self._cache_size
+        if not cache_size:
+            return self._burning_rate(time, burned_volume)
+        cache = self._cache
+        key = (time, unburned.T, unburned.mass, unburned.volume, unburned.Y.tobytes(), burned_volume, self.is_tr)
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+            self._hits += 1
+            return value
+        self._misses += 1
+        value = self._burning_rate(time, burned_volume)
+        cache[key] = value
+        if len(cache) > cache_size:
+            cache.popitem(last=False)
+        return value
+
+    def _burning_rate(self, time: float, burned_volume: float) -> float:
+        """
+        计算燃烧速率
+        :param time: 仿真时间 [s]
+        :param burned_volume: 已燃区体积 [m**3]
+        :return: 质量燃烧速率 [kg/s]
+        """
+        model = self.model
+        geometry = model.geometry
+        unburned = self.unburned
+        bore = geometry.bore  # 缸径
+        volume = geometry.cylinder_volume(time)  # 气缸体积
+        # 当未燃区小于设置的停止体积时，认为已燃烧完全
+        if unburned.volume < volume * model.end_volume_fraction:
+            return 0
+        else:
+            flame = geometry.flame_geometry_by_volume(time, burned_volume)  # 双区几何快照
+            h_gap = flame.h_gap  # 活塞顶端到气缸盖距离
+            a_f = flame.flame_area  # 火焰面积
+            r_f = flame.flame_radius  # 火焰半径
+            s_l = self._flame_speed(time)  # 未拉伸火焰速度
+            rho_u = unburned.density  # 未燃区密度
+            u_rms_0 = model.u_rms_0  # 初始均方根湍流速度
+            u_rms = u_rms_0 * (self._rho_u0 / rho_u) ** (1 / 3)  # 均方根湍流速度
+            l_i = min(r_f, 0.5 * bore, h_gap)  # 积分尺度
+            epsilon = u_rms ** 3 / l_i  # 湍流耗散率
+            nu = unburned.viscosity / rho_u  # 未燃区运动粘度
+            k_s = sqrt(epsilon / nu) / 3.55 ** (2 / 3)  # 火焰拉伸系数
+            k_e = 0  # 火焰拉伸系数
+            if s_l == 0:
                 return 0
             else:
-                burned_volume_percentage = burned.volume / volume  # 已燃区体积百分比
-                a_f = self._geometry.flame_area(time, burned_volume_percentage)  # 火焰面积
-                r_f = self._geometry.flame_radius(time, burned_volume_percentage)  # 火焰半径
-                s_l = flame_speed(time)  # 未拉伸火焰速度
-                rho_u = unburned.thermo.density_mass  # 未燃区密度
-                u_rms_0 = self._u_rms_0  # 初始均方根湍流速度
-                u_rms = u_rms_0 * (rho_u0 / rho_u) ** (1 / 3)  # 均方根湍流速度
-                l_i = min(r_f, 0.5 * bore, h_gap)  # 积分尺度
-                epsilon = u_rms ** 3 / l_i  # 湍流耗散率
-                nu = unburned.thermo.viscosity / rho_u  # 未燃区运动粘度
-                k_s = sqrt(epsilon / nu) / 3.55 ** (2 / 3)  # 火焰拉伸系数
-                k_e = 0  # 火焰拉伸系数
-                if s_l == 0:
-                    return 0
-                else:
-                    u_l = s_l * (1 - nu / s_l ** 2 * (k_e + k_s))  # 拉伸的火焰速度
-                ll = l_i / (nu ** 3 / epsilon) ** 0.25  # 火焰褶皱尺度比
-                omiga_wr = (r_f / self._reference_flame_radius * self._geometry.speed /
-                            self._reference_engine_speed)  # 无量纲火焰褶皱率
-                w1 = 1 - exp(-omiga_wr)  # 点火修正权重系数
-                d3_min = 2.05  # 最小分形维数
-                d3_max = d3_min * (1 - w1) + 2.35 * w1  # 最大分形维数
-                d3 = (d3_max * u_rms + d3_min * s_l) / (u_rms + s_l)  # 分形维数
-                m_b_dot = rho_u * a_f * u_l * ll ** (d3 - 2)  # 燃烧速率(未经近壁燃烧加权)
-                # 判断是否达到壁面燃烧条件
-                if (r_f + l_i / 2 >= bore / 2) and (self._is_tr is False):
-                    self._m_u_tr = unburned.mass  # 参考质量
-                    self._tau = self._m_u_tr / m_b_dot  # 时间常数
-                    self._is_tr = True
-                # 计算壁面燃烧修正
-                if self._is_tr:
-                    mass_u = unburned.mass  # 未燃区质量
-                    w2 = 1 - mass_u / self._m_u_tr  # 近壁修正权重系数
-                    return (1 - w2) * m_b_dot + w2 * (mass_u / self._tau)
-                # 未达到近壁燃烧条件则返回原始燃烧速率
-                else:
-                    return m_b_dot
-
-        return burning_rate
+                u_l = s_l * (1 - nu / s_l ** 2 * (k_e + k_s))  # 拉伸的火焰速度
+            ll = l_i / (nu ** 3 / epsilon) ** 0.25  # 火焰褶皱尺度比
+            omiga_wr = (r_f / model.reference_flame_radius * geometry.speed /
+                        model.reference_engine_speed)  # 无量纲火焰褶皱率
+            w1 = 1 - exp(-omiga_wr)  # 点火修正权重系数
+            d3_min = 2.05  # 最小分形维数
+            d3_max = d3_min * (1 - w1) + 2.35 * w1  # 最大分形维数
+            d3 = (d3_max * u_rms + d3_min * s_l) / (u_rms + s_l)  # 分形维数
+            m_b_dot = rho_u * a_f * u_l * ll ** (d3 - 2)  # 燃烧速率(未经近壁燃烧加权)
+            # 判断是否达到壁面燃烧条件
+            if (r_f + l_i / 2 >= bore / 2) and (self.is_tr is False):
+                self.m_u_tr = unburned.mass  # 参考质量
+                self.tau = self.m_u_tr / m_b_dot  # 时间常数
+                self.is_tr = True
+            # 计算壁面燃烧修正
+            if self.is_tr:
+                mass_u = unburned.mass  # 未燃区质量
+                w2 = 1 - mass_u / self.m_u_tr  # 近壁修正权重系数
+                return (1 - w2) * m_b_dot + w2 * (mass_u / self.tau)
+            # 未达到近壁燃烧条件则返回原始燃烧速率
+            else:
+                return m_b_dot
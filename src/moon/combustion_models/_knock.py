@@ -0,0 +1,282 @@
+# -*- coding:utf-8 -*-
+"""
+提供基于着火延迟数据表的爆震预测: Livengood-Wu 积分 ∫dt/τ 达到 1 时末端气体自燃,
+数据表由 moon.tools.ignition_delay_table 用 Cantera 定容反应器生成
+@Author: MoonCake Without Moon
+@Time: 2025/7/19
+"""
+__all__ = ['IgnitionDelayTable', 'TabulatedIgnitionDelay', 'IgnitionDelayIntegrator', 'LivengoodWu', 'KnockIntegrator']
+
+import pathlib
+from dataclasses import dataclass
+from math import log, exp
+from typing import Callable
+
+from cantera import IdealGasReactor, ReactorNet
+from loguru import logger
+from numpy import ndarray, load, savez_compressed, log as np_log, rad2deg
+
+from ..geometry import *
+from ..tools.reactor_state import ReactorState
+from ..tools.tabulation import locate
+
+IGNITION_DELAY_TABLE_VERSION = 1  # 数据表文件格式版本
+
+
+@dataclass
+class IgnitionDelayTable:
+    """
+    着火延迟数据表
+
+        delay 的形状为 (当量比, 温度, 压力, 残余气体质量分数) 四个坐标轴的点数, 计算时间内未着火的点为 inf;
+        残余气体的定义与 FlameSpeedTable 相同, 运行时以 marker 组分的质量分数换算残余气体质量分数
+    """
+    phi: ndarray  # 当量比坐标轴
+    temperature: ndarray  # 温度坐标轴 [K]
+    pressure: ndarray  # 压力坐标轴 [Pa]
+    dilution: ndarray  # 残余气体质量分数坐标轴
+    delay: ndarray  # 着火延迟 [s]
+    marker: str  # 残余气体标记组分
+    marker_fraction: ndarray  # 各当量比下残余气体中标记组分的质量分数
+    mechanism: str = ''  # 反应机理
+    fuel: str = ''  # 燃料组成
+    oxidizer: str = ''  # 氧化剂组成
+
+    def __post_init__(self):
+        shape = (len(self.phi), len(self.temperature), len(self.pressure), len(self.dilution))
+        if self.delay.shape != shape:
+            raise ValueError(f'delay must have shape {shape}, got {self.delay.shape}')
+        if len(self.marker_fraction) != len(self.phi):
+            raise ValueError('marker_fraction must have the same length as phi')
+
+    def save(self, path: str | pathlib.Path) -> None:
+        """
+        保存为压缩的 .npz 文件
+        :param path: 文件路径
+        """
+        savez_compressed(path, version=IGNITION_DELAY_TABLE_VERSION, phi=self.phi, temperature=self.temperature,
+                         pressure=self.pressure, dilution=self.dilution, delay=self.delay, marker=self.marker,
+                         marker_fraction=self.marker_fraction, mechanism=self.mechanism, fuel=self.fuel,
+                         oxidizer=self.oxidizer)
+
+    @classmethod
+    def load(cls, path: str | pathlib.Path) -> 'IgnitionDelayTable':
+        """
+        读取 .npz 文件
+        :param path: 文件路径
+        :return: 着火延迟数据表
+        """
+        with load(path, allow_pickle=False) as data:
+            if int(data['version']) != IGNITION_DELAY_TABLE_VERSION:
+                raise ValueError(f'unsupported ignition delay table version {int(data["version"])}')
+            return cls(phi=data['phi'], temperature=data['temperature'], pressure=data['pressure'],
+                       dilution=data['dilution'], delay=data['delay'], marker=str(data['marker']),
+                       marker_fraction=data['marker_fraction'], mechanism=str(data['mechanism']),
+                       fuel=str(data['fuel']), oxidizer=str(data['oxidizer']))
+
+
+class TabulatedIgnitionDelay:
+    """
+    基于数据表的着火延迟
+
+        在 (当量比, 温度, ln(压力), 残余气体质量分数) 上对 ln(τ) 做四线性插值, 超出数据表范围时取边界值;
+        插值用到未着火 (inf) 的节点时结果为 inf
+    """
+
+    def __init__(self, table: IgnitionDelayTable | str | pathlib.Path):
+        """
+        基于数据表的着火延迟
+        :param table: 数据表或其文件路径
+        """
+        self.table = table if isinstance(table, IgnitionDelayTable) else IgnitionDelayTable.load(table)  # 数据表
+        table = self.table
+        # 标量插值用的纯 Python 坐标轴与数据
+        self._phi = table.phi.tolist()
+        self._temperature = table.temperature.tolist()
+        self._log_pressure = np_log(table.pressure).tolist()
+        self._dilution = table.dilution.tolist()
+        self._marker_fraction = table.marker_fraction.tolist()
+        self._log_delay = np_log(table.delay).tolist()
+
+    def residual_marker(self, phi: float) -> float:
+        """
+        残余气体中标记组分的质量分数
+        :param phi: 当量比
+        :return: 质量分数
+        """
+        j, t = locate(self._phi, phi)
+        fractions = self._marker_fraction
+        if len(fractions) == 1:
+            return fractions[0]
+        return (1 - t) * fractions[j] + t * fractions[j + 1]
+
+    def delay(self, phi: float, temperature: float, pressure: float, y_dil: float) -> float:
+        """
+        标量四线性插值
+        :param phi: 当量比
+        :param temperature: 温度 [K]
+        :param pressure: 压力 [Pa]
+        :param y_dil: 残余气体质量分数
+        :return: 着火延迟 [s]
+        """
+        locations = (locate(self._phi, phi), locate(self._temperature, temperature),
+                     locate(self._log_pressure, log(pressure)), locate(self._dilution, y_dil))
+        result = 0.
+        for corner in range(16):
+            weight = 1.
+            node = self._log_delay
+            for axis, (j, t) in enumerate(locations):
+                if corner >> axis & 1:
+                    weight *= t
+                    node = node[j + 1]
+                else:
+                    weight *= 1 - t
+                    node = node[j]
+                if weight == 0.:
+                    break
+            else:
+                result += weight * node
+        return exp(result)
+
+
+class IgnitionDelayIntegrator:
+    """
+    着火延迟积分 ∫dt/τ 的积分器, 爆震积分器 KnockIntegrator 与化学反应开关 ChemistrySwitch 的基类
+
+        每次推进反应器网络后调用 integrate, 以反应器当前状态计算 1/τ, 按梯形公式累积到当前时刻。
+        积分只在调用时刻采样, 不放在右端项钩子中 (CVODE 在试探步与雅可比计算中以非单调的时间调用右端项),
+        因此推进间隔即积分步长, 也是越过阈值时刻的分辨率: 间隔内 1/τ 应近似线性变化, 建议不超过 1° 曲轴转角;
+        着火前 τ 随温度近似指数下降, 间隔过大时越过阈值的时刻偏晚。
+        max_increment 记录单次调用的最大增量, 与判定阈值相比不小时应减小推进间隔
+    """
+
+    def __init__(self, reactor: IdealGasReactor,
+                 ignition_delay: Callable[[float, float], float] | TabulatedIgnitionDelay):
+        """
+        着火延迟积分器
+        :param reactor: 反应器
+        :param ignition_delay: 着火延迟函数 (输入为温度 [K] 与压力 [Pa], 输出为着火延迟 [s]),
+                               或以当量比、温度、压力与残余气体质量分数查表的 TabulatedIgnitionDelay
+        """
+        self.reactor = reactor  # 反应器
+        self.ignition_delay = ignition_delay  # 着火延迟
+        self.state = ReactorState(reactor)  # 反应器状态快照, 只在 integrate 中刷新
+        self._tabulated = isinstance(ignition_delay, TabulatedIgnitionDelay)  # 是否查表
+        self._marker_index = (self.state.track_species(ignition_delay.table.marker)
+                              if self._tabulated else None)  # 标记组分索引
+        self.integral = 0.  # 着火延迟积分
+        self.max_increment = 0.  # 单次调用的最大增量
+        self._time: float | None = None  # 上一次调用的时间 [s]
+        self._rate = self._reciprocal_delay()  # 上一次调用时的 1/τ [1/s]
+
+    def _reciprocal_delay(self) -> float:
+        """
+        以反应器当前状态计算着火延迟
+        :return: 1/τ [1/s]
+        """
+        state = self.state
+        state.refresh()
+        ignition_delay = self.ignition_delay
+        if not self._tabulated:
+            return 1 / float(ignition_delay(state.T, state.P))
+        phi = state.equivalence_ratio()
+        y_dil = state.mass_fraction(self._marker_index) / ignition_delay.residual_marker(phi)
+        return 1 / ignition_delay.delay(phi, state.T, state.P, y_dil)
+
+    def integrate(self, reactor_net: ReactorNet) -> float:
+        """
+        以反应器当前状态把积分累积到反应器网络的当前时刻
+        :param reactor_net: 反应器网络
+        :return: 着火延迟积分
+        """
+        time = reactor_net.time
+        last_time = reactor_net.initial_time if self._time is None else self._time
+        rate = self._reciprocal_delay()
+        increment = 0.5 * (rate + self._rate) * (time - last_time)
+        self.integral += increment
+        if increment > self.max_increment:
+            self.max_increment = increment
+        self._time = time
+        self._rate = rate
+        return self.integral
+
+
+class LivengoodWu:
+    """
+    Livengood-Wu 爆震预测的配置
+
+        每次推进反应器网络后以未燃区的当量比、温度、压力与残余气体质量分数查表得到着火延迟 τ,
+        以梯形公式累积 ∫dt/τ, 达到 threshold 时判定末端气体自燃 (爆震起始), 记录时刻与此时的未燃质量
+    """
+
+    def __init__(self, ignition_delay: TabulatedIgnitionDelay | IgnitionDelayTable | str | pathlib.Path,
+                 threshold: float = 1.):
+        """
+        Livengood-Wu 爆震预测的配置
+        :param ignition_delay: 着火延迟数据表 (或其文件路径)
+        :param threshold: 判定自燃的积分值
+        """
+        self.ignition_delay = (ignition_delay if isinstance(ignition_delay, TabulatedIgnitionDelay)
+                               else TabulatedIgnitionDelay(ignition_delay))  # 着火延迟
+        self.threshold = threshold  # 判定自燃的积分值
+
+    def integrator(self, unburned: IdealGasReactor, geometry: EngineGeometry | None = None) -> 'KnockIntegrator':
+        """
+        未燃区的爆震积分器
+        :param unburned: 未燃区反应器
+        :param geometry: 发动机几何, 用于给出爆震起始的曲轴转角, 为 None 时只给出时间
+        :return: 爆震积分器
+        """
+        return KnockIntegrator(self, unburned, geometry)
+
+
+class KnockIntegrator(IgnitionDelayIntegrator):
+    """
+    一个未燃区的 Livengood-Wu 积分器, 由 LivengoodWu.integrator 创建; 每次推进反应器网络后调用 update,
+    推进间隔的要求见 IgnitionDelayIntegrator
+    """
+
+    def __init__(self, config: LivengoodWu, unburned: IdealGasReactor, geometry: EngineGeometry | None = None):
+        """
+        一个未燃区的 Livengood-Wu 积分器
+        :param config: 爆震预测的配置
+        :param unburned: 未燃区反应器
+        :param geometry: 发动机几何
+        """
+        super().__init__(unburned, config.ignition_delay)
+        self.config = config  # 爆震预测的配置
+        self.unburned = unburned  # 未燃区反应器
+        self.geometry = geometry  # 发动机几何
+        self.onset_time: float | None = None  # 爆震起始时刻 [s], 未爆震时为 None
+        self.onset_unburned_mass: float | None = None  # 爆震起始时的未燃质量 [kg]
+
+    @property
+    def knocked(self) -> bool:
+        """是否已判定爆震"""
+        return self.onset_time is not None
+
+    @property
+    def onset_angle(self) -> float | None:
+        """爆震起始的曲轴转角 [°], 未爆震或未给出发动机几何时为 None"""
+        if self.onset_time is None or self.geometry is None:
+            return None
+        return float(rad2deg(self.geometry.crank_angle(self.onset_time)))
+
+    def update(self, reactor_net: ReactorNet) -> bool:
+        """
+        以未燃区当前状态累积 Livengood-Wu 积分
+        :param reactor_net: 反应器网络
+        :return: 本次是否判定爆震起始
+        """
+        if self.onset_time is not None:
+            return False
+        if self.integrate(reactor_net) < self.config.threshold:
+            return False
+        time = reactor_net.time
+        self.onset_time = time
+        self.onset_unburned_mass = self.state.mass
+        angle = self.onset_angle
+        angle = '' if angle is None else f' ({angle:.2f} deg)'
+        logger.info(f'knock onset at {time:.6g} s{angle}, unburned mass {self.state.mass:.4g} kg, '
+                    f'temperature {self.state.T:.1f} K, pressure {self.state.P:.4g} Pa')
+        return True
@@ -0,0 +1,197 @@
+# -*- coding:utf-8 -*-
+"""
+提供全循环计算的周期稳态加速求解: 把 "循环起点状态 → 下一循环起点状态" 视为映射, 以 Anderson 加速求其不动点
+@Author: MoonCake Without Moon
+@Time: 2025/7/16
+"""
+__all__ = ['PeriodicIteration', 'PeriodicSolution', 'PeriodicSteadyState']
+
+from dataclasses import dataclass, field
+
+from loguru import logger
+from numpy import ndarray, array, zeros, clip, abs as np_abs, column_stack, flatnonzero
+from numpy.linalg import lstsq
+
+from ._cycle_simulation import CycleSimulation, CycleRecord
+
+
+@dataclass(slots=True)
+class PeriodicIteration:
+    """周期稳态求解的一次迭代 (一个循环)"""
+    cycle: int  # 循环序号
+    residual: float  # 不动点残差, 循环起点与终点缩减状态量之差 (以及相对壁面温度变化) 的最大值
+    imep: float  # 平均指示压力 [Pa]
+    trapped_mass: float  # 进气门关闭时的缸内质量 [kg]
+    residual_fraction: float  # 残余废气系数
+    wall_heat: float  # 本循环的壁面传热量 [J]
+    accelerated: bool  # 下一循环的初值是否由加速外推得到
+
+
+@dataclass(slots=True)
+class PeriodicSolution:
+    """周期稳态求解结果"""
+    converged: bool  # 是否收敛
+    cycles: int  # 所用循环数
+    state: ndarray  # 周期稳态的循环起点状态量 (质量、体积、温度、各组分质量分数)
+    record: CycleRecord  # 最后一个循环的记录
+    history: list[PeriodicIteration] = field(default_factory=list)  # 收敛历程
+
+
+class PeriodicSteadyState:
+    """
+    周期稳态加速求解
+
+        映射 G: 循环起点的气缸状态 x → 计算一个循环后的状态 G(x), 周期稳态即 G 的不动点。
+        迭代在缩减状态量上进行: 质量与温度 (以首个循环的值归一化) 以及质量分数大于 species_threshold 的组分,
+        其余组分取映射的输出值。Anderson 加速 (第二类) 以最近 memory 次的残差差分做最小二乘,
+        外推下一循环的初值; memory 为 0 时退化为逐循环计算 (不动点迭代)。
+        映射在失火与着火之间不连续, 只在残差低于 start_residual 且逐循环减小时外推, 残差增大时丢弃历史。
+        外推得到的质量分数截断为非负并归一化。循环起始角建议设在进气门关闭 (CycleSimulation 的 start_angle),
+        此时缸内为封闭系统, 状态与气阀无关。
+        设置了壁面温度模型时, 壁面各节点温度 (以首个循环起点的缸内温度归一化) 也是缩减状态量的一部分:
+        壁面热惯性远大于一个循环, 逐循环计算时壁面温度收敛最慢, 与气体状态一同外推才能减少循环数;
+        表面温度的变化也计入收敛判据。
+        CycleSimulation 的 steady_wall 为 True 时壁面在每个循环结束时设为循环平均边界条件下的稳态温度场, 收敛更快
+    """
+
+    def __init__(self,
+                 simulation: CycleSimulation,
+                 memory: int = 3,
+                 damping: float = 1.,
+                 tolerance: float = 1e-4,
+                 species_threshold: float = 1e-5,
+                 start_residual: float = 1e-2):
+        """
+        周期稳态加速求解
+        :param simulation: 全循环计算
+        :param memory: Anderson 加速使用的历史步数, 为 0 时不加速
+        :param damping: 混合系数, 1 为不阻尼
+        :param tolerance: 收敛判据, 缩减状态量 (相对质量、相对温度、质量分数) 的最大变化
+        :param species_threshold: 参与迭代的组分的质量分数下限
+        :param start_residual: 残差低于此值后才开始加速, 之前逐循环计算
+        """
+        if memory < 0:
+            raise ValueError('memory cannot be negative')
+        if not 0 < damping <= 1:
+            raise ValueError('damping must be in (0, 1]')
+        self.simulation = simulation  # 全循环计算
+        self.memory = memory  # 历史步数
+        self.damping = damping  # 混合系数
+        self.tolerance = tolerance  # 收敛判据
+        self.species_threshold = species_threshold  # 参与迭代的组分的质量分数下限
+        self.start_residual = start_residual  # 开始加速的残差
+
+    def _reduce(self, state: ndarray, wall: ndarray | None, scale: ndarray, species: ndarray) -> ndarray:
+        """
+        缩减状态量
+        :param state: 质量、体积、温度、各组分质量分数
+        :param wall: 壁面各节点温度, 无壁面温度模型时为 None
+        :param scale: 质量与温度的归一化值
+        :param species: 参与迭代的组分索引
+        :return: 相对质量、相对温度、参与迭代的组分的质量分数、壁面各节点的相对温度
+        """
+        n_wall = 0 if wall is None else len(wall)
+        reduced = zeros(2 + len(species) + n_wall)
+        reduced[0] = state[0] / scale[0]
+        reduced[1] = state[2] / scale[1]
+        reduced[2:2 + len(species)] = state[3 + species]
+        if n_wall:
+            reduced[2 + len(species):] = wall / scale[1]
+        return reduced
+
+    def _expand(self, reduced: ndarray, template: ndarray, scale: ndarray,
+                species: ndarray) -> tuple[ndarray, ndarray | None]:
+        """
+        由缩减状态量恢复完整状态量
+        :param reduced: 缩减状态量
+        :param template: 提供体积与其余组分的完整状态量
+        :param scale: 质量与温度的归一化值
+        :param species: 参与迭代的组分索引
+        :return: 质量、体积、温度、各组分质量分数, 以及壁面各节点温度 (无壁面温度模型时为 None)
+        """
+        state = template.copy()
+        state[0] = reduced[0] * scale[0]
+        state[2] = reduced[1] * scale[1]
+        y = state[3:]
+        y[species] = clip(reduced[2:2 + len(species)], 0, None)
+        y /= y.sum()
+        wall = reduced[2 + len(species):] * scale[1]
+        return state, (wall if len(wall) else None)
+
+    def _restart(self, reduced: ndarray, template: ndarray, scale: ndarray, species: ndarray) -> ndarray:
+        """
+        以缩减状态量设置下一循环的初值
+        :param reduced: 缩减状态量
+        :param template: 提供体积与其余组分的完整状态量
+        :param scale: 质量与温度的归一化值
+        :param species: 参与迭代的组分索引
+        :return: 设置后的气缸状态量
+        """
+        state, wall = self._expand(reduced, template, scale, species)
+        self.simulation.set_state(state)
+        if wall is not None:
+            self.simulation.wall_model.set_state(wall)
+        return state
+
+    def solve(self, max_cycles: int = 20) -> PeriodicSolution:
+        """
+        从全循环计算的当前状态开始求周期稳态
+        :param max_cycles: 最大循环数, 至少为 1
+        :return: 求解结果
+        """
+        if max_cycles < 1:
+            raise ValueError('max_cycles must be at least 1')
+        simulation = self.simulation
+        wall_model = simulation.wall_model
+        state = simulation.state()
+        wall = None if wall_model is None else wall_model.state()
+        scale = array([state[0], state[2]])
+        species: ndarray | None = None  # 参与迭代的组分索引, 由首个循环的输出确定
+        xs: list[ndarray] = []  # 历次的输入 (缩减)
+        gs: list[ndarray] = []  # 历次的输出 (缩减)
+        history: list[PeriodicIteration] = []
+        record = None
+        converged = False
+        for cycle in range(1, max_cycles + 1):
+            record = simulation.run_cycle()
+            output = simulation.state()
+            wall_output = None if wall_model is None else wall_model.state()
+            if species is None:
+                species = flatnonzero((output[3:] > self.species_threshold) | (state[3:] > self.species_threshold))
+            x = self._reduce(state, wall, scale, species)
+            g = self._reduce(output, wall_output, scale, species)
+            residual = float(np_abs(g - x).max())
+            if record.wall_temperature_change is not None:
+                residual = max(residual, record.wall_temperature_change / scale[1])
+            converged = residual < self.tolerance
+            if residual >= self.start_residual or (history and residual > history[-1].residual):
+                # 尚未进入渐近收敛段, 或残差增大 (例如失火与着火之间切换): 丢弃历史, 本循环不外推
+                xs.clear()
+                gs.clear()
+            xs.append(x)
+            gs.append(g)
+            del xs[:-(self.memory + 1)], gs[:-(self.memory + 1)]
+            accelerated = not converged and self.memory > 0 and len(xs) > 1
+            history.append(PeriodicIteration(cycle, residual, record.imep, record.trapped_mass,
+                                             record.residual_fraction, record.wall_heat, accelerated))
+            if converged:
+                state = output
+                break
+            if accelerated:
+                # Anderson 加速: 以残差差分的最小二乘组合修正最新的输入与输出
+                f = [gk - xk for xk, gk in zip(xs, gs)]
+                d_f = column_stack([f[k + 1] - f[k] for k in range(len(f) - 1)])
+                d_x = column_stack([xs[k + 1] - xs[k] for k in range(len(xs) - 1)])
+                d_g = column_stack([gs[k + 1] - gs[k] for k in range(len(gs) - 1)])
+                gamma = lstsq(d_f, f[-1], rcond=None)[0]
+                x_next = (1 - self.damping) * (x - d_x @ gamma) + self.damping * (g - d_g @ gamma)
+                state = self._restart(x_next, output, scale, species)
+            elif self.damping < 1:
+                state = self._restart((1 - self.damping) * x + self.damping * g, output, scale, species)
+            else:
+                state = output  # 不动点迭代: 直接继续下一循环
+            wall = None if wall_model is None else wall_model.state()
+        else:
+            logger.warning(f'periodic steady state did not converge in {max_cycles} cycles, '
+                           f'the last residual is {history[-1].residual:.3g}')
+        return PeriodicSolution(converged, len(history), state, record, history)
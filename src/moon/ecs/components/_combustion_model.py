@@ -3,12 +3,13 @@
 @Author: MoonCake Without Moon
 @Time: 2025/4/8
 """
-__all__ = ['FractalTurbulentCombustionModelComponent', 'WiebeCombustionModelComponent',
-           'ZeroDimensionCombustionModelComponent']
+__all__ = ['TwoZoneCombustionModelComponent', 'FractalTurbulentCombustionModelComponent',
+           'WiebeCombustionModelComponent', 'ZeroDimensionCombustionModelComponent']
 
 from dataclasses import dataclass
 
 from cantera import IdealGasReactor
+from numpy import deg2rad
 
 from ._component import Component
 
@@ -36,11 +37,8 @@ class EnginePerformance:
 
 
 @dataclass
-class FractalTurbulentCombustionModelComponent(Component):
-    """分形湍流燃烧模型组件"""
-    init_u_rms: float = 2.5  # 初始均方根湍流速度 [m/s]
-    r_f_ref: float = 0.06  # 参考火焰半径 [m]
-    n_ref: float = 1000 / 60  # 参考转速 [r/s]
+class TwoZoneCombustionModelComponent(Component):
+    """双区燃烧模型组件基类"""
     _burned_zone = None  # 已燃区
     _unburned_zone = None  # 未燃区
 
@@ -62,9 +60,29 @@ class FractalTurbulentCombustionModelComponent(Component):
 
 
 @dataclass
-class WiebeCombustionModelComponent(Component):
-    """Wiebe 燃烧模型组件"""
-    raise NotImplementedError
+class FractalTurbulentCombustionModelComponent(TwoZoneCombustionModelComponent):
+    """分形湍流燃烧模型组件"""
+    init_u_rms: float = 2.5  # 初始均方根湍流速度 [m/s]
+    r_f_ref: float = 0.06  # 参考火焰半径 [m]
+    n_ref: float = 1000 / 60  # 参考转速 [r/s]
+
+
+@dataclass
+class WiebeCombustionModelComponent(TwoZoneCombustionModelComponent):
+    """Wiebe 燃烧模型组件, second_fraction 大于 0 时为双 Wiebe"""
+    start_angle: float = deg2rad(-15)  # 燃烧始点 [rad]
+    duration: float = deg2rad(50)  # 燃烧持续角 [rad]
+    shape: float = 2.  # 品质指数
+    efficiency: float = 6.908  # 燃烧效率系数
+    second_start_angle: float | None = None  # 第二条曲线的燃烧始点 [rad]
+    second_duration: float | None = None  # 第二条曲线的燃烧持续角 [rad]
+    second_shape: float = 2.  # 第二条曲线的品质指数
+    second_fraction: float = 0.  # 第二条曲线的质量份额
+    burn_mode: str = 'kinetics'  # 燃烧计算方式 'kinetics' 或 'equilibrium', 与 TwoZoneModel 的默认值一致
+
+    def __post_init__(self):
+        if self.burn_mode not in ('kinetics', 'equilibrium'):
+            raise ValueError("burn_mode can only be 'kinetics' or 'equilibrium'")
 
 
 @dataclass
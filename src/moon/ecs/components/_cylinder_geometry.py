@@ -5,13 +5,14 @@
 """
 __all__ = ['CylindricalCylinderGeometryComponent', 'OmigaCylinderGeometryComponent']
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 import esper
 from numpy import pi
 
 from ._component import Component
 from ._crankshaft import CrankshaftComponent
+from ...geometry import CombustionChamber
 
 
 @dataclass
@@ -42,5 +43,41 @@ class CylindricalCylinderGeometryComponent(Component):
 
 @dataclass
 class OmigaCylinderGeometryComponent(Component):
-    """具有 Omiga型线的气缸组件"""
-    raise NotImplementedError
+    """具有 Omiga型线的气缸组件, 型线为活塞顶平面以下的凹坑深度关于半径的分段线性函数"""
+    crankshaft_id: int = None  # 曲轴实体的id
+    bore: float = 0.1  # 缸径 [m]
+    compression_ratio: float = 10  # 压缩比 (包含凹坑容积)
+    bowl_radii: tuple[float, ...] = field(default_factory=tuple)  # 凹坑型线的径向坐标 [m], 递增
+    bowl_depths: tuple[float, ...] = field(default_factory=tuple)  # 凹坑型线的深度 (活塞顶平面以下为正) [m]
+
+    def chamber(self, spark_offset: float = 0., spark_depth: float = 0.) -> CombustionChamber:
+        """
+        燃烧室描述, 用于构造 ChamberTwoZoneGeometry
+        :param spark_offset: 火花塞相对气缸轴线的径向偏置 [m]
+        :param spark_depth: 火花塞点火位置到缸盖的距离 [m]
+        :return: 燃烧室描述
+        """
+        return CombustionChamber(tuple(self.bowl_radii), tuple(self.bowl_depths), spark_offset, spark_depth)
+
+    @property
+    def bowl_volume(self) -> float:
+        """凹坑容积 [m³]"""
+        return self.chamber().bowl_volume(self.bore)
+
+    @property
+    def tdc_volume(self) -> float:
+        """余隙容积 (包含凹坑容积) [m³]"""
+        if self.crankshaft_id is None:
+            raise ValueError("Missing crankshaft !")
+        crankshaft = esper.component_for_entity(self.crankshaft_id, CrankshaftComponent)
+        return 2 * crankshaft.crank_radius * self.bore_area / (self.compression_ratio - 1)
+
+    @property
+    def tdc_gap(self) -> float:
+        """上止点时活塞顶平面到缸盖的距离 [m]"""
+        return (self.tdc_volume - self.bowl_volume) / self.bore_area
+
+    @property
+    def bore_area(self) -> float:
+        """气缸圆面积 [m²]"""
+        return 0.25 * pi * self.bore ** 2
@@ -25,6 +25,7 @@ class SparkPlugComponent(Component):
 
 
 @dataclass
-class OffsetSparkPlug(Component):
+class OffsetSparkPlug(SparkPlugComponent):
     """偏置火花塞组件"""
-    raise NotImplementedError
+    offset: float = 0.  # 相对气缸轴线的径向偏置 [m]
+    depth: float = 0.  # 点火位置到缸盖的距离 [m]
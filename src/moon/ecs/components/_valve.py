@@ -25,11 +25,14 @@ class ValveComponent(Component):
 
     def __post_init__(self):
         self.valve: Valve | None = None  # cantera阀门
+        self.reverse_valve: Valve | None = None  # 反向cantera阀门 (回流), 可为 None
 
     @property
     def mass_flow_rate(self) -> float:
-        """质量流量 [kg/s]"""
+        """上游流向下游的净质量流量 [kg/s], 回流为负"""
         if self.valve is None:
             return 0
-        else:
+        elif self.reverse_valve is None:
             return self.valve.mass_flow_rate
+        else:
+            return self.valve.mass_flow_rate - self.reverse_valve.mass_flow_rate
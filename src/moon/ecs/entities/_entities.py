@@ -115,9 +115,11 @@ class CylinderEntity(Entity):
                 self.combustion_model = ZeroDimensionCombustionModelComponent()
             case 'fractal turbulent':
                 self.combustion_model = FractalTurbulentCombustionModelComponent()
+            case 'wiebe':
+                self.combustion_model = WiebeCombustionModelComponent()
             case _:
                 raise ValueError("combustion_model can only be 'zero dimension', "
-                                 "'fractal turbulent'")
+                                 "'fractal turbulent', 'wiebe'")
 
         match heat_transfer_model:
             case 'woschni':
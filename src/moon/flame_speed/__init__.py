@@ -4,3 +4,5 @@
 @Time: 2025/1/22
 """
 from ._flame_speed import *
+from ._range_diagnostics import *
+from ._tabulated_flame_speed import *
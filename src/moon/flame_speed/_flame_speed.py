@@ -4,27 +4,53 @@
 @Author: MoonCake Without Moon
 @Time: 2024/10/10
 """
-__all__ = ['FlameSpeedBase', 'FlameSpeedContext', 'MethanolHydrogenFlameSpeed']
+__all__ = ['FlameSpeedBase', 'FlameSpeedContext', 'MethanolHydrogenFlameSpeed', 'CorrelationFlameSpeed']
 
+import json
 import pathlib
 from abc import ABC, abstractmethod
 from typing import Callable
 
-from numpy import array, sum
+from numpy import array, ndarray, asarray, where, maximum, broadcast_arrays, interp
 from pandas import read_csv
 from cantera import IdealGasReactor
-from loguru import logger
+
+from ._range_diagnostics import RangeDiagnostics, ParameterRangeInfo
+from ..tools.reactor_state import ReactorState, as_reactor_state
 
 
 class FlameSpeedBase(ABC):
     """
     策略接口
+
+        基于经验关联式的策略可设置 diagnostics (RangeDiagnostics) 记录参数越界情况,
+        由 range_summary()、report_ranges() 统一查询与输出。
+        策略只保存配置 (拟合系数、数据表), 与反应器有关的量 (状态快照、组分索引) 只保存在 laminar_flame_speed()
+        返回的函数中, 同一策略实例可同时用于多个气缸或多个线程中的仿真; 诊断计数为这些仿真的合计
     """
 
+    diagnostics: RangeDiagnostics | None = None  # 适用范围诊断, 为 None 时不检查
+
+    def range_summary(self) -> list[ParameterRangeInfo]:
+        """
+        适用范围诊断汇总
+        :return: 各参数的诊断信息, 未设置诊断时为空列表
+        """
+        return [] if self.diagnostics is None else self.diagnostics.summary()
+
+    def report_ranges(self, reset: bool = True) -> list[ParameterRangeInfo]:
+        """
+        输出一行适用范围汇总日志 (仅在存在越界时), 在一次运行或一个循环结束时调用
+        :param reset: 输出后是否清零
+        :return: 各参数的诊断信息, 未设置诊断时为空列表
+        """
+        return [] if self.diagnostics is None else self.diagnostics.report(reset)
+
     @abstractmethod
-    def laminar_flame_speed(self, unburned: IdealGasReactor) -> Callable[[float], float]:
+    def laminar_flame_speed(self, unburned: IdealGasReactor | ReactorState) -> Callable[[float], float]:
         """
         层流火焰速度接口
+        :param unburned: 未燃区反应器或其状态快照 (由单回调气缸反应器的钩子刷新)
         :return: 层流火焰速度 [m/s]
         """
         pass
@@ -45,9 +71,10 @@ class FlameSpeedContext:
             raise TypeError('flame_speed must inherit FlameSpeedBase')
         self.strategy = flame_speed  # 层流火焰速度计算策略类
 
-    def laminar_flame_speed(self, unburned: IdealGasReactor) -> Callable[[float], float]:
+    def laminar_flame_speed(self, unburned: IdealGasReactor | ReactorState) -> Callable[[float], float]:
         """
         执行策略计算层流火焰速度
+        :param unburned: 未燃区反应器或其状态快照
         :return: 层流火焰速度 [m/s]
         """
         return self.strategy.laminar_flame_speed(unburned)
@@ -61,7 +88,7 @@ class MethanolHydrogenFlameSpeed(FlameSpeedBase):
     def __init__(self, boundary_warning: bool = True):
         """
         甲醇-氢火焰速度
-        :param boundary_warning: 是否发出参数越界警告
+        :param boundary_warning: 是否检查参数范围, 越界情况由 range_summary()、report_ranges() 汇总
         """
         super().__init__()
         self.boundary_warning = boundary_warning  # 是否发出参数越界警告
@@ -72,45 +99,57 @@ class MethanolHydrogenFlameSpeed(FlameSpeedBase):
             'residual gas mass fraction': {'range': (0, 0.2), 'unit': None},
             'hydrogen volume fraction': {'range': (0, 0.1), 'unit': None}
         }  # 数据范围
+        self.diagnostics = RangeDiagnostics(self._data_ranges) if boundary_warning else None  # 适用范围诊断
         current_path = pathlib.Path(__file__).parent  # 当前文件所在文件夹路径
         relative_path = r'fit_coefficients/hydrogen_methanol.csv'  # 相对路径
         absolute_path = current_path / relative_path  # 绝对路径
-        # 拟合系数
-        fit_coefficients = read_csv(absolute_path, index_col=0)
+        self._load_coefficients(absolute_path)
+        self._T_ref = 400  # 参考温度 [K]
+        self._p_ref = 1e5  # 参考压力 [Pa]
+
+    def _load_coefficients(self, path: str | pathlib.Path) -> None:
+        """
+        读取拟合系数文件, 列为 a_lower, a_upper, b_lower, b_upper (各 9 项), c (15 项), d (9 项)
+        :param path: 拟合系数文件路径
+        """
+        fit_coefficients = read_csv(path, index_col=0)
         self._a_lower = array(fit_coefficients['a_lower'].dropna())
         self._a_upper = array(fit_coefficients['a_upper'].dropna())
         self._b_lower = array(fit_coefficients['b_lower'].dropna())
         self._b_upper = array(fit_coefficients['b_upper'].dropna())
         self._c = array(fit_coefficients['c'].dropna())
         self._d = array(fit_coefficients['d'].dropna())
-        self._T_ref = 400  # 参考温度 [K]
-        self._p_ref = 1e5  # 参考压力 [Pa]
-        # 计算中间参数
-        self._unburned: IdealGasReactor | None = None  # 未燃区反应器
-        self._CO2_index = None  # CO2索引
-        self._H2_index = None  # H2索引
+        # 标量计算用的系数: 9 项系数为 {1, phi, phi**2} 与 {1, alpha_h2, alpha_h2**2} 的张量积,
+        # 整理为 3x3 的纯 Python 浮点数表, 按 Horner 形式计算, 不分配数组
+        self._a_lower_table = self._tensor_table(self._a_lower)
+        self._a_upper_table = self._tensor_table(self._a_upper)
+        self._b_lower_table = self._tensor_table(self._b_lower)
+        self._b_upper_table = self._tensor_table(self._b_upper)
+        self._d_table = self._tensor_table(self._d)
+        self._c_terms = tuple(float(c) for c in self._c)
 
-    def laminar_flame_speed(self, unburned: IdealGasReactor) -> Callable[[float], float]:
+    def laminar_flame_speed(self, unburned: IdealGasReactor | ReactorState) -> Callable[[float], float]:
         """
         层流火焰速度
+        :param unburned: 未燃区反应器或其状态快照, 传入反应器时每次调用自行刷新快照
         :return: 层流火焰速度 [m/s]
         """
-        self._unburned = unburned
-        self._CO2_index = unburned.thermo.species_index('CO2')
-        self._H2_index = unburned.thermo.species_index('H2')
+        state, owned = as_reactor_state(unburned)  # 快照与组分索引只属于本次返回的函数, 策略本身不保存
+        co2_index = state.track_species('CO2')  # CO2索引
+        h2_index = state.track_species('H2')  # H2索引
 
         def func(time: float) -> float:
-            phi = self._unburned.thermo.equivalence_ratio()
-            t_u = self._unburned.thermo.T
-            p = self._unburned.thermo.P
+            if owned:
+                state.refresh()
+            phi = state.equivalence_ratio()
+            t_u = state.T
+            p = state.P
             # CO2质量分数到残余气体质量分数的映射, 基于纯甲醇燃烧推导得到
-            y_dil = self._unburned.thermo.Y[self._CO2_index] * 32 * (phi + 6.43715625) / (44 * phi)
-            alpha_h2 = self._unburned.thermo.X[self._H2_index]
+            y_dil = state.mass_fraction(co2_index) * 32 * (phi + 6.43715625) / (44 * phi)
+            alpha_h2 = state.mole_fraction(h2_index)
             # 对各参数做范围检查
-            if self.boundary_warning:
-                values = [phi, t_u, p, y_dil, alpha_h2]
-                for key, value in zip(self._data_ranges.keys(), values):
-                    self._check_parameter(key, value)
+            if self.diagnostics is not None:
+                self.diagnostics.check(phi, t_u, p, y_dil, alpha_h2)
             s_l = self._s_l(phi, t_u, p, y_dil, alpha_h2)
             # 确保层流火焰速度大于0
             return max(s_l, 0)
@@ -127,39 +166,79 @@ class MethanolHydrogenFlameSpeed(FlameSpeedBase):
         :param alpha_h2: 氢气体积分数
         :return: 层流火焰速度 [m/s]
         """
-        # matrix_1为计算SL_0、alpha、和gama的系数矩阵
-        matrix_1 = array(
-            [1, phi, phi ** 2, alpha_h2, alpha_h2 ** 2, phi * alpha_h2,
-             phi ** 2 * alpha_h2, phi * alpha_h2 ** 2, phi ** 2 * alpha_h2 ** 2]
-        )
-        # matrix_2为计算Beta的系数矩阵
+        phi = float(phi)
+        alpha_h2 = float(alpha_h2)
         t_t_ref = t_u / self._T_ref
-        matrix_2 = array(
-            [1, phi, phi ** 2, alpha_h2, alpha_h2 ** 2, t_t_ref, t_t_ref ** 2,
-             phi * alpha_h2, phi * t_t_ref, alpha_h2 * t_t_ref,
-             phi ** 2 * alpha_h2, phi * alpha_h2 ** 2, phi ** 2 * alpha_h2 ** 2,
-             phi * t_t_ref ** 2, alpha_h2 * t_t_ref ** 2]
-        )
         if phi <= 1:
-            s_l0 = sum(self._a_lower * matrix_1)
-            alpha = sum(self._b_lower * matrix_1)
+            s_l0 = self._tensor_value(self._a_lower_table, phi, alpha_h2)
+            alpha = self._tensor_value(self._b_lower_table, phi, alpha_h2)
         else:
-            s_l0 = sum(self._a_upper * matrix_1)
-            alpha = sum(self._b_upper * matrix_1)
-        beta = sum(self._c * matrix_2)
-        gamma = sum(self._d * matrix_1)
+            s_l0 = self._tensor_value(self._a_upper_table, phi, alpha_h2)
+            alpha = self._tensor_value(self._b_upper_table, phi, alpha_h2)
+        gamma = self._tensor_value(self._d_table, phi, alpha_h2)
+        # 计算 beta 的 15 项多项式, 项的顺序与拟合系数一致
+        c = self._c_terms
+        phi_2 = phi * phi
+        alpha_2 = alpha_h2 * alpha_h2
+        t_2 = t_t_ref * t_t_ref
+        beta = (c[0] + c[1] * phi + c[2] * phi_2 + c[3] * alpha_h2 + c[4] * alpha_2 + c[5] * t_t_ref + c[6] * t_2 +
+                c[7] * phi * alpha_h2 + c[8] * phi * t_t_ref + c[9] * alpha_h2 * t_t_ref +
+                c[10] * phi_2 * alpha_h2 + c[11] * phi * alpha_2 + c[12] * phi_2 * alpha_2 +
+                c[13] * phi * t_2 + c[14] * alpha_h2 * t_2)
         return s_l0 * t_t_ref ** alpha * (p / self._p_ref) ** beta * (1 - gamma * y_dil) * 1e-2
 
-    def _check_parameter(self, key: str, value: float) -> None:
+    def laminar_flame_speed_batch(self, phi: ndarray, t_u: ndarray, p: ndarray, y_dil: ndarray,
+                                  alpha_h2: ndarray) -> ndarray:
         """
-        对当量比等参数进行范围检查, 如果超出范围则会抛出警告
-        :param key: 需检查的参数
-        :param value: 需检查的值
+        批量计算层流火焰速度, 用于后处理与建表, 不做范围检查
+        :param phi: 当量比
+        :param t_u: 未燃气体温度 [K]
+        :param p: 压力 [Pa]
+        :param y_dil: 残余气体质量分数
+        :param alpha_h2: 氢气体积分数
+        :return: 层流火焰速度 [m/s], 不小于 0
         """
-        if not (self._data_ranges[key]['range'][0] <= value <= self._data_ranges[key]['range'][1]):
-            logger.warning(f"{key} is out of range, the range is {self._data_ranges[key]['range'][0]}"
-                           f" to {self._data_ranges[key]['range'][1]}, you can set the boundary_warning"
-                           f" to False to ignore this warning.")
+        phi, t_u, p, y_dil, alpha_h2 = broadcast_arrays(*(asarray(value, dtype=float)
+                                                          for value in (phi, t_u, p, y_dil, alpha_h2)))
+        lower = phi <= 1
+        s_l0 = where(lower, self._tensor_value(self._a_lower_table, phi, alpha_h2),
+                     self._tensor_value(self._a_upper_table, phi, alpha_h2))
+        alpha = where(lower, self._tensor_value(self._b_lower_table, phi, alpha_h2),
+                      self._tensor_value(self._b_upper_table, phi, alpha_h2))
+        gamma = self._tensor_value(self._d_table, phi, alpha_h2)
+        t_t_ref = t_u / self._T_ref
+        c = self._c_terms
+        beta = (c[0] + c[1] * phi + c[2] * phi ** 2 + c[3] * alpha_h2 + c[4] * alpha_h2 ** 2 + c[5] * t_t_ref +
+                c[6] * t_t_ref ** 2 + c[7] * phi * alpha_h2 + c[8] * phi * t_t_ref + c[9] * alpha_h2 * t_t_ref +
+                c[10] * phi ** 2 * alpha_h2 + c[11] * phi * alpha_h2 ** 2 + c[12] * phi ** 2 * alpha_h2 ** 2 +
+                c[13] * phi * t_t_ref ** 2 + c[14] * alpha_h2 * t_t_ref ** 2)
+        s_l = s_l0 * t_t_ref ** alpha * (p / self._p_ref) ** beta * (1 - gamma * y_dil) * 1e-2
+        return maximum(s_l, 0)
+
+    @staticmethod
+    def _tensor_table(coefficients: ndarray) -> tuple[tuple[float, float, float], ...]:
+        """
+        把 9 项系数 (项的顺序为 1, phi, phi**2, a, a**2, phi*a, phi**2*a, phi*a**2, phi**2*a**2)
+        整理为按 a 的幂次分组的 phi 多项式系数
+        :param coefficients: 9 项拟合系数
+        :return: ((a**0 项的 phi**0, phi**1, phi**2 系数), (a**1 项 ...), (a**2 项 ...))
+        """
+        k = [float(value) for value in coefficients]
+        return (k[0], k[1], k[2]), (k[3], k[5], k[6]), (k[4], k[7], k[8])
+
+    @staticmethod
+    def _tensor_value(table: tuple[tuple[float, float, float], ...], phi, alpha_h2):
+        """
+        按 Horner 形式计算 9 项张量积多项式, 标量与数组均适用
+        :param table: _tensor_table 整理后的系数
+        :param phi: 当量比
+        :param alpha_h2: 氢气体积分数
+        :return: 多项式的值
+        """
+        (k00, k01, k02), (k10, k11, k12), (k20, k21, k22) = table
+        return ((k00 + (k01 + k02 * phi) * phi) +
+                ((k10 + (k11 + k12 * phi) * phi) +
+                 (k20 + (k21 + k22 * phi) * phi) * alpha_h2) * alpha_h2)
 
     @property
     def data_ranges(self) -> dict:
@@ -167,3 +246,60 @@ class MethanolHydrogenFlameSpeed(FlameSpeedBase):
         数据范围
         """
         return self._data_ranges
+
+
+class CorrelationFlameSpeed(MethanolHydrogenFlameSpeed):
+    """
+    由 moon.tools.flame_speed_fit 拟合得到的关联式火焰速度
+
+        关联式形式与 MethanolHydrogenFlameSpeed 相同, 系数文件与 hydrogen_methanol.csv 格式相同;
+        同名的 .json 范围记录给出参考温度、参考压力、数据范围、残余气体标记组分及第二燃料组分
+    """
+
+    def __init__(self, coefficients: str | pathlib.Path, boundary_warning: bool = True):
+        """
+        关联式火焰速度
+        :param coefficients: 拟合系数文件路径 (.csv), 范围记录为同名的 .json 文件
+        :param boundary_warning: 是否检查参数范围, 越界情况由 range_summary()、report_ranges() 汇总
+        """
+        coefficients = pathlib.Path(coefficients)
+        with open(coefficients.with_suffix('.json')) as file:
+            record = json.load(file)
+        # 父类按甲醇-氢关联式初始化全部属性, 随后以拟合结果覆盖数据范围、诊断与系数
+        super().__init__(boundary_warning)
+        self._data_ranges = {name: {'range': tuple(item['range']), 'unit': item['unit']}
+                             for name, item in record['data_ranges'].items()}  # 数据范围
+        self.diagnostics = RangeDiagnostics(self._data_ranges) if boundary_warning else None  # 适用范围诊断
+        self._load_coefficients(coefficients)
+        self._T_ref = float(record['reference_temperature'])  # 参考温度 [K]
+        self._p_ref = float(record['reference_pressure'])  # 参考压力 [Pa]
+        self.marker: str | None = record['marker']  # 残余气体标记组分
+        self.secondary_fuel: str | None = record['secondary_fuel']  # 第二燃料组分 (关联式中的 alpha_h2)
+        self._marker_phi = list(record['marker_phi'])  # 标记组分质量分数表的当量比坐标
+        self._marker_fraction = list(record['marker_fraction'])  # 残余气体中标记组分的质量分数
+
+    def laminar_flame_speed(self, unburned: IdealGasReactor | ReactorState) -> Callable[[float], float]:
+        """
+        层流火焰速度
+        :param unburned: 未燃区反应器或其状态快照, 传入反应器时每次调用自行刷新快照
+        :return: 层流火焰速度 [m/s]
+        """
+        state, owned = as_reactor_state(unburned)  # 快照与组分索引只属于本次返回的函数, 策略本身不保存
+        marker_index = None if self.marker is None else state.track_species(self.marker)  # 标记组分索引
+        # 第二燃料组分索引
+        secondary_index = None if self.secondary_fuel is None else state.track_species(self.secondary_fuel)
+
+        def func(time: float) -> float:
+            if owned:
+                state.refresh()
+            phi = state.equivalence_ratio()
+            t_u = state.T
+            p = state.P
+            y_dil = 0. if marker_index is None else \
+                state.mass_fraction(marker_index) / float(interp(phi, self._marker_phi, self._marker_fraction))
+            alpha = 0. if secondary_index is None else state.mole_fraction(secondary_index)
+            if self.diagnostics is not None:
+                self.diagnostics.check(phi, t_u, p, y_dil, alpha)
+            return max(self._s_l(phi, t_u, p, y_dil, alpha), 0)
+
+        return func
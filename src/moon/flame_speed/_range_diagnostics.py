@@ -0,0 +1,137 @@
+# -*- coding:utf-8 -*-
+"""
+提供经验关联式适用范围的诊断工具: 以计数与极值包络记录越界情况, 按需汇总输出
+@Author: MoonCake Without Moon
+@Time: 2025/7/10
+"""
+__all__ = ['RangeDiagnostics', 'ParameterRangeInfo']
+
+import threading
+from typing import NamedTuple
+
+from loguru import logger
+
+
+class ParameterRangeInfo(NamedTuple):
+    """单个参数的范围诊断信息"""
+    name: str  # 参数名
+    lower: float  # 适用范围下限
+    upper: float  # 适用范围上限
+    unit: str | None  # 单位
+    evaluations: int  # 检查次数
+    below: int  # 低于下限的次数
+    above: int  # 高于上限的次数
+    minimum: float  # 观测到的最小值
+    maximum: float  # 观测到的最大值
+
+    @property
+    def out_of_range(self) -> int:
+        """越界次数"""
+        return self.below + self.above
+
+
+class RangeDiagnostics:
+    """
+    关联式适用范围诊断
+
+        每次检查只做比较与计数, 并更新各参数的观测极值, 不输出日志;
+        由 report() 在一次运行或一个循环结束时 (例如 TwoZoneModel.report_ranges()) 汇总为一行日志。
+        火焰速度策略可被多个线程中的仿真共用, 计数与极值的更新在锁内进行, 汇总结果是精确的合计
+    """
+
+    def __init__(self, ranges: dict[str, dict]):
+        """
+        关联式适用范围诊断
+        :param ranges: {参数名: {'range': (下限, 上限), 'unit': 单位}},
+                       与 MethanolHydrogenFlameSpeed.data_ranges 格式相同, 检查时参数值按此字典的顺序给出
+        """
+        self.ranges = ranges  # 适用范围
+        self._names = tuple(ranges.keys())  # 参数名
+        self._bounds = tuple((float(item['range'][0]), float(item['range'][1])) for item in ranges.values())  # 上下限
+        n = len(self._names)
+        self._evaluations = 0  # 检查次数
+        self._below = [0] * n  # 低于下限的次数
+        self._above = [0] * n  # 高于上限的次数
+        self._minimum = [float('inf')] * n  # 观测最小值
+        self._maximum = [-float('inf')] * n  # 观测最大值
+        self._lock = threading.Lock()  # 保护计数与极值
+
+    def check(self, *values: float) -> bool:
+        """
+        检查一组参数值
+        :param values: 参数值, 顺序与 ranges 一致
+        :return: 是否全部在范围内
+        """
+        inside = True
+        with self._lock:
+            self._evaluations += 1
+            minimum = self._minimum
+            maximum = self._maximum
+            for i, (value, (lower, upper)) in enumerate(zip(values, self._bounds)):
+                if value < minimum[i]:
+                    minimum[i] = value
+                if value > maximum[i]:
+                    maximum[i] = value
+                if value < lower:
+                    self._below[i] += 1
+                elif value > upper:
+                    self._above[i] += 1
+                else:
+                    continue
+                inside = False
+        return inside
+
+    def summary(self) -> list[ParameterRangeInfo]:
+        """
+        范围诊断汇总
+        :return: 各参数的诊断信息
+        """
+        with self._lock:
+            return self._summary()
+
+    def _summary(self) -> list[ParameterRangeInfo]:
+        """
+        范围诊断汇总 (调用方持有锁)
+        :return: 各参数的诊断信息
+        """
+        return [ParameterRangeInfo(name, lower, upper, item.get('unit'), self._evaluations,
+                                   self._below[i], self._above[i], self._minimum[i], self._maximum[i])
+                for i, (name, (lower, upper), item) in enumerate(zip(self._names, self._bounds,
+                                                                     self.ranges.values()))]
+
+    def report(self, reset: bool = True) -> list[ParameterRangeInfo]:
+        """
+        输出一行汇总日志 (仅在存在越界时), 用于一次运行或一个循环结束时
+        :param reset: 输出后是否清零
+        :return: 各参数的诊断信息
+        """
+        with self._lock:
+            summary = self._summary()
+            if reset:
+                self._reset()
+        out = [info for info in summary if info.out_of_range]
+        if out:
+            details = '; '.join(
+                f'{info.name}: {info.out_of_range}/{info.evaluations} out of [{info.lower:g}, {info.upper:g}], '
+                f'observed [{info.minimum:.6g}, {info.maximum:.6g}]' + (f' {info.unit}' if info.unit else '')
+                for info in out)
+            logger.warning(f'correlation range summary: {details}')
+        return summary
+
+    def reset(self) -> None:
+        """
+        清零计数与极值
+        """
+        with self._lock:
+            self._reset()
+
+    def _reset(self) -> None:
+        """
+        清零计数与极值 (调用方持有锁)
+        """
+        n = len(self._names)
+        self._evaluations = 0
+        self._below = [0] * n
+        self._above = [0] * n
+        self._minimum = [float('inf')] * n
+        self._maximum = [-float('inf')] * n
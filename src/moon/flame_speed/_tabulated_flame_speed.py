@@ -0,0 +1,250 @@
+# -*- coding:utf-8 -*-
+"""
+提供基于预计算数据表的层流火焰速度计算方法, 数据表由 moon.tools.flame_speed_table 用 Cantera FreeFlame 生成
+@Author: MoonCake Without Moon
+@Time: 2025/7/11
+"""
+__all__ = ['FlameSpeedTable', 'TabulatedFlameSpeed']
+
+import pathlib
+from dataclasses import dataclass
+from math import log
+from typing import Callable
+
+from cantera import IdealGasReactor
+from loguru import logger
+from numpy import ndarray, asarray, load, savez_compressed, searchsorted, clip, log as np_log, zeros, \
+    broadcast_arrays, maximum, isnan, where
+
+from ._flame_speed import FlameSpeedBase
+from ._range_diagnostics import RangeDiagnostics
+from ..tools.reactor_state import ReactorState, as_reactor_state
+from ..tools.tabulation import locate
+
+FLAME_SPEED_TABLE_VERSION = 1  # 数据表文件格式版本
+
+
+@dataclass
+class FlameSpeedTable:
+    """
+    层流火焰速度数据表
+
+        speed 的形状为 (当量比, 未燃温度, 压力, 残余气体质量分数) 四个坐标轴的点数, FreeFlame 求解失败的点为 nan;
+        残余气体为同当量比混合气的平衡产物, 运行时以 marker 组分 (CO2 或 H2O) 的质量分数
+        与该当量比下残余气体中 marker 的质量分数之比得到残余气体质量分数
+    """
+    phi: ndarray  # 当量比坐标轴
+    temperature: ndarray  # 未燃温度坐标轴 [K]
+    pressure: ndarray  # 压力坐标轴 [Pa]
+    dilution: ndarray  # 残余气体质量分数坐标轴
+    speed: ndarray  # 层流火焰速度 [m/s]
+    marker: str  # 残余气体标记组分
+    marker_fraction: ndarray  # 各当量比下残余气体中标记组分的质量分数
+    mechanism: str = ''  # 反应机理
+    fuel: str = ''  # 燃料组成
+    oxidizer: str = ''  # 氧化剂组成
+
+    def __post_init__(self):
+        shape = (len(self.phi), len(self.temperature), len(self.pressure), len(self.dilution))
+        if self.speed.shape != shape:
+            raise ValueError(f'speed must have shape {shape}, got {self.speed.shape}')
+        if len(self.marker_fraction) != len(self.phi):
+            raise ValueError('marker_fraction must have the same length as phi')
+
+    def save(self, path: str | pathlib.Path) -> None:
+        """
+        保存为压缩的 .npz 文件
+        :param path: 文件路径
+        """
+        savez_compressed(path, version=FLAME_SPEED_TABLE_VERSION, phi=self.phi, temperature=self.temperature,
+                         pressure=self.pressure, dilution=self.dilution, speed=self.speed, marker=self.marker,
+                         marker_fraction=self.marker_fraction, mechanism=self.mechanism, fuel=self.fuel,
+                         oxidizer=self.oxidizer)
+
+    @classmethod
+    def load(cls, path: str | pathlib.Path) -> 'FlameSpeedTable':
+        """
+        读取 .npz 文件
+        :param path: 文件路径
+        :return: 层流火焰速度数据表
+        """
+        with load(path, allow_pickle=False) as data:
+            if int(data['version']) != FLAME_SPEED_TABLE_VERSION:
+                raise ValueError(f'unsupported flame speed table version {int(data["version"])}')
+            return cls(phi=data['phi'], temperature=data['temperature'], pressure=data['pressure'],
+                       dilution=data['dilution'], speed=data['speed'], marker=str(data['marker']),
+                       marker_fraction=data['marker_fraction'], mechanism=str(data['mechanism']),
+                       fuel=str(data['fuel']), oxidizer=str(data['oxidizer']))
+
+
+def _fill_failed(speed: ndarray) -> ndarray:
+    """
+    以相邻节点补齐求解失败 (nan) 的点: 每一轮把与有效节点相邻的失败点设为各坐标轴方向上相邻有效节点的平均值,
+    直到没有失败点
+    :param speed: 层流火焰速度数据
+    :return: 补齐后的数据 (副本)
+    """
+    speed = speed.astype(float)
+    failed = isnan(speed)
+    if failed.all():
+        raise ValueError('all points of the flame speed table failed')
+    while failed.any():
+        valid = where(failed, 0., speed)
+        total = zeros(speed.shape)  # 相邻有效节点之和
+        count = zeros(speed.shape)  # 相邻有效节点数
+        for axis, n in enumerate(speed.shape):
+            lower = tuple(slice(0, n - 1) if k == axis else slice(None) for k in range(speed.ndim))
+            upper = tuple(slice(1, n) if k == axis else slice(None) for k in range(speed.ndim))
+            total[upper] += valid[lower]
+            count[upper] += ~failed[lower]
+            total[lower] += valid[upper]
+            count[lower] += ~failed[upper]
+        filled = failed & (count > 0)
+        speed[filled] = total[filled] / count[filled]
+        failed &= ~filled
+    return speed
+
+
+class TabulatedFlameSpeed(FlameSpeedBase):
+    """
+    基于数据表的层流火焰速度
+
+        在 (当量比, 未燃温度, ln(压力), 残余气体质量分数) 上做四线性插值, 超出数据表范围时取边界值,
+        越界情况由 diagnostics 汇总; 数据表中求解失败 (nan) 的点在构造时以相邻节点补齐, 数据表本身不变
+    """
+
+    def __init__(self, table: FlameSpeedTable | str | pathlib.Path, boundary_warning: bool = True):
+        """
+        基于数据表的层流火焰速度
+        :param table: 数据表或其文件路径
+        :param boundary_warning: 是否检查参数范围, 越界情况由 range_summary()、report_ranges() 汇总
+        """
+        super().__init__()
+        self.table = table if isinstance(table, FlameSpeedTable) else FlameSpeedTable.load(table)  # 数据表
+        table = self.table
+        self._data_ranges = {
+            'equivalence ratio': {'range': (float(table.phi[0]), float(table.phi[-1])), 'unit': None},
+            'unburned gas temperature': {'range': (float(table.temperature[0]), float(table.temperature[-1])),
+                                         'unit': 'K'},
+            'pressure': {'range': (float(table.pressure[0]), float(table.pressure[-1])), 'unit': 'Pa'},
+            'residual gas mass fraction': {'range': (float(table.dilution[0]), float(table.dilution[-1])),
+                                           'unit': None}
+        }  # 数据范围
+        self.diagnostics = RangeDiagnostics(self._data_ranges) if boundary_warning else None  # 适用范围诊断
+        # 标量插值用的纯 Python 坐标轴与数据
+        self._phi = table.phi.tolist()
+        self._temperature = table.temperature.tolist()
+        self._log_pressure = np_log(table.pressure).tolist()
+        self._dilution = table.dilution.tolist()
+        self._marker_fraction = table.marker_fraction.tolist()
+        failed = int(isnan(table.speed).sum())
+        if failed:
+            logger.info(f'flame speed table: {failed} failed points filled from their neighbours')
+        self._filled_speed = _fill_failed(table.speed)  # 补齐失败点后的数据
+        self._speed = self._filled_speed.tolist()
+
+    def laminar_flame_speed(self, unburned: IdealGasReactor | ReactorState) -> Callable[[float], float]:
+        """
+        层流火焰速度
+        :param unburned: 未燃区反应器或其状态快照, 传入反应器时每次调用自行刷新快照
+        :return: 层流火焰速度 [m/s]
+        """
+        state, owned = as_reactor_state(unburned)  # 快照与组分索引只属于本次返回的函数, 策略本身不保存
+        marker_index = state.track_species(self.table.marker)  # 标记组分索引
+
+        def func(time: float) -> float:
+            if owned:
+                state.refresh()
+            phi = state.equivalence_ratio()
+            t_u = state.T
+            p = state.P
+            y_dil = state.mass_fraction(marker_index) / self._residual_marker(phi)
+            if self.diagnostics is not None:
+                self.diagnostics.check(phi, t_u, p, y_dil)
+            return self.speed(phi, t_u, p, y_dil)
+
+        return func
+
+    def _residual_marker(self, phi: float) -> float:
+        """
+        残余气体中标记组分的质量分数
+        :param phi: 当量比
+        :return: 质量分数
+        """
+        j, t = locate(self._phi, phi)
+        fractions = self._marker_fraction
+        if len(fractions) == 1:
+            return fractions[0]
+        return (1 - t) * fractions[j] + t * fractions[j + 1]
+
+    def speed(self, phi: float, t_u: float, p: float, y_dil: float) -> float:
+        """
+        标量四线性插值
+        :param phi: 当量比
+        :param t_u: 未燃气体温度 [K]
+        :param p: 压力 [Pa]
+        :param y_dil: 残余气体质量分数
+        :return: 层流火焰速度 [m/s]
+        """
+        locations = (locate(self._phi, phi), locate(self._temperature, t_u),
+                     locate(self._log_pressure, log(p)), locate(self._dilution, y_dil))
+        result = 0.
+        for corner in range(16):
+            weight = 1.
+            node = self._speed
+            for axis, (j, t) in enumerate(locations):
+                if corner >> axis & 1:
+                    if t == 0.:
+                        break
+                    weight *= t
+                    node = node[j + 1]
+                else:
+                    weight *= 1 - t
+                    node = node[j]
+            else:
+                result += weight * node
+        return result if result > 0 else 0.
+
+    def laminar_flame_speed_batch(self, phi: ndarray, t_u: ndarray, p: ndarray, y_dil: ndarray) -> ndarray:
+        """
+        批量四线性插值, 用于后处理, 不做范围检查
+        :param phi: 当量比
+        :param t_u: 未燃气体温度 [K]
+        :param p: 压力 [Pa]
+        :param y_dil: 残余气体质量分数
+        :return: 层流火焰速度 [m/s]
+        """
+        table = self.table
+        speed = self._filled_speed
+        values = broadcast_arrays(*(asarray(value, dtype=float) for value in (phi, t_u, np_log(p), y_dil)))
+        axes = (table.phi, table.temperature, np_log(table.pressure), table.dilution)
+        indices = []
+        weights = []
+        for axis, value in zip(axes, values):
+            if len(axis) == 1:
+                indices.append(zeros(value.shape, dtype=int))
+                weights.append(zeros(value.shape))
+                continue
+            j = clip(searchsorted(axis, value, side='right') - 1, 0, len(axis) - 2)
+            indices.append(j)
+            weights.append(clip((value - axis[j]) / (axis[j + 1] - axis[j]), 0, 1))
+        result = zeros(values[0].shape)
+        for corner in range(16):
+            weight = 1.
+            index = []
+            for axis, (j, t) in enumerate(zip(indices, weights)):
+                if corner >> axis & 1:
+                    weight = weight * t
+                    index.append(clip(j + 1, 0, speed.shape[axis] - 1))
+                else:
+                    weight = weight * (1 - t)
+                    index.append(j)
+            result = result + weight * speed[tuple(index)]
+        return maximum(result, 0)
+
+    @property
+    def data_ranges(self) -> dict:
+        """
+        数据范围
+        """
+        return self._data_ranges
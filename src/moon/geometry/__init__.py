@@ -5,3 +5,5 @@
 @Time: 2025/1/22
 """
 from ._engine_geometry import *
+from ._geometry_cache import *
+from ._chamber_geometry import *
@@ -0,0 +1,331 @@
+# -*- coding:utf-8 -*-
+"""
+提供非平顶燃烧室、偏置火花塞的双区几何计算工具, 基于预计算的几何数据表
+@Author: MoonCake Without Moon
+@Time: 2025/7/6
+"""
+__all__ = ['CombustionChamber', 'ChamberTwoZoneGeometry']
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from math import log as _log, sqrt as _sqrt, cbrt as _cbrt
+
+from numpy import (pi, sqrt, cbrt, arccos, cos, sin, linspace, geomspace, interp, gradient, array, asarray, ndarray,
+                   where, errstate, clip, maximum, minimum, newaxis, trapezoid, unique, concatenate, empty, argmax,
+                   ascontiguousarray)
+
+from ._engine_geometry import SITwoZoneGeometry, FlameGeometry
+from ..tools.disk_cache import DiskCache
+
+
+@dataclass(frozen=True)
+class CombustionChamber:
+    """
+    燃烧室描述, 包括轴对称的活塞凹坑型线与火花塞位置
+
+        凹坑型线为活塞顶平面以下的深度关于半径的分段线性函数, 型线以外的部分为平面;
+        型线须为单值函数, 即不考虑缩口 (re-entrant) 凹坑的倒扣部分
+    """
+    bowl_radii: tuple[float, ...] = ()  # 凹坑型线的径向坐标 [m], 递增
+    bowl_depths: tuple[float, ...] = ()  # 凹坑型线的深度 (活塞顶平面以下为正) [m]
+    spark_offset: float = 0.  # 火花塞相对气缸轴线的径向偏置 [m]
+    spark_depth: float = 0.  # 火花塞点火位置到缸盖的距离 [m]
+
+    def __post_init__(self):
+        if len(self.bowl_radii) != len(self.bowl_depths):
+            raise ValueError('bowl_radii and bowl_depths must have the same length')
+        if any(r_1 <= r_0 for r_0, r_1 in zip(self.bowl_radii, self.bowl_radii[1:])):
+            raise ValueError('bowl_radii must be increasing')
+        if any(depth < 0 for depth in self.bowl_depths):
+            raise ValueError('bowl_depths cannot be negative')
+        if self.spark_offset < 0 or self.spark_depth < 0:
+            raise ValueError('spark_offset and spark_depth cannot be negative')
+
+    def bowl_depth(self, radius: float | ndarray) -> float | ndarray:
+        """
+        凹坑深度
+        :param radius: 径向坐标 [m]
+        :return: 活塞顶平面以下的深度 [m]
+        """
+        if len(self.bowl_radii) == 0:
+            return radius * 0.
+        return interp(radius, self.bowl_radii, self.bowl_depths, right=0.)
+
+    def bowl_volume(self, bore: float) -> float:
+        """
+        凹坑容积
+        :param bore: 缸径 [m]
+        :return: 凹坑容积 [m**3]
+        """
+        radius = linspace(0, bore / 2, 2001)
+        return float(trapezoid(2 * pi * radius * self.bowl_depth(radius), radius))
+
+    @property
+    def max_bowl_depth(self) -> float:
+        """最大凹坑深度 [m]"""
+        return max(self.bowl_depths, default=0.)
+
+
+class ChamberTwoZoneGeometry(SITwoZoneGeometry):
+    """
+    非平顶燃烧室、偏置火花塞的双区几何计算工具, 接口与 SITwoZoneGeometry 相同
+
+        在 (活塞位置, 火花塞为球心的火焰半径) 网格上, 以缸径圆面上的极坐标求积与轴向精确积分预计算
+        已燃区体积、与缸盖/缸壁/活塞的接触面积, 火焰面积在火焰球面上按等面积网格求积;
+        各活塞位置的数据行在进程池中并行计算, 可写入磁盘缓存。数据表在构造时计算, 运行时只做查表与双线性插值。
+    """
+
+    def __init__(self,
+                 speed: float,
+                 stroke: float,
+                 epsilon: float,
+                 bore: float,
+                 crank_rod_ratio: float,
+                 chamber: CombustionChamber = CombustionChamber(),
+                 cache_resolution: float | None = None,
+                 cache_angles: ndarray | None = None,
+                 cache_size: int = 0,
+                 table_shape: tuple[int, int] = (60, 240),
+                 quadrature: tuple[int, int] = (64, 64),
+                 workers: int | None = None,
+                 table_cache: DiskCache | None = None):
+        """
+        非平顶燃烧室、偏置火花塞的双区几何
+        :param speed: 转速 [r/s]
+        :param stroke: 冲程 [m]
+        :param epsilon: 压缩比 (包含凹坑容积)
+        :param bore: 缸径 [m]
+        :param crank_rod_ratio: 曲柄连杆比
+        :param chamber: 燃烧室描述
+        :param cache_resolution: 几何缓存的曲轴转角量化分辨率 [rad], 为 None 时以精确转角为键
+        :param cache_angles: 几何缓存的预设曲轴转角表 [rad], 设置后 cache_resolution 无效
+        :param cache_size: 几何缓存的最大条目数, 为 0 时不缓存
+        :param table_shape: 几何数据表的尺寸 (活塞位置点数, 火焰半径点数), 火焰半径点数同时为体积坐标点数
+        :param quadrature: 缸径圆面上的求积点数 (径向, 周向)
+        :param workers: 计算数据表的进程数, 为 None 时使用全部 CPU, 为 1 时在当前进程中计算
+        :param table_cache: 几何数据表的磁盘缓存, 为 None 时每个实例重新计算
+        """
+        super().__init__(speed, stroke, epsilon, bore, crank_rod_ratio,
+                         cache_resolution, cache_angles, cache_size, table_cache=table_cache)
+        if min(table_shape) < 2 or min(quadrature) < 1:
+            raise ValueError('table_shape must be at least (2, 2) and quadrature at least (1, 1)')
+        self.chamber = chamber  # 燃烧室描述
+        self.table_shape = table_shape  # 几何数据表尺寸
+        self.quadrature = quadrature  # 求积点数
+        self.workers = workers  # 计算数据表的进程数
+        # 压缩比包含凹坑容积, 据此修正余隙高度
+        self.bowl_volume = chamber.bowl_volume(bore)  # 凹坑容积 [m**3]
+        self.tdc_gap = (self.tdc_volume - self.bowl_volume) / self.area_bore  # 余隙高度 [m]
+        if self.tdc_gap <= chamber.spark_depth:
+            raise ValueError('the bowl is too large for the compression ratio, or the spark plug is below the '
+                             'piston crown at TDC')
+        if chamber.spark_offset >= bore / 2:
+            raise ValueError('spark_offset must be smaller than the bore radius')
+        radius = linspace(0, bore / 2, 2001)
+        depth = chamber.bowl_depth(radius)
+        slope = gradient(depth, radius)
+        self._piston_total_area = float(trapezoid(2 * pi * radius * sqrt(1 + slope ** 2), radius))  # 活塞顶面积
+        self._radius_grid = self._build_radius_grid()  # 几何数据表的火焰半径网格 [m]
+        self._chamber_table: ndarray | None = None  # 几何数据表, 形状为 (活塞位置点数, 体积坐标点数, 5)
+        self._h_scale = 0.  # 余隙高度对数到数据表行号的比例
+        self.build_table()
+
+    def _r_max(self, h_gap: float | ndarray) -> float | ndarray:
+        """
+        火花塞到燃烧室内最远点的距离
+        :param h_gap: 活塞顶平面到缸盖的距离 [m]
+        :return: 最大火焰半径 [m]
+        """
+        chamber = self.chamber
+        depth = maximum(chamber.spark_depth, h_gap + chamber.max_bowl_depth - chamber.spark_depth)
+        return sqrt((self.bore / 2 + chamber.spark_offset) ** 2 + depth ** 2)
+
+    def _build_radius_grid(self) -> list[float]:
+        """
+        几何数据表的火焰半径网格: 在等距网格上插入火焰触及缸盖、缸壁等与活塞位置无关的几何突变点,
+        这些位置上各几何量的导数不连续 (触及缸壁时为平方根奇异), 使其落在网格节点上可避免插值跨越突变
+        :return: 递增的火焰半径网格 [m]
+        """
+        radius = self.bore / 2
+        d = self.chamber.spark_offset
+        z_s = self.chamber.spark_depth
+        r_max = float(self._r_max(self.tdc_gap + self.stroke))
+        kinks = array([z_s, radius - d, radius + d,
+                       sqrt((radius - d) ** 2 + z_s ** 2), sqrt((radius + d) ** 2 + z_s ** 2)])
+        kinks = kinks[(kinks > 0) & (kinks < r_max)]
+        return unique(concatenate([linspace(0, r_max, self.table_shape[1]), kinks])).tolist()
+
+    def build_table(self) -> None:
+        """
+        计算 (或从磁盘缓存读取) 几何数据表, 构造时调用; 数据表只依赖几何参数, 不在积分过程中计算
+        """
+        if self.table_cache is None:
+            table = self._compute_table()
+        else:
+            params = {
+                'bore': self.bore, 'stroke': self.stroke, 'epsilon': self.epsilon,
+                'crank_rod_ratio': self.crank_rod_ratio, 'chamber': asdict(self.chamber),
+                'shape': list(self.table_shape), 'quadrature': list(self.quadrature),
+                'layout': 'log_gap-volume_coordinate'
+            }
+            table = self.table_cache.get_or_create('chamber_geometry', params, self._compute_table)
+        # 查表时按 [活塞位置, 体积坐标] 取出 5 个几何量组成的向量
+        self._chamber_table = ascontiguousarray(asarray(table, dtype=float).transpose(1, 2, 0))
+        self._h_scale = (self.table_shape[0] - 1) / _log(1 + self.stroke / self.tdc_gap)
+
+    def _compute_table(self) -> ndarray:
+        """
+        计算几何数据表: 活塞位置按余隙高度等比分布 (上止点附近加密), 各行先在火焰半径网格上求积,
+        再重采样到均匀的体积坐标网格上, 见 _volume_coordinate
+        :return: 形状为 (5, 活塞位置点数, 火焰半径点数) 的数组, 依次为
+                 火焰半径、火焰面积、已燃区与缸盖、缸壁、活塞的接触面积
+        """
+        n_h, n_y = self.table_shape
+        h_gaps = geomspace(self.tdc_gap, self.tdc_gap + self.stroke, n_h)
+        r_grid = array(self._radius_grid)
+        tasks = [(h_gap, r_grid, self.bore, self.chamber, self.quadrature) for h_gap in h_gaps]
+        workers = os.cpu_count() if self.workers is None else self.workers
+        if workers <= 1:
+            rows = [_chamber_table_row(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, n_h)) as executor:
+                rows = list(executor.map(_chamber_table_row, tasks))
+        y_grid = linspace(0, 1, n_y)
+        table = empty((5, n_h, n_y))
+        for i, (fraction, *fields) in enumerate(rows):
+            # 只保留到已燃体积百分比首次达到 1 的节点, 其后的网格点对应同一体积坐标
+            n = int(argmax(fraction >= 1)) + 1
+            y = _volume_coordinate(fraction[:n])
+            for k, field in enumerate((r_grid, *fields)):
+                table[k, i] = interp(y_grid, y, field[:n])
+        return table
+
+    def _flame_geometry(self, h_gap: float, volume: float, burned_volume_percentage: float) -> FlameGeometry:
+        """
+        由几何数据表双线性插值构建双区几何快照
+        :param h_gap: 活塞顶平面到缸盖的距离 [m]
+        :param volume: 气缸容积 [m**3]
+        :param burned_volume_percentage: 已燃体积百分比
+        :return: 双区几何快照
+        """
+        table = self._chamber_table
+        n_h, n_y = self.table_shape
+        x = _log(h_gap / self.tdc_gap) * self._h_scale if h_gap > self.tdc_gap else 0.
+        i = int(x)
+        i = n_h - 2 if i > n_h - 2 else i
+        x -= i
+        x = 1. if x > 1 else x
+        f = burned_volume_percentage
+        f = 0. if f < 0 else 1. if f > 1 else f
+        y = (_cbrt(f) + 1 - _sqrt(1 - f)) / 2 * (n_y - 1)
+        j = int(y)
+        j = n_y - 2 if j > n_y - 2 else j
+        y -= j
+        # 相邻 4 个节点上的 5 个几何量一次加权求和
+        weights = array(((1 - x) * (1 - y), (1 - x) * y, x * (1 - y), x * y))
+        flame_radius, flame_area, burned_cover_area, burned_wall_area, burned_piston_area = (
+            weights @ table[i:i + 2, j:j + 2].reshape(4, 5)).tolist()
+        area_bore = self.area_bore
+        return FlameGeometry(
+            h_gap=h_gap,
+            cylinder_volume=volume,
+            flame_radius=flame_radius,
+            flame_area=flame_area,
+            burned_cover_area=burned_cover_area,
+            burned_wall_area=burned_wall_area,
+            burned_piston_area=burned_piston_area,
+            unburned_cover_area=area_bore - burned_cover_area,
+            unburned_wall_area=h_gap * pi * self.bore - burned_wall_area,
+            unburned_piston_area=self._piston_total_area - burned_piston_area
+        )
+
+    def flame_radius(self, time: float, burned_volume_percentage: float) -> float:
+        """
+        火焰半径 (以火花塞为球心)
+        :param time: 时间 [s]
+        :param burned_volume_percentage: 已燃体积百分比 (已燃体积 / 当前气缸总体积)
+        :return: 火焰半径 [m]
+        """
+        return self.flame_geometry(time, burned_volume_percentage).flame_radius
+
+
+def _volume_coordinate(fraction: ndarray) -> ndarray:
+    """
+    数据表的体积坐标: 火焰较小时已燃体积约与半径立方成正比, 火焰触及缸壁后未燃体积约与剩余距离的平方根相关,
+    取 (f**(1/3) + 1 - (1-f)**(1/2)) / 2 使两端的几何量关于坐标近似线性
+    :param fraction: 已燃体积百分比
+    :return: [0, 1] 上单调递增的体积坐标
+    """
+    return (cbrt(fraction) + 1 - sqrt(1 - fraction)) / 2
+
+
+def _lens_area(a: ndarray, radius: float, offset: float) -> ndarray:
+    """
+    半径为 a 的圆与半径为 radius 的圆的相交面积, 两圆心距离为 offset
+    :param a: 圆半径 (数组)
+    :param radius: 另一圆半径
+    :param offset: 两圆心距离
+    :return: 相交面积
+    """
+    a = asarray(a, dtype=float)
+    d = offset
+    with errstate(divide='ignore', invalid='ignore'):
+        lens = (a ** 2 * arccos(clip((d ** 2 + a ** 2 - radius ** 2) / (2 * d * a), -1, 1)) +
+                radius ** 2 * arccos(clip((d ** 2 + radius ** 2 - a ** 2) / (2 * d * radius), -1, 1)) -
+                0.5 * sqrt(maximum((-d + a + radius) * (d + a - radius) * (d - a + radius) * (d + a + radius), 0)))
+    return where(a + d <= radius, pi * a ** 2, where(a >= radius + d, pi * radius ** 2, lens))
+
+
+def _chamber_table_row(task: tuple) -> ndarray:
+    """
+    计算一个活塞位置下的几何数据 (进程池任务, 须为模块级函数)
+    :param task: (活塞顶平面到缸盖的距离 [m], 火焰半径网格 [m], 缸径 [m], 燃烧室描述, 求积点数)
+    :return: 形状为 (5, 火焰半径网格点数) 的数组, 含义见 ChamberTwoZoneGeometry._compute_table
+    """
+    h_gap, r_grid, bore, chamber, (n_rho, n_theta) = task
+    radius = bore / 2
+    d = chamber.spark_offset
+    z_s = chamber.spark_depth
+    r_f = r_grid[:, newaxis, newaxis]
+    # 半圆面上的中点极坐标求积 (火花塞偏置方向为对称轴), 权重乘 2 计入另一半
+    rho = (linspace(0, radius, n_rho + 1)[:-1] + radius / n_rho / 2)[:, newaxis]
+    theta = (linspace(0, pi, n_theta + 1)[:-1] + pi / n_theta / 2)[newaxis, :]
+    weight = 2 * rho * (radius / n_rho) * (pi / n_theta)
+    distance_sq = rho ** 2 + d ** 2 - 2 * rho * d * cos(theta)  # 到火花塞的水平距离平方
+    z_piston = h_gap + chamber.bowl_depth(rho)  # 活塞表面到缸盖的距离
+    slope = gradient(chamber.bowl_depth(rho[:, 0]), rho[:, 0])[:, newaxis] if n_rho > 1 else 0 * rho
+    # 已燃区体积: 每个求积点上沿轴向精确积分球内且燃烧室内的长度
+    half = sqrt(maximum(r_f ** 2 - distance_sq, 0))
+    length = clip(minimum(z_s + half, z_piston) - maximum(z_s - half, 0), 0, None)
+    v_f = (weight * length).sum(axis=(1, 2))
+    v_total = (weight * z_piston).sum() * n_theta
+    fraction = maximum.accumulate(clip(v_f / v_total, 0, 1))
+    fraction[-1] = 1.
+    # 火焰面积: 在球面上按等面积网格 (极角余弦与方位角等距) 求积位于燃烧室内的部分;
+    # 在单元边界上计算到燃烧室边界的有符号距离, 以线性插值的零点确定单元内位于燃烧室内的比例
+    u = linspace(-1, 1, 2 * n_rho + 1)[:, newaxis]
+    psi = theta
+    sin_phi = sqrt(1 - u ** 2)
+    x = d + r_f * sin_phi * cos(psi)
+    y = r_f * sin_phi * sin(psi)
+    z = z_s + r_f * u
+    rho_sphere = sqrt(x ** 2 + y ** 2)
+    level = minimum(minimum(radius - rho_sphere, z), h_gap + chamber.bowl_depth(rho_sphere) - z)
+    g_0, g_1 = level[:, :-1], level[:, 1:]
+    with errstate(divide='ignore', invalid='ignore'):
+        inside_sphere = where((g_0 >= 0) & (g_1 >= 0), 1., where((g_0 < 0) & (g_1 < 0), 0.,
+                              maximum(g_0, g_1) / abs(g_1 - g_0)))
+    flame_area = 4 * pi * r_f[:, 0, 0] ** 2 * inside_sphere.mean(axis=(1, 2))
+    # 缸盖: 火焰球与缸盖平面的交线为圆, 与缸径圆求相交面积
+    cover = _lens_area(sqrt(maximum(r_f[:, 0, 0] ** 2 - z_s ** 2, 0)), radius, d)
+    # 活塞: 求积点处的活塞表面位于球内的面积
+    inside = distance_sq + (z_piston - z_s) ** 2 <= r_f ** 2
+    piston = (weight * sqrt(1 + slope ** 2) * inside).sum(axis=(1, 2))
+    # 缸壁: 沿周向求积, 轴向精确积分
+    theta_wall = theta[0]
+    wall_distance_sq = radius ** 2 + d ** 2 - 2 * radius * d * cos(theta_wall)
+    half_wall = sqrt(maximum(r_f[:, 0, :] ** 2 - wall_distance_sq, 0))
+    wall_length = clip(minimum(z_s + half_wall, h_gap) - maximum(z_s - half_wall, 0), 0, None)
+    wall = (2 * radius * (pi / n_theta) * wall_length).sum(axis=1)
+    return array([fraction, flame_area, cover, wall, piston])
@@ -4,19 +4,29 @@
 @Author: MoonCake Without Moon
 @Time: 2025/1/23
 """
-__all__ = ['EngineGeometry', 'SITwoZoneGeometry']
+__all__ = ['EngineGeometry', 'SITwoZoneGeometry', 'FlameGeometry']
 
-from functools import lru_cache
+import math
+from dataclasses import dataclass
+from math import log, sqrt as _sqrt, cbrt as _cbrt
 
-from numpy import pi, remainder, cos, sin, sqrt, linspace, concatenate
-from scipy.interpolate import CloughTocher2DInterpolator
+from numpy import (pi, remainder, cos, sin, sqrt, cbrt, linspace, geomspace, interp, array, ndarray, where,
+                   errstate, maximum, clip)
 
+from ._geometry_cache import GeometryCache, GeometryCacheInfo, cached_by_angle, _GEOMETRY_PARAMETERS
 from ..tools.decorators import add_log
+from ..tools.disk_cache import DiskCache
 
 
 class EngineGeometry:
     """
     提供发动机几何计算工具, 例如曲轴转角、活塞速度等
+
+        运动学方法与容积属性均由 numpy 通用函数构成, 时间参数既可以是标量也可以是 numpy 数组,
+        几何参数 (转速、冲程等) 同样可以是数组, 按 numpy 广播规则一次性完成整条曲线或整组方案的计算;
+        时间与几何参数均为标量时改用 math 模块计算, 避免 numpy 通用函数处理标量的开销。
+        几何缓存默认关闭: 自适应积分器的时间点几乎不重复, 以精确转角为键时命中率很低,
+        需要时设置 cache_size 并配合 cache_resolution 或 cache_angles 使用。修改几何参数会清空几何缓存
     """
 
     def __init__(self,
@@ -25,62 +35,121 @@ class EngineGeometry:
                  epsilon: float,
                  bore: float,
                  crank_rod_ratio: float,
-                 tdc_gap: float):
+                 tdc_gap: float,
+                 cache_resolution: float | None = None,
+                 cache_angles: ndarray | None = None,
+                 cache_size: int = 0):
+        """
+        发动机几何
+        :param speed: 转速 [r/s]
+        :param stroke: 冲程 [m]
+        :param epsilon: 压缩比
+        :param bore: 缸径 [m]
+        :param crank_rod_ratio: 曲柄连杆比
+        :param tdc_gap: 余隙高度 [m]
+        :param cache_resolution: 几何缓存的曲轴转角量化分辨率 [rad], 为 None 时以精确转角为键
+        :param cache_angles: 几何缓存的预设曲轴转角表 [rad], 设置后 cache_resolution 无效
+        :param cache_size: 几何缓存的最大条目数, 为 0 时不缓存
+        """
+        self._use_cache = False  # 是否经过几何缓存, 由 _refresh_parameters 更新
+        self._array_parameters = False  # 是否存在数组形式的几何参数, 由 _refresh_parameters 更新
         self.speed = speed  # 转速 [r/s]
         self.stroke = stroke  # 冲程 [m]
         self.epsilon = epsilon  # 压缩比
         self.bore = bore  # 缸径 [m]
         self.crank_rod_ratio = crank_rod_ratio  # 曲柄连杆比
         self.tdc_gap = tdc_gap  # 余隙高度 [m]
+        self._geometry_cache = GeometryCache(cache_resolution, cache_angles, cache_size)  # 几何缓存
+        self._refresh_parameters()
 
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in _GEOMETRY_PARAMETERS and '_geometry_cache' in self.__dict__:
+            self._refresh_parameters()
 
-    @lru_cache
-    def crank_angle(self, time: float) -> float:
+    def _refresh_parameters(self) -> None:
         """
-        曲轴转角
+        几何参数改变后清空几何缓存, 并重新判断是否存在数组参数 (只在参数改变时判断, 不在每次调用时判断)
+        """
+        self._array_parameters = any(isinstance(getattr(self, name, None), ndarray) for name in _GEOMETRY_PARAMETERS)
+        self._use_cache = self._geometry_cache.maxsize > 0 and not self._array_parameters
+        self._geometry_cache.cache_clear()
+
+    def _functions(self, time: float | ndarray) -> tuple:
+        """
+        选择计算用的函数: 时间与几何参数均为标量时使用 math 模块, 否则使用 numpy 通用函数
         :param time: 时间 [s]
+        :return: (cos, sin, sqrt)
+        """
+        if self._array_parameters or not isinstance(time, (float, int)):
+            return _ARRAY_FUNCTIONS
+        return _SCALAR_FUNCTIONS
+
+    def cache_info(self) -> GeometryCacheInfo:
+        """
+        几何缓存统计信息
+        :return: 命中次数、未命中次数、淘汰次数、最大条目数、当前条目数
+        """
+        return self._geometry_cache.cache_info()
+
+    def cache_clear(self) -> None:
+        """
+        清空几何缓存与统计信息
+        """
+        self._geometry_cache.cache_clear()
+
+    @cached_by_angle
+    def crank_angle(self, time: float | ndarray) -> float | ndarray:
+        """
+        曲轴转角
+        :param time: 时间 [s], 标量或数组
         :return: 曲轴转角 [rad]
         """
-        return remainder(2 * pi * self.speed * time, 4 * pi)
+        if self._array_parameters or not isinstance(time, (float, int)):
+            return remainder(2 * pi * self.speed * time, 4 * pi)
+        return (2 * pi * self.speed * time) % (4 * pi)
 
-    @lru_cache
-    def piston_position(self, time: float) -> float:
+    @cached_by_angle
+    def piston_position(self, time: float | ndarray) -> float | ndarray:
         """
         活塞位置
-        :param time: 时间 [s]
+        :param time: 时间 [s], 标量或数组
         :return: 活塞位置 (以缸盖为0点, 向下为正) [m]
         """
-        angle = self.crank_angle(time)
+        cos, sin, sqrt = self._functions(time)
+        angle = 2 * pi * self.speed * time  # 曲轴转角 [rad] (正弦、余弦以 2pi 为周期, 不必取余)
         return (self.stroke / 2 * ((1 + 1 / self.crank_rod_ratio) - cos(angle) - 1 / self.crank_rod_ratio *
                                    sqrt(1 - self.crank_rod_ratio ** 2 * sin(angle) ** 2)) + self.tdc_gap)
 
-    @lru_cache
-    def piston_velocity(self, time: float) -> float:
+    @cached_by_angle
+    def piston_velocity(self, time: float | ndarray) -> float | ndarray:
         """
         活塞速度
-        :param time: 时间 [s]
+        :param time: 时间 [s], 标量或数组
         :return: 活塞速度 (向下为正) [m/s]
         """
-        angle = self.crank_angle(time)
+        cos, sin, sqrt = self._functions(time)
+        angle = 2 * pi * self.speed * time  # 曲轴转角 [rad]
         return self.stroke * (self.crank_rod_ratio * sin(angle) * cos(angle) /
                               sqrt(-self.crank_rod_ratio ** 2 * sin(angle) ** 2 + 1)
                               + sin(angle)) * pi * self.speed
 
-    @lru_cache
-    def cylinder_volume(self, time: float) -> float:
+    @cached_by_angle
+    def cylinder_volume(self, time: float | ndarray) -> float | ndarray:
         """
         气缸容积
-        :param time: 时间 [s]
+        :param time: 时间 [s], 标量或数组
         :return: 气缸容积 [m**3]
         """
-        angle = self.crank_angle(time)
+        cos, sin, sqrt = self._functions(time)
+        angle = 2 * pi * self.speed * time  # 曲轴转角 [rad]
         return (pi * self.bore ** 2 / 4 *
                 (self.stroke / (self.epsilon - 1) + self.stroke / 2 *
                  ((1 + 1 / self.crank_rod_ratio) - cos(angle) - 1 / self.crank_rod_ratio *
                   sqrt(1 - self.crank_rod_ratio ** 2 * sin(angle) ** 2))))
 
     @property
-    def mean_piston_speed(self) -> float:
+    def mean_piston_speed(self) -> float | ndarray:
         """
         活塞平均速度
         :return: 活塞平均速度 [m/s]
@@ -88,7 +157,7 @@ class EngineGeometry:
         return self.speed * self.stroke * 2
 
     @property
-    def tdc_volume(self) -> float:
+    def tdc_volume(self) -> float | ndarray:
         """
         余隙容积
         :return: 余隙容积 [m**3]
@@ -96,7 +165,7 @@ class EngineGeometry:
         return pi * self.bore ** 2 / 4 * self.stroke / (self.epsilon - 1)
 
     @property
-    def working_volume(self) -> float:
+    def working_volume(self) -> float | ndarray:
         """
         工作容积, 即气缸排量
         :return: 工作容积 [m**3]
@@ -104,7 +173,7 @@ class EngineGeometry:
         return pi * self.bore ** 2 / 4 * self.stroke
 
     @property
-    def area_bore(self) -> float:
+    def area_bore(self) -> float | ndarray:
         """
         气缸圆的面积
         :return: 气缸圆的面积 [m**2]
@@ -112,6 +181,25 @@ class EngineGeometry:
         return pi * self.bore ** 2 / 4
 
 
+_SCALAR_FUNCTIONS = (math.cos, math.sin, math.sqrt)  # 标量计算用的函数
+_ARRAY_FUNCTIONS = (cos, sin, sqrt)  # 数组计算用的函数
+
+
+@dataclass(slots=True)
+class FlameGeometry:
+    """双区几何快照, 同一时刻、同一已燃体积百分比下由一次火焰半径求解得到的全部几何量"""
+    h_gap: float  # 活塞顶到缸盖的距离 [m]
+    cylinder_volume: float  # 气缸容积 [m**3]
+    flame_radius: float  # 火焰半径 [m]
+    flame_area: float  # 火焰面积 [m**2]
+    burned_cover_area: float  # 已燃区与缸盖接触的面积 [m**2]
+    burned_wall_area: float  # 已燃区与气缸壁接触的面积 [m**2]
+    burned_piston_area: float  # 已燃区与活塞顶端接触的面积 [m**2]
+    unburned_cover_area: float  # 未燃区与缸盖接触的面积 [m**2]
+    unburned_wall_area: float  # 未燃区与气缸壁接触的面积 [m**2]
+    unburned_piston_area: float  # 未燃区与活塞顶端接触的面积 [m**2]
+
+
 class SITwoZoneGeometry(EngineGeometry):
     """
     提供点燃式发动机双区域发动机几何计算工具, 适用于理想圆柱气缸 (活塞顶为平面), 除了基本的发动机几何外,
@@ -123,27 +211,129 @@ class SITwoZoneGeometry(EngineGeometry):
                  stroke: float,
                  epsilon: float,
                  bore: float,
-                 crank_rod_ratio: float):
+                 crank_rod_ratio: float,
+                 cache_resolution: float | None = None,
+                 cache_angles: ndarray | None = None,
+                 cache_size: int = 0,
+                 flame_table_shape: tuple[int, int] = (64, 128),
+                 flame_radius_tolerance: float = 1e-12,
+                 flame_radius_max_iter: int = 8,
+                 table_cache: DiskCache | None = None):
+        """
+        点燃式发动机双区几何
+        :param speed: 转速 [r/s]
+        :param stroke: 冲程 [m]
+        :param epsilon: 压缩比
+        :param bore: 缸径 [m]
+        :param crank_rod_ratio: 曲柄连杆比
+        :param cache_resolution: 几何缓存的曲轴转角量化分辨率 [rad], 为 None 时以精确转角为键
+        :param cache_angles: 几何缓存的预设曲轴转角表 [rad], 设置后 cache_resolution 无效
+        :param cache_size: 几何缓存的最大条目数, 为 0 时不缓存
+        :param flame_table_shape: 无量纲火焰半径反查表的尺寸 (无量纲活塞位置点数, 已燃体积坐标点数)
+        :param flame_radius_tolerance: 火焰半径牛顿迭代的收敛容差 (以已燃体积百分比计)
+        :param flame_radius_max_iter: 火焰半径牛顿迭代的最大次数
+        :param table_cache: 无量纲火焰半径反查表的磁盘缓存, 为 None 时每个进程计算一次
+        """
         tdc_gap = stroke / (epsilon - 1)  # 余隙高度 [m]
         super().__init__(
-            speed, stroke, epsilon, bore, crank_rod_ratio, tdc_gap
+            speed, stroke, epsilon, bore, crank_rod_ratio, tdc_gap,
+            cache_resolution, cache_angles, cache_size
+        )
+        if min(flame_table_shape) < 2:
+            raise ValueError('flame_table_shape must be at least (2, 2)')
+        self.flame_table_shape = flame_table_shape  # 火焰半径反查表尺寸
+        self.flame_radius_tolerance = flame_radius_tolerance  # 火焰半径收敛容差
+        self.flame_radius_max_iter = flame_radius_max_iter  # 火焰半径最大迭代次数
+        self.table_cache = table_cache  # 无量纲火焰半径反查表的磁盘缓存
+        self._flame_table: ndarray | None = None  # 无量纲火焰半径反查表 (各实例共享, 可为内存映射数组)
+        self._last_flame: tuple = (None, None, None)  # 最近一次的 (时间, 已燃区体积, 双区几何快照)
+
+    @cached_by_angle
+    def flame_geometry(self, time: float, burned_volume_percentage: float) -> FlameGeometry:
+        """
+        双区几何快照, 只求解一次火焰半径即得到火焰面积与各接触面积
+        :param time: 时间 [s]
+        :param burned_volume_percentage: 已燃体积百分比 (已燃体积 / 当前气缸总体积)
+        :return: 双区几何快照
+        """
+        h_gap = self.piston_position(time)
+        return self._flame_geometry(h_gap, self._gap_volume(h_gap), burned_volume_percentage)
+
+    def flame_geometry_by_volume(self, time: float, burned_volume: float) -> FlameGeometry:
+        """
+        以已燃区体积给出的双区几何快照, 供右端项计算使用: 气缸容积由活塞位置直接得到, 不再单独计算;
+        记住最近一次的输入与结果, 同一次右端项计算中卷吸策略与两区传热以相同的 (时间, 已燃区体积) 调用时直接复用
+        :param time: 时间 [s]
+        :param burned_volume: 已燃区体积 [m**3]
+        :return: 双区几何快照
+        """
+        last = self._last_flame
+        if last[0] == time and last[1] == burned_volume:
+            return last[2]
+        h_gap = self.piston_position(time)
+        volume = self._gap_volume(h_gap)
+        flame = self._flame_geometry(h_gap, volume, burned_volume / volume)
+        self._last_flame = (time, burned_volume, flame)  # 整体替换元组, 多线程读取时不会看到不一致的键值
+        return flame
+
+    def _gap_volume(self, h_gap: float) -> float:
+        """
+        由活塞位置计算气缸容积, 与 cylinder_volume 相同
+        :param h_gap: 活塞顶到缸盖的距离 [m]
+        :return: 气缸容积 [m**3]
+        """
+        return self.area_bore * (h_gap - self.tdc_gap) + self.tdc_volume
+
+    def _flame_geometry(self, h_gap: float, volume: float, burned_volume_percentage: float) -> FlameGeometry:
+        """
+        由活塞位置与气缸容积构建双区几何快照 (火焰面积等公式与 _alpha、_beta、_a_f 相同, 为减少调用开销在此展开)
+        :param h_gap: 活塞顶到缸盖的距离 [m]
+        :param volume: 气缸容积 [m**3]
+        :param burned_volume_percentage: 已燃体积百分比
+        :return: 双区几何快照
+        """
+        r_f = self._solve_flame_radius(h_gap, burned_volume_percentage)
+        bore = self.bore
+        radius = 0.5 * bore
+        area_bore = pi * radius * radius
+        r_sq = r_f * r_f
+        if r_f < radius:
+            burned_cover_area = pi * r_sq
+            burned_wall_area = 0.
+            alpha = 0.
+        else:
+            burned_cover_area = area_bore
+            burned_wall_area = _sqrt(r_sq - radius * radius) * pi * bore
+            alpha = _sqrt(1 - radius * radius / r_sq)
+        if r_f < h_gap:
+            burned_piston_area = 0.
+            beta = 1.
+        else:
+            burned_piston_area = (r_sq - h_gap * h_gap) * pi
+            beta = h_gap / r_f
+        return FlameGeometry(
+            h_gap=h_gap,
+            cylinder_volume=volume,
+            flame_radius=r_f,
+            flame_area=2 * pi * r_sq * (beta - alpha),
+            burned_cover_area=burned_cover_area,
+            burned_wall_area=burned_wall_area,
+            burned_piston_area=burned_piston_area,
+            unburned_cover_area=area_bore - burned_cover_area,
+            unburned_wall_area=h_gap * pi * bore - burned_wall_area,
+            unburned_piston_area=area_bore - burned_piston_area
         )
-        self._flame_radius_interpolator: CloughTocher2DInterpolator | None = None  # 火焰半径插值
 
-    @lru_cache
+    @cached_by_angle
     def flame_radius(self, time: float, burned_volume_percentage: float) -> float:
         """
-        火焰半径
+        火焰半径, 直接由活塞位置求解, 不计算各接触面积
         :param time: 时间 [s]
         :param burned_volume_percentage: 已燃体积百分比 (已燃体积 / 当前气缸总体积)
         :return: 火焰半径 [m]
         """
-        h_gap = self.piston_position(time)
-        if self._flame_radius_interpolator is None:
-            self._flame_radius_interpolator = self._interp()
-        return self._flame_radius_interpolator(h_gap, burned_volume_percentage)
+        return self._solve_flame_radius(self.piston_position(time), burned_volume_percentage)
 
-    @lru_cache
     def flame_area(self, time: float, burned_volume_percentage: float) -> float:
         """
         火焰面积
@@ -151,11 +341,8 @@ class SITwoZoneGeometry(EngineGeometry):
         :param burned_volume_percentage: 已燃体积百分比 (已燃体积 / 当前气缸总体积)
         :return: 火焰面积 [m**2]
         """
-        h_gap = self.piston_position(time)
-        r_f = self.flame_radius(time, burned_volume_percentage)
-        return self._a_f(r_f, self._alpha(r_f), self._beta(h_gap, r_f))
+        return self.flame_geometry(time, burned_volume_percentage).flame_area
 
-    @lru_cache
     def burned_cover_area(self, time: float, burned_volume_percentage: float) -> float:
         """
         已燃区与缸盖接触的面积
@@ -163,13 +350,8 @@ class SITwoZoneGeometry(EngineGeometry):
         :param burned_volume_percentage: 已燃体积百分比 (已燃体积 / 当前气缸总体积)
         :return: 已燃区与缸盖接触的面积 [m**2]
         """
-        r_f = self.flame_radius(time, burned_volume_percentage)
-        if r_f < self.bore / 2:
-            return pi * r_f ** 2
-        else:
-            return self.area_bore
+        return self.flame_geometry(time, burned_volume_percentage).burned_cover_area
 
-    @lru_cache
     def burned_wall_area(self, time: float, burned_volume_percentage: float) -> float:
         """
         已燃区与气缸壁接触的面积
@@ -177,13 +359,8 @@ class SITwoZoneGeometry(EngineGeometry):
         :param burned_volume_percentage: 已燃体积百分比 (已燃体积 / 当前气缸总体积)
         :return: 已燃区与气缸壁接触的面积 [m**2]
         """
-        r_f = self.flame_radius(time, burned_volume_percentage)
-        if r_f < self.bore / 2:
-            return 0
-        else:
-            return sqrt(r_f ** 2 - (self.bore / 2) ** 2) * pi * self.bore
+        return self.flame_geometry(time, burned_volume_percentage).burned_wall_area
 
-    @lru_cache
     def burned_piston_area(self, time: float, burned_volume_percentage: float) -> float:
         """
         已燃区与活塞顶端接触的面积
@@ -191,12 +368,7 @@ class SITwoZoneGeometry(EngineGeometry):
         :param burned_volume_percentage: 已燃体积百分比 (已燃体积 / 当前气缸总体积)
         :return: 已燃区与活塞顶端接触的面积 [m**2]
         """
-        r_f = self.flame_radius(time, burned_volume_percentage)
-        h_gap = self.piston_position(time)
-        if r_f < h_gap:
-            return 0
-        else:
-            return (r_f ** 2 - h_gap ** 2) * pi
+        return self.flame_geometry(time, burned_volume_percentage).burned_piston_area
 
     def unburned_cover_area(self, time: float, burned_volume_percentage: float) -> float:
         """
@@ -205,7 +377,7 @@ class SITwoZoneGeometry(EngineGeometry):
         :param burned_volume_percentage: 已燃体积百分比 (已燃体积 / 当前气缸总体积)
         :return: 未燃区与缸盖接触的面积 [m**2]
         """
-        return self.area_bore - self.burned_cover_area(time, burned_volume_percentage)
+        return self.flame_geometry(time, burned_volume_percentage).unburned_cover_area
 
     def unburned_wall_area(self, time: float, burned_volume_percentage: float) -> float:
         """
@@ -214,8 +386,7 @@ class SITwoZoneGeometry(EngineGeometry):
         :param burned_volume_percentage: 已燃体积百分比 (已燃体积 / 当前气缸总体积)
         :return: 未燃区与气缸壁接触的面积 [m**2]
         """
-        return (self.piston_position(time) * pi * self.bore -
-                self.burned_wall_area(time, burned_volume_percentage))
+        return self.flame_geometry(time, burned_volume_percentage).unburned_wall_area
 
     def unburned_piston_area(self, time: float, burned_volume_percentage: float) -> float:
         """
@@ -224,7 +395,7 @@ class SITwoZoneGeometry(EngineGeometry):
         :param burned_volume_percentage: 已燃体积百分比 (已燃体积 / 当前气缸总体积)
         :return: 未燃区与活塞顶端接触的面积 [m**2]
         """
-        return self.area_bore - self.burned_piston_area(time, burned_volume_percentage)
+        return self.flame_geometry(time, burned_volume_percentage).unburned_piston_area
 
     def _alpha(self, r_f: float) -> float:
         """
@@ -272,26 +443,114 @@ class SITwoZoneGeometry(EngineGeometry):
         """
         return self.area_bore * (2 * (2 * r_f / self.bore) ** 2 * (beta - alpha))
 
-    # @add_log('正在计算火焰面几何数据', '火焰面几何数据计算完成')
-    def _interp(self) -> CloughTocher2DInterpolator:
-        """
-        计算火焰半径插值
-        :return: 火焰半径插值 (h_gap, v_f_v)
-        """
-        v_f_v_interp = []  # 用于插值的已燃体积百分比
-        h_gap_interp = []  # 用于插值的气缸高度
-        r_f_interp = []  # 用于插值的火焰半径
-        h_gaps = linspace(self.tdc_gap, self.tdc_gap + self.stroke, 50)
-        for h_gap in h_gaps:
-            r_max = sqrt((self.bore / 2) ** 2 + h_gap ** 2)
-            # 缩小半径较小时的步长, 保证在火焰面积较小时有足够的解析度
-            r_f_s1 = linspace(0, self.bore / 10, 20)
-            r_f_s2 = linspace(self.bore / 10, r_max, 80)
-            r_f_s = concatenate((r_f_s1, r_f_s2))
-            for r_f in r_f_s:
-                alpha = self._alpha(r_f)
-                beta = self._beta(h_gap, r_f)
-                v_f_v_interp.append(self._v_f(r_f, alpha, beta) / (self.area_bore * h_gap))
-                h_gap_interp.append(h_gap)
-                r_f_interp.append(r_f)
-        return CloughTocher2DInterpolator(list(zip(h_gap_interp, v_f_v_interp)), r_f_interp)
+    def _solve_flame_radius(self, h_gap: float, burned_volume_percentage: float) -> float:
+        """
+        由已燃体积百分比反求火焰半径: 火焰未触及缸壁时直接使用解析反函数, 否则以无量纲反查表双线性插值作为初值,
+        再对解析的已燃区体积做牛顿迭代 (已燃区体积对火焰半径的导数即为火焰面积)
+        :param h_gap: 活塞顶到缸盖的距离 [m]
+        :param burned_volume_percentage: 已燃体积百分比 (已燃体积 / 当前气缸总体积)
+        :return: 火焰半径 [m]
+        """
+        # 以缸径的一半为长度单位
+        radius = 0.5 * self.bore
+        eta = h_gap / radius
+        rho_max = _sqrt(1 + eta * eta)
+        if burned_volume_percentage <= 0:
+            return 0.
+        if burned_volume_percentage >= 1:
+            return rho_max * radius
+        target = burned_volume_percentage * eta  # 已燃区体积 / (pi * radius ** 3)
+        # 火焰未触及缸壁 (rho <= 1) 时已燃区体积有解析反函数:
+        # 未触及活塞时为半球 (2 / 3 * rho ** 3), 触及活塞后为 eta * rho ** 2 - eta ** 3 / 3
+        rho = _cbrt(1.5 * target)
+        if rho <= 1 and rho <= eta:
+            return rho * radius
+        rho = _sqrt(target / eta + eta * eta / 3)
+        if eta <= rho <= 1:
+            return rho * radius
+        table = self._flame_table
+        if table is None:
+            table = self._flame_table = flame_table(self.flame_table_shape, self.table_cache)
+        node = table.item  # 标量查表, 直接返回 Python 浮点数
+        # 双线性插值 (为减少调用开销, 边界截断不使用 min/max)
+        n_eta, n_y = table.shape
+        x = (log(eta) - _LOG_ETA_MIN) * ((n_eta - 1) / (_LOG_ETA_MAX - _LOG_ETA_MIN))
+        x = 0. if x < 0 else x
+        y = (_cbrt(burned_volume_percentage) + 1 - _sqrt(1 - burned_volume_percentage)) * (0.5 * (n_y - 1))
+        i = int(x)
+        i = n_eta - 2 if i > n_eta - 2 else i
+        j = int(y)
+        j = n_y - 2 if j > n_y - 2 else j
+        x -= i
+        x = 1. if x > 1 else x
+        y -= j
+        rho = ((1 - x) * ((1 - y) * node(i, j) + y * node(i, j + 1)) +
+               x * ((1 - y) * node(i + 1, j) + y * node(i + 1, j + 1))) * rho_max
+        # 牛顿迭代, 与 _alpha、_beta、_v_f、_a_f 相同的公式, 为减少调用开销在此展开
+        tolerance = self.flame_radius_tolerance * eta
+        for _ in range(self.flame_radius_max_iter):
+            rho_sq = rho * rho
+            alpha = _sqrt(1 - 1 / rho_sq) if rho > 1 else 0.
+            beta = eta / rho if rho > eta else 1.
+            residual = (rho_sq * rho / 3 * (alpha * alpha * alpha - beta * beta * beta - 3 * (alpha - beta)) +
+                        rho * alpha - target)
+            if -tolerance <= residual <= tolerance:
+                break
+            derivative = 2 * rho_sq * (beta - alpha)
+            if derivative <= 0:
+                break
+            rho -= residual / derivative
+            rho = 0. if rho < 0 else rho_max if rho > rho_max else rho
+        return rho * radius
+
+
+_ETA_RANGE = (1e-2, 1e1)  # 无量纲反查表覆盖的活塞位置范围 (活塞顶到缸盖的距离 / 缸径的一半)
+_LOG_ETA_MIN, _LOG_ETA_MAX = log(_ETA_RANGE[0]), log(_ETA_RANGE[1])
+_flame_tables: dict[tuple[int, int], ndarray] = {}  # 进程内共享的无量纲反查表, 以尺寸为键
+
+
+# @add_log('正在计算火焰面几何数据', '火焰面几何数据计算完成')
+def _build_flame_table(shape: tuple[int, int]) -> ndarray:
+    """
+    计算无量纲火焰半径反查表。已燃体积百分比只取决于 r_f / (B / 2) 与 h_gap / (B / 2), 因此一张表适用于所有缸径、
+    冲程与压缩比。表为 (对数等距的无量纲活塞位置, 等距的已燃体积坐标) 上的规则网格, 值为 r_f / r_max。
+    已燃体积坐标取 y = (f ** (1 / 3) + 1 - (1 - f) ** 0.5) / 2, 其中 f 为已燃体积百分比,
+    火焰很小时 r_f 正比于 f 的立方根, 火焰即将充满气缸时 r_max - r_f 正比于 1 - f 的平方根,
+    该坐标使两端的反函数都接近线性, 插值初值足够准确
+    :param shape: 反查表尺寸 (无量纲活塞位置点数, 已燃体积坐标点数)
+    :return: 无量纲火焰半径表, 第一维为无量纲活塞位置, 第二维为已燃体积坐标
+    """
+    n_eta, n_y = shape
+    eta = geomspace(*_ETA_RANGE, n_eta)[:, None]
+    # 先在加密的火焰半径网格上正向计算已燃体积百分比, 再逐行反插值到等距的已燃体积坐标上
+    s_fine = linspace(0, 1, 4 * n_y)
+    rho = s_fine[None, :] * sqrt(1 + eta ** 2)
+    with errstate(divide='ignore', invalid='ignore'):
+        alpha = where(rho >= 1, sqrt(1 - 1 / rho ** 2), 0)
+        beta = where(rho < eta, 1, eta / rho)
+    v_f = rho ** 3 / 3 * (alpha ** 3 - beta ** 3 - 3 * (alpha - beta)) + rho * alpha
+    f_fine = clip(maximum.accumulate(v_f / eta, axis=1), 0, 1)
+    y_fine = (cbrt(f_fine) + 1 - sqrt(1 - f_fine)) / 2
+    y_grid = linspace(0, 1, n_y)
+    return array([interp(y_grid, row, s_fine) for row in y_fine])
+
+
+def flame_table(shape: tuple[int, int], cache: DiskCache | None = None) -> ndarray:
+    """
+    获取无量纲火焰半径反查表, 每个进程每种尺寸只计算 (或从磁盘缓存中以内存映射方式读取) 一次。
+    内存映射数组直接作为共享对象, 多个进程读取同一缓存文件时共用操作系统的页缓存, 不在各进程中复制为列表;
+    标量查表使用 ndarray.item, 每次插值比列表索引多约 0.3 μs
+    :param shape: 反查表尺寸 (无量纲活塞位置点数, 已燃体积坐标点数)
+    :param cache: 磁盘缓存, 为 None 时直接计算
+    :return: 无量纲火焰半径表 (只读)
+    """
+    shape = (int(shape[0]), int(shape[1]))
+    if shape not in _flame_tables:
+        if cache is None:
+            table = _build_flame_table(shape)
+        else:
+            params = {'eta_range': list(_ETA_RANGE), 'shape': list(shape)}
+            table = cache.get_or_create('flame_radius', params, lambda: _build_flame_table(shape))
+        table.flags.writeable = False
+        _flame_tables[shape] = table
+    return _flame_tables[shape]
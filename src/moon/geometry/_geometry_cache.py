@@ -0,0 +1,160 @@
+# -*- coding:utf-8 -*-
+"""
+提供发动机几何计算的缓存工具
+@Author: MoonCake Without Moon
+@Time: 2025/7/2
+"""
+__all__ = ['GeometryCache', 'GeometryCacheInfo', 'cached_by_angle']
+
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+from typing import Callable, NamedTuple
+
+from numpy import pi, ndarray, asarray, searchsorted
+
+
+class GeometryCacheInfo(NamedTuple):
+    """几何缓存统计信息"""
+    hits: int  # 命中次数
+    misses: int  # 未命中次数
+    evictions: int  # 淘汰次数
+    maxsize: int  # 最大条目数
+    currsize: int  # 当前条目数
+
+
+class GeometryCache:
+    """
+    以曲轴转角为键的几何缓存, 每个几何实例持有一个, 采用 LRU 淘汰
+
+        键的生成方式有三种:
+        1. 默认以精确的曲轴转角为键, 结果与不使用缓存完全一致;
+        2. 设置 resolution 后将曲轴转角量化到该分辨率, 几何量在量化后的转角处计算;
+        3. 设置 angles 后以最接近的预设转角为键, 几何量在该预设转角处计算。
+        命中路径不加锁 (OrderedDict 的单个读取与 move_to_end 在 GIL 下是原子的), 写入与淘汰由锁保护,
+        同一几何实例可被线程池中的多个求值对象共用; 多线程下命中与未命中计数为近似值。
+    """
+
+    def __init__(self,
+                 resolution: float | None = None,
+                 angles: ndarray | None = None,
+                 maxsize: int = 4096):
+        """
+        以曲轴转角为键的几何缓存
+        :param resolution: 曲轴转角量化分辨率 [rad], 为 None 时不量化
+        :param angles: 预设的曲轴转角表 [rad], 取值范围 [0, 4pi), 设置后 resolution 无效
+        :param maxsize: 最大缓存条目数, 为 0 时不缓存
+        """
+        if resolution is not None and resolution <= 0:
+            raise ValueError('resolution must be positive')
+        if maxsize < 0:
+            raise ValueError('maxsize cannot be negative')
+        self.resolution = resolution  # 曲轴转角量化分辨率 [rad]
+        self.angles = None if angles is None else asarray(angles, dtype=float)  # 预设曲轴转角表 [rad]
+        self.maxsize = maxsize  # 最大缓存条目数
+        self._data: OrderedDict = OrderedDict()  # 缓存数据
+        self._hits = 0  # 命中次数
+        self._misses = 0  # 未命中次数
+        self._evictions = 0  # 淘汰次数
+        self._lock = Lock()  # 写入锁
+
+    def angle_key(self, time: float, speed: float) -> tuple[float | int, float]:
+        """
+        计算时间对应的缓存键以及实际用于计算的时间
+        :param time: 时间 [s]
+        :param speed: 转速 [r/s]
+        :return: (曲轴转角键, 计算时间 [s])
+        """
+        angle = (2 * pi * speed * time) % (4 * pi)
+        if self.angles is not None:
+            index = int(searchsorted(self.angles, angle))
+            if index == len(self.angles) or (
+                    index > 0 and angle - self.angles[index - 1] < self.angles[index] - angle):
+                index -= 1
+            return index, float(self.angles[index]) / (2 * pi * speed)
+        if self.resolution is not None:
+            index = round(angle / self.resolution)
+            return index, index * self.resolution / (2 * pi * speed)
+        return angle, time
+
+    def get(self, key, default=None):
+        """
+        读取缓存并更新命中统计 (不加锁)
+        :param key: 键
+        :param default: 未命中时的返回值
+        :return: 缓存值
+        """
+        data = self._data
+        try:
+            value = data[key]
+        except KeyError:
+            self._misses += 1
+            return default
+        try:
+            data.move_to_end(key)
+        except KeyError:  # 读取后已被其他线程淘汰
+            pass
+        self._hits += 1
+        return value
+
+    def put(self, key, value) -> None:
+        """
+        写入缓存, 超出容量时淘汰最久未使用的条目
+        :param key: 键
+        :param value: 值
+        """
+        if self.maxsize == 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def cache_info(self) -> GeometryCacheInfo:
+        """
+        缓存统计信息
+        :return: 命中次数、未命中次数、淘汰次数、最大条目数、当前条目数
+        """
+        with self._lock:
+            return GeometryCacheInfo(self._hits, self._misses, self._evictions, self.maxsize, len(self._data))
+
+    def cache_clear(self) -> None:
+        """
+        清空缓存与统计信息
+        """
+        with self._lock:
+            self._data.clear()
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+
+_MISSING = object()  # 缓存未命中标记
+_GEOMETRY_PARAMETERS = frozenset(('speed', 'stroke', 'epsilon', 'bore', 'crank_rod_ratio', 'tdc_gap'))  # 几何参数
+
+
+def cached_by_angle(func: Callable) -> Callable:
+    """
+    几何方法的缓存装饰器, 使用实例的 _geometry_cache, 以 (方法名, 曲轴转角, 其余参数) 为键;
+    实例的 _use_cache 为 False (缓存关闭或几何参数为数组, 由实例在参数改变时更新) 或时间、其余参数为数组时
+    直接计算, 不经过缓存
+    :param func: 第一个参数为时间 [s] 的几何方法
+    """
+    name = func.__name__
+
+    @wraps(func)
+    def wrapper(self, time, *args):
+        if not self._use_cache or isinstance(time, ndarray) or (
+                args and any(isinstance(arg, ndarray) for arg in args)):
+            return func(self, time, *args)
+        cache: GeometryCache = self._geometry_cache
+        angle_key, time = cache.angle_key(time, self.speed)
+        key = (name, angle_key, *args)
+        value = cache.get(key, _MISSING)
+        if value is _MISSING:
+            value = func(self, time, *args)
+            cache.put(key, value)
+        return value
+
+    return wrapper
@@ -4,3 +4,4 @@
 @Time: 2025/1/22
 """
 from ._heat_transfer import *
+from ._wall_conduction import *
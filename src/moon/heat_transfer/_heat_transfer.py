@@ -5,18 +5,47 @@
 @Time: 2025/1/22
 """
 __all__ = [
-    'HeatTransferBase', 'HeatTransferContext', 'MotoredCylinder',
-    'Woschni', 'Hohenberg', 'Eichelberg', 'Sitkel'
+    'HeatTransferBase', 'HeatTransferContext', 'HeatTransferEvaluator', 'HeatTransferBatch', 'MotoredCylinder',
+    'MotoredCacheInfo', 'Woschni', 'Hohenberg', 'Eichelberg', 'Sitkel'
 ]
 
+import hashlib
+import os
+import threading
 from abc import ABC, abstractmethod
-from typing import Callable
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, NamedTuple
 
 from cantera import IdealGasReactor, Solution, Reservoir, Valve, ReactorNet, Wall
-from numpy import cbrt, sqrt, pi, linspace
+from numpy import cbrt, sqrt, pi, linspace, ndarray, asarray, broadcast_arrays, where, full_like, array
+from loguru import logger
 from scipy.interpolate import interp1d
 
 from ..geometry import EngineGeometry
+from ..tools.disk_cache import DiskCache
+from ..tools.reactor_state import ReactorState, as_reactor_state
+
+
+@dataclass(slots=True)
+class HeatTransferBatch:
+    """
+    批量传热计算结果, 各字段均为与输入等长的数组
+
+        面积划分与 ZeroDimensional.build 相同: 缸盖面积为气缸圆面积, 缸壁面积为活塞顶到缸盖的圆柱侧面积,
+        活塞冠面积为气缸圆面积的 1.3 倍
+    """
+    alpha: ndarray  # 传热系数 [W/(m**2*K)]
+    cover_area: ndarray  # 缸盖面积 [m**2]
+    wall_area: ndarray  # 缸壁面积 [m**2]
+    crown_area: ndarray  # 活塞冠面积 [m**2]
+    cover_heat: ndarray  # 缸盖传热率 (气体传给壁面为正) [W]
+    wall_heat: ndarray  # 缸壁传热率 [W]
+    crown_heat: ndarray  # 活塞冠传热率 [W]
+    heat_flux: ndarray  # 总传热率换算到气缸圆面积上的热通量, 即 ZeroDimensional 中活塞壁面的 heat_flux [W/m**2]
+
+
+_CROWN_AREA_RATIO = 1.3  # 活塞冠面积与气缸圆面积之比, 与 ZeroDimensional.build 一致
 
 
 class HeatTransferBase(ABC):
@@ -39,24 +68,104 @@ class HeatTransferBase(ABC):
         self.crown_temperature = crown_temperature
 
     @abstractmethod
-    def _alpha(self, time: float) -> float:
+    def _alpha(self, state: ReactorState, geometry: EngineGeometry, time: float) -> float:
         """
         传热系数
+        :param state: 反应器状态快照 (已刷新)
+        :param geometry: 发动机几何
         :param time: 仿真时间 [s]
         :return: 传热系数 [W/(m**2*K)]
         """
         pass
 
-    @abstractmethod
-    def heat_transfer_coefficient(self, reactor: IdealGasReactor,
+    def heat_transfer_coefficient(self, reactor: IdealGasReactor | ReactorState,
                                   geometry: EngineGeometry) -> Callable[[float], float]:
         """
         传热系数
-        :param reactor: 反应器
+        :param reactor: 反应器, 或其状态快照 (由单回调气缸反应器的钩子在每次右端项计算时刷新)
         :param geometry: 几何类
-        :return: 传热系数计算函数
+        :return: 传热系数计算函数 (HeatTransferEvaluator), 每次调用返回一个新的计算对象
         """
-        pass
+        return HeatTransferEvaluator(self, reactor, geometry)
+
+    def alpha_batch(self, geometry: EngineGeometry, time: ndarray, pressure: ndarray, temperature: ndarray,
+                    volume: ndarray | None = None) -> ndarray:
+        """
+        批量计算传热系数, 用于对记录的缸压、温度曲线做后处理, 不依赖反应器
+        :param geometry: 发动机几何
+        :param time: 时间 [s]
+        :param pressure: 缸内压力 [Pa]
+        :param temperature: 缸内温度 [K]
+        :param volume: 气缸容积 [m**3], 为 None 时由几何计算
+        :return: 传热系数 [W/(m**2*K)]
+        """
+        raise NotImplementedError(f'{type(self).__name__} does not support batch evaluation')
+
+    def heat_transfer_batch(self, geometry: EngineGeometry, time: ndarray, pressure: ndarray, temperature: ndarray,
+                            volume: ndarray | None = None) -> HeatTransferBatch:
+        """
+        批量计算传热系数与各壁面的传热
+        :param geometry: 发动机几何
+        :param time: 时间 [s]
+        :param pressure: 缸内压力 [Pa]
+        :param temperature: 缸内温度 [K]
+        :param volume: 气缸容积 [m**3], 为 None 时由几何计算
+        :return: 批量传热计算结果
+        """
+        time, pressure, temperature = broadcast_arrays(asarray(time, dtype=float), asarray(pressure, dtype=float),
+                                                       asarray(temperature, dtype=float))
+        if volume is not None:
+            volume = broadcast_arrays(asarray(volume, dtype=float), time)[0]
+        alpha = self.alpha_batch(geometry, time, pressure, temperature, volume)
+        area_bore = geometry.area_bore
+        cover_area = full_like(time, area_bore)
+        wall_area = geometry.piston_position(time) * pi * geometry.bore
+        crown_area = cover_area * _CROWN_AREA_RATIO
+        cover_heat = alpha * (temperature - self.cover_temperature) * cover_area
+        wall_heat = alpha * (temperature - self.wall_temperature) * wall_area
+        crown_heat = alpha * (temperature - self.crown_temperature) * crown_area
+        return HeatTransferBatch(
+            alpha=alpha,
+            cover_area=cover_area,
+            wall_area=wall_area,
+            crown_area=crown_area,
+            cover_heat=cover_heat,
+            wall_heat=wall_heat,
+            crown_heat=crown_heat,
+            heat_flux=(cover_heat + wall_heat + crown_heat) / area_bore
+        )
+
+
+class HeatTransferEvaluator:
+    """
+    单个反应器的传热系数计算对象
+
+        持有反应器状态快照与几何, 传热策略只保存配置 (壁面温度与经验常数),
+        同一策略实例可为双区模型的两区、多缸发动机的各缸以及多个线程中的仿真分别创建计算对象
+    """
+
+    def __init__(self, heat_transfer: HeatTransferBase, reactor: IdealGasReactor | ReactorState,
+                 geometry: EngineGeometry):
+        """
+        单个反应器的传热系数计算对象
+        :param heat_transfer: 传热策略
+        :param reactor: 反应器, 或其状态快照 (由单回调气缸反应器的钩子在每次右端项计算时刷新)
+        :param geometry: 发动机几何
+        """
+        self.heat_transfer = heat_transfer  # 传热策略
+        self.state, self._owned = as_reactor_state(reactor)  # 反应器状态快照, 是否由本对象在每次调用时刷新
+        self.geometry = geometry  # 发动机几何
+
+    def __call__(self, time: float) -> float:
+        """
+        传热系数
+        :param time: 仿真时间 [s]
+        :return: 传热系数 [W/(m**2*K)]
+        """
+        state = self.state
+        if self._owned:
+            state.refresh()
+        return self.heat_transfer._alpha(state, self.geometry, time)
 
 
 class HeatTransferContext:
@@ -74,11 +183,11 @@ class HeatTransferContext:
             raise TypeError('heat_transfer must inherit HeatTransferBase')
         self.heat_transfer = heat_transfer
 
-    def heat_transfer_coefficient(self, reactor: IdealGasReactor,
+    def heat_transfer_coefficient(self, reactor: IdealGasReactor | ReactorState,
                                   geometry: EngineGeometry) -> Callable[[float], float]:
         """
         传热系数
-        :param reactor: 反应器
+        :param reactor: 反应器或其状态快照
         :param geometry: 几何类
         :return: 传热系数计算函数
         """
@@ -105,26 +214,17 @@ class Hohenberg(HeatTransferBase):
         :param crown_temperature: 活塞冠温度 [K]
         """
         super().__init__(cover_temperature, wall_temperature, crown_temperature)
-        self._reactor: IdealGasReactor | None = None  # 反应器
-        self._geometry: EngineGeometry | None = None  # 发动机几何
-        self._c_m: float | None = None  # 活塞平均速度 [m/s]
 
-    def _alpha(self, time: float) -> float:
-        """
-        传热系数
-        :param time: 仿真时间 [s]
-        :return: 传热系数 [W/(m**2*K)]
-        """
-        v_c = self._geometry.cylinder_volume(time)  # 气缸容积 [m³]
-        return (1.3e-2 * v_c ** -0.06 * self._reactor.thermo.P ** 0.8 *
-                self._reactor.T ** -0.4 * (1.4 + self._c_m) ** 0.8)
+    def _alpha(self, state: ReactorState, geometry: EngineGeometry, time: float) -> float:
+        v_c = geometry.cylinder_volume(time)  # 气缸容积 [m³]
+        return (1.3e-2 * v_c ** -0.06 * state.P ** 0.8 *
+                state.T ** -0.4 * (1.4 + geometry.mean_piston_speed) ** 0.8)
 
-    def heat_transfer_coefficient(self, reactor: IdealGasReactor,
-                                  geometry: EngineGeometry) -> Callable[[float], float]:
-        self._reactor = reactor
-        self._geometry = geometry
-        self._c_m = geometry.mean_piston_speed
-        return self._alpha
+    def alpha_batch(self, geometry: EngineGeometry, time: ndarray, pressure: ndarray, temperature: ndarray,
+                    volume: ndarray | None = None) -> ndarray:
+        v_c = geometry.cylinder_volume(asarray(time, dtype=float)) if volume is None else volume  # 气缸容积 [m³]
+        return (1.3e-2 * v_c ** -0.06 * asarray(pressure) ** 0.8 *
+                asarray(temperature) ** -0.4 * (1.4 + geometry.mean_piston_speed) ** 0.8)
 
 
 class Eichelberg(HeatTransferBase):
@@ -145,24 +245,13 @@ class Eichelberg(HeatTransferBase):
         :param crown_temperature: 活塞冠温度 [K]
         """
         super().__init__(cover_temperature, wall_temperature, crown_temperature)
-        self._reactor: IdealGasReactor | None = None  # 反应器
-        self._geometry: EngineGeometry | None = None  # 发动机几何
-        self._c_m: float | None = None  # 活塞平均速度 [m/s]
 
-    def _alpha(self, time: float) -> float:
-        """
-        传热系数
-        :param time: 仿真时间 [s]
-        :return: 传热系数 [W/(m**2*K)]
-        """
-        return 7.79e-3 * cbrt(self._c_m) * sqrt(self._reactor.thermo.P * self._reactor.T)
+    def _alpha(self, state: ReactorState, geometry: EngineGeometry, time: float) -> float:
+        return 7.79e-3 * cbrt(geometry.mean_piston_speed) * sqrt(state.P * state.T)
 
-    def heat_transfer_coefficient(self, reactor: IdealGasReactor,
-                                  geometry: EngineGeometry) -> Callable[[float], float]:
-        self._reactor = reactor
-        self._geometry = geometry
-        self._c_m = geometry.mean_piston_speed
-        return self._alpha
+    def alpha_batch(self, geometry: EngineGeometry, time: ndarray, pressure: ndarray, temperature: ndarray,
+                    volume: ndarray | None = None) -> ndarray:
+        return 7.79e-3 * cbrt(geometry.mean_piston_speed) * sqrt(asarray(pressure) * asarray(temperature))
 
 
 class Sitkel(HeatTransferBase):
@@ -188,10 +277,6 @@ class Sitkel(HeatTransferBase):
         :param crown_temperature: 活塞冠温度 [K]
         """
         super().__init__(cover_temperature, wall_temperature, crown_temperature)
-        self._reactor: IdealGasReactor | None = None  # 反应器
-        self._geometry: EngineGeometry | None = None  # 发动机几何
-        self._c_m: float | None = None  # 活塞平均速度 [m/s]
-        self._bore: float | None = None  # 缸径 [m]
         # 经验常数
         match combustion_chamber_type:
             case 'direct injection':
@@ -204,32 +289,52 @@ class Sitkel(HeatTransferBase):
                 raise TypeError("combustion_chamber_type must be 'direct injection', 'vortex chamber'"
                                 "or 'pre-chamber'")
 
-    def _alpha(self, time: float) -> float:
-        """
-        传热系数
-        :param time: 时间 [s]
-        :return: 传热系数 [W/(m**2*K)]
-        """
-        h_gap = self._geometry.piston_position(time)  # 活塞与缸盖距离
-        d_e = (2 * self._bore * h_gap) / (self._bore + 2 * h_gap)  # 当量直径
-        return (1.294e-5 * (1 + self._b) * d_e ** -0.3 * self._reactor.T ** -0.2 *
-                (self._reactor.thermo.P * self._c_m) ** 0.7)
+    def _alpha(self, state: ReactorState, geometry: EngineGeometry, time: float) -> float:
+        bore = geometry.bore
+        h_gap = geometry.piston_position(time)  # 活塞与缸盖距离
+        d_e = (2 * bore * h_gap) / (bore + 2 * h_gap)  # 当量直径
+        return (1.294e-5 * (1 + self._b) * d_e ** -0.3 * state.T ** -0.2 *
+                (state.P * geometry.mean_piston_speed) ** 0.7)
 
-    def heat_transfer_coefficient(self, reactor: IdealGasReactor, geometry: EngineGeometry) -> Callable[[float], float]:
-        self._reactor = reactor
-        self._geometry = geometry
-        self._c_m = geometry.mean_piston_speed
-        self._bore = geometry.bore
-        return self._alpha
+    def alpha_batch(self, geometry: EngineGeometry, time: ndarray, pressure: ndarray, temperature: ndarray,
+                    volume: ndarray | None = None) -> ndarray:
+        bore = geometry.bore
+        h_gap = geometry.piston_position(asarray(time, dtype=float))  # 活塞与缸盖距离
+        d_e = (2 * bore * h_gap) / (bore + 2 * h_gap)  # 当量直径
+        return (1.294e-5 * (1 + self._b) * d_e ** -0.3 * asarray(temperature) ** -0.2 *
+                (asarray(pressure) * geometry.mean_piston_speed) ** 0.7)
 
 
 # TODO: 完善 Woschni 模型
 
+class MotoredCacheInfo(NamedTuple):
+    """倒拖缸压缓存统计信息"""
+    hits: int  # 命中次数 (内存与磁盘)
+    misses: int  # 未命中次数 (即实际求解次数)
+    evictions: int  # 进程内缓存的淘汰次数
+    maxsize: int  # 进程内缓存的最大条目数
+    currsize: int  # 内存中的条目数
+
+
 class MotoredCylinder:
     """
     倒拖缸
+
+        求解得到的 (曲轴转角, 缸压) 采样按输入内容的哈希值缓存在进程内, 可选地同时写入磁盘缓存,
+        输入相同的实例直接复用采样结果并重建插值。进程内缓存为所有实例共享的 LRU 缓存,
+        最多保留 cache_maxsize 条 (可由 set_cache_maxsize 修改), 超出时淘汰最久未使用的条目。
+        气阀时间函数默认以其在 interp_num 个采样时刻上的取值参与哈希, 在这些时刻取值相同的两种气阀规律会共用
+        缓存条目; 需要区分时由 valve_key 给出气阀标识代替采样指纹。反应机理文件以其内容参与哈希。
+        周期收敛模式下每个循环的时间都从 0 开始, 气阀时间函数只需定义在一个循环内。
     """
 
+    _memory_cache: OrderedDict[str, ndarray] = OrderedDict()  # 进程内 LRU 缓存, 所有实例共享
+    cache_maxsize: int = 128  # 进程内缓存的最大条目数
+    _hits: int = 0  # 命中次数
+    _misses: int = 0  # 未命中次数
+    _evictions: int = 0  # 淘汰次数
+    _lock = threading.Lock()  # 保护进程内缓存与统计信息, 求解倒拖缸压时不持有
+
     def __init__(self,
                  mechanism: str,
                  geometry: EngineGeometry,
@@ -243,8 +348,38 @@ class MotoredCylinder:
                  wall_temperature: float = 400,
                  crown_temperature: float = 500,
                  interp_num: int = 360,
-                 interp_kind: str = 'cubic'
+                 interp_kind: str = 'cubic',
+                 result_cache: DiskCache | None = None,
+                 periodic: bool = False,
+                 cycle_tolerance: float = 1e-3,
+                 max_cycles: int = 20,
+                 valve_key: str | None = None
                  ):
+        """
+        倒拖缸
+        :param mechanism: 反应机理
+        :param geometry: 发动机几何
+        :param tpx_inlet: 进气环境
+        :param tpx_outlet: 排气环境
+        :param inlet_valve_coeffs: 进气阀系数
+        :param inlet_valve_time_funcs: 进气阀时间函数
+        :param outlet_valve_coeffs: 排气阀系数
+        :param outlet_valve_time_funcs: 排气阀时间函数
+        :param cover_temperature: 缸盖温度 [K]
+        :param wall_temperature: 缸壁温度 [K]
+        :param crown_temperature: 活塞冠温度 [K]
+        :param interp_num: 倒拖缸压插值点数
+        :param interp_kind: 倒拖缸压插值类型
+        :param result_cache: 倒拖缸压的磁盘缓存, 为 None 时只在进程内缓存
+        :param periodic: 是否连续计算多个循环直到周期收敛, 否则只计算一个循环
+        :param cycle_tolerance: 周期收敛判据, 相邻两循环缸压的最大差值与最高缸压之比
+        :param max_cycles: 周期收敛模式下的最大循环数, 至少为 2 (残差需要两个循环)
+        :param valve_key: 气阀标识, 不为 None 时代替气阀时间函数的采样指纹参与缓存键
+        """
+        if cycle_tolerance <= 0 or max_cycles < 1:
+            raise ValueError('cycle_tolerance must be positive and max_cycles at least 1')
+        if periodic and max_cycles < 2:
+            raise ValueError('max_cycles must be at least 2 in periodic mode, the residual needs two cycles')
         self.mechanism = mechanism  # 反应机理
         self.geometry = geometry  # 发动机几何
         self.tpx_inlet = tpx_inlet  # 进气环境
@@ -265,6 +400,13 @@ class MotoredCylinder:
         self._d = self.geometry.bore  # 缸径 [m]
         self._cm = self.geometry.mean_piston_speed  # 活塞平均速度 [m/s]
         self._area = self.geometry.area_bore  # 气缸圆的面积 [m**2]
+        self.result_cache = result_cache  # 倒拖缸压的磁盘缓存
+        self.periodic = periodic  # 是否计算到周期收敛
+        self.cycle_tolerance = cycle_tolerance  # 周期收敛判据
+        self.max_cycles = max_cycles  # 最大循环数
+        self.valve_key = valve_key  # 气阀标识
+        self.cycles: int | None = None  # 最近一次求解所用的循环数, 结果来自缓存时为 None
+        self.cycle_residual: float | None = None  # 最近一次求解最后两循环的相对缸压差, 单循环时为 None
         self._motored_pressure: interp1d | None = None  # 倒拖缸压
 
     # @add_log('正在构建倒拖缸', '倒拖缸构建完成')
@@ -301,6 +443,7 @@ class MotoredCylinder:
         piston = Wall(cylinder, ambient_outlet)
         piston.area = self.geometry.area_bore
         piston.velocity = self.geometry.piston_velocity
+        valve_time_funcs = [*self.inlet_valve_time_funcs, *self.outlet_valve_time_funcs]
 
         def motored_heat_transfer_coefficient(time: float) -> float:
             """
@@ -308,8 +451,8 @@ class MotoredCylinder:
             :param time: 时间 [s]
             :return: 传热系数 [W/(m**2*K)]
             """
-            angle = self.geometry.crank_angle(time)
-            if angle >= self.geometry.eo_angle or angle < self.geometry.ic_angle:
+            # 任一气阀开启时为换气过程
+            if any(tf(time) > 0 for tf in valve_time_funcs):
                 c3 = self.c3_gas_exchange
             else:
                 c3 = self.c3_in_cylinder
@@ -336,21 +479,102 @@ class MotoredCylinder:
         return cylinder
 
     # @add_log('正在求解倒拖缸压', '倒拖缸压求解完成')
-    def _calculate_motored_pressure(self) -> interp1d:
+    def _calculate_motored_pressure(self) -> ndarray:
         """
         求解倒拖缸压
-        :return: 倒拖缸压插值
+        :return: 形状为 (2, 插值点数) 的数组, 依次为曲轴转角 [rad] 与缸压 [Pa]
         """
         cylinder = self._build_motored_cylinder()
         reactor_net = ReactorNet([cylinder])
         angles = linspace(0, 4 * pi, self.interp_num)
         times = angles / (2 * pi * self.geometry.speed)
-        pressures = []
-        # 步进cantera求解器
-        for time in times:
-            reactor_net.advance(time)
-            pressures.append(cylinder.thermo.P)
-        return interp1d(angles, pressures, kind=self.interp_kind)
+        previous = None
+        self.cycle_residual = None
+        for cycle in range(1, (self.max_cycles if self.periodic else 1) + 1):
+            if cycle > 1:
+                # 以上一循环的终了状态为初值, 时间回到循环起点, 不重建反应器
+                reactor_net.initial_time = 0.
+            pressures = []
+            # 步进cantera求解器
+            for time in times:
+                reactor_net.advance(time)
+                pressures.append(cylinder.thermo.P)
+            pressures = array(pressures)
+            self.cycles = cycle
+            if previous is not None:
+                self.cycle_residual = float(abs(pressures - previous).max() / pressures.max())
+                if self.cycle_residual < self.cycle_tolerance:
+                    break
+            previous = pressures
+        else:
+            if self.periodic:
+                logger.warning(f'motored cylinder did not converge in {self.max_cycles} cycles, '
+                               f'the relative cycle-to-cycle pressure difference is {self.cycle_residual:.3g}')
+        return array([angles, pressures])
+
+    def cache_params(self) -> dict[str, Any]:
+        """
+        决定倒拖缸压的全部输入, 用作缓存键
+        :return: 可被 json 序列化的参数字典
+        """
+        geometry = self.geometry
+        times = linspace(0, 4 * pi, self.interp_num) / (2 * pi * geometry.speed)
+        valves = hashlib.sha256()
+        for coeffs, funcs in ((self.inlet_valve_coeffs, self.inlet_valve_time_funcs),
+                              (self.outlet_valve_coeffs, self.outlet_valve_time_funcs)):
+            valves.update(array(coeffs, dtype=float).tobytes())
+            if self.valve_key is None:
+                for func in funcs:
+                    valves.update(array([func(time) for time in times], dtype=float).tobytes())
+            valves.update(b'|')
+        if self.valve_key is not None:
+            valves.update(self.valve_key.encode())
+        if os.path.isfile(self.mechanism):
+            with open(self.mechanism, 'rb') as file:
+                mechanism = hashlib.sha256(file.read()).hexdigest()
+        else:
+            mechanism = self.mechanism
+        return {
+            'mechanism': mechanism,
+            'geometry': [geometry.speed, geometry.stroke, geometry.epsilon, geometry.bore,
+                         geometry.crank_rod_ratio, geometry.tdc_gap],
+            'tpx_inlet': self.tpx_inlet,
+            'tpx_outlet': self.tpx_outlet,
+            'valves': valves.hexdigest(),
+            'wall_temperatures': [self.cover_temperature, self.wall_temperature, self.crown_temperature],
+            'heat_transfer': [self.c1, self.c3_gas_exchange, self.c3_in_cylinder],
+            'interp_num': self.interp_num,
+            'periodic': [self.periodic, self.cycle_tolerance, self.max_cycles] if self.periodic else False
+        }
+
+    def _samples(self, refresh: bool = False) -> ndarray:
+        """
+        读取 (或求解并写入) 倒拖缸压采样, 依次查找进程内缓存、磁盘缓存
+        :param refresh: 是否忽略已有缓存重新求解
+        :return: 形状为 (2, 插值点数) 的数组, 依次为曲轴转角 [rad] 与缸压 [Pa]
+        """
+        params = self.cache_params()
+        key = DiskCache.key('motored_pressure', params)
+        cls = type(self)
+        if not refresh:
+            with cls._lock:
+                samples = cls._memory_cache.get(key)
+            if samples is None and self.result_cache is not None:
+                samples = self.result_cache.load('motored_pressure', params)
+            if samples is not None:
+                with cls._lock:
+                    cls._hits += 1
+                self.cycles = None
+                self.cycle_residual = None
+                cls._memory_put(key, samples)
+                return samples
+        with cls._lock:
+            cls._misses += 1
+        samples = self._calculate_motored_pressure()
+        cls._memory_put(key, samples)
+        if self.result_cache is not None:
+            self.result_cache.save('motored_pressure', params, samples)
+        return samples
 
     @property
     def motored_pressure(self) -> interp1d:
@@ -359,16 +583,79 @@ class MotoredCylinder:
         :return: 倒拖缸压的曲轴转角插值 [rad] [Pa]
         """
         if self._motored_pressure is None:
-            self._motored_pressure = self._calculate_motored_pressure()
-            return self._motored_pressure
-        else:
-            return self._motored_pressure
+            self.update_motored_pressure()
+        return self._motored_pressure
+
+    def update_motored_pressure(self, refresh: bool = False) -> None:
+        """
+        更新倒拖缸压插值, 修改输入参数后调用; 输入相同的结果已缓存时不重新求解
+        :param refresh: 是否忽略已有缓存重新求解
+        """
+        angles, pressures = self._samples(refresh)
+        self._motored_pressure = interp1d(angles, pressures, kind=self.interp_kind)
+
+    def invalidate(self) -> None:
+        """
+        删除当前输入对应的缓存条目 (进程内与磁盘)
+        """
+        params = self.cache_params()
+        cls = type(self)
+        with cls._lock:
+            cls._memory_cache.pop(DiskCache.key('motored_pressure', params), None)
+        if self.result_cache is not None:
+            self.result_cache.discard('motored_pressure', params)
+        self._motored_pressure = None
 
-    def update_motored_pressure(self) -> None:
+    @classmethod
+    def _memory_put(cls, key: str, samples: ndarray) -> None:
         """
-        更新倒拖缸压插值
+        写入进程内缓存并标记为最近使用, 超出容量时淘汰最久未使用的条目
+        :param key: 键
+        :param samples: 倒拖缸压采样
         """
-        self._motored_pressure = self._calculate_motored_pressure()
+        with cls._lock:
+            cache = cls._memory_cache
+            cache[key] = samples
+            cache.move_to_end(key)
+            while len(cache) > cls.cache_maxsize:
+                cache.popitem(last=False)
+                cls._evictions += 1
+
+    @classmethod
+    def set_cache_maxsize(cls, maxsize: int) -> None:
+        """
+        修改进程内缓存的最大条目数, 超出部分立即淘汰
+        :param maxsize: 最大条目数, 为 0 时不在进程内缓存
+        """
+        if maxsize < 0:
+            raise ValueError('maxsize cannot be negative')
+        with cls._lock:
+            cls.cache_maxsize = maxsize
+            cache = cls._memory_cache
+            while len(cache) > maxsize:
+                cache.popitem(last=False)
+                cls._evictions += 1
+
+    @classmethod
+    def cache_info(cls) -> MotoredCacheInfo:
+        """
+        倒拖缸压缓存统计信息
+        :return: 命中次数、未命中次数、淘汰次数、最大条目数、内存中的条目数
+        """
+        with cls._lock:
+            return MotoredCacheInfo(cls._hits, cls._misses, cls._evictions, cls.cache_maxsize,
+                                    len(cls._memory_cache))
+
+    @classmethod
+    def cache_clear(cls) -> None:
+        """
+        清空进程内缓存与统计信息 (不影响磁盘缓存)
+        """
+        with cls._lock:
+            cls._memory_cache.clear()
+            cls._hits = 0
+            cls._misses = 0
+            cls._evictions = 0
 
 
 class Woschni(HeatTransferBase):
@@ -382,7 +669,12 @@ class Woschni(HeatTransferBase):
                  motored_pressure: interp1d,
                  inlet_pressure: float,
                  inlet_temperature: float,
-                 combustion_chamber_type: str = 'direct injection'):
+                 ic_angle: float,
+                 eo_angle: float,
+                 combustion_chamber_type: str = 'direct injection',
+                 cover_temperature: float = 400,
+                 wall_temperature: float = 400,
+                 crown_temperature: float = 500):
         """
         Woschni传热
         :param reactor: 反应器
@@ -390,13 +682,21 @@ class Woschni(HeatTransferBase):
         :param motored_pressure: 倒拖缸压插值 (关于曲轴转角 [rad] 的插值)
         :param inlet_pressure: 进气压力 [Pa]
         :param inlet_temperature: 进气温度 [K]
+        :param ic_angle: 进气阀关闭时的曲轴转角 [rad], 取值范围与 EngineGeometry.crank_angle 相同
+        :param eo_angle: 排气阀开启时的曲轴转角 [rad], 两者之间为压缩、燃烧与膨胀过程, 其余为换气过程
         :param combustion_chamber_type: 燃烧室类型 直喷 'direct injection' 或 预燃室 'pre_chamber'
+        :param cover_temperature: 缸盖温度 [K]
+        :param wall_temperature: 缸壁温度 [K]
+        :param crown_temperature: 活塞冠温度 [K]
         """
+        super().__init__(cover_temperature, wall_temperature, crown_temperature)
         self.reactor = reactor  # 反应器
         self.geometry = geometry  # 发动机几何
         self.motored_pressure = motored_pressure  # 倒拖缸压
         self.inlet_pressure = inlet_pressure  # 进气压力 [Pa]
         self.inlet_temperature = inlet_temperature  # 进气温度 [K]
+        self.ic_angle = ic_angle  # 进气阀关闭时的曲轴转角 [rad]
+        self.eo_angle = eo_angle  # 排气阀开启时的曲轴转角 [rad]
         self.combustion_chamber_type = combustion_chamber_type  # 燃烧室类型
         self.c1 = 1.3e-2
         self._wt_cm = 10
@@ -409,25 +709,40 @@ class Woschni(HeatTransferBase):
                 self.c4 = 0.00622
             case _:
                 raise ValueError("combustion_chamber_type must be 'direct injection' or 'pre_chamber'")
-        self._v1 = self.geometry.ic_volume  # 进气阀关闭时的体积 [m**3]
+        self._v1 = self._ic_volume(geometry)  # 进气阀关闭时的体积 [m**3]
         self._vs = self.geometry.working_volume  # 工作容积 [m**3]
         self._bore = self.geometry.bore  # 缸径 [m]
         self._cm = self.geometry.mean_piston_speed  # 活塞平均速度 [m/s]
 
-    def _alpha(self, time: float) -> float:
+    def _ic_volume(self, geometry: EngineGeometry) -> float:
         """
-        传热系数
-        :param time: 时间 [s]
-        :return: 传热系数 [W/(m**2*K)]
+        进气阀关闭时的气缸容积
+        :param geometry: 发动机几何
+        :return: 气缸容积 [m**3]
         """
-        angle = self.geometry.crank_angle(time)
-        if angle >= self.geometry.eo_angle or angle < self.geometry.ic_angle:
+        return float(geometry.cylinder_volume(self.ic_angle / (2 * pi * geometry.speed)))
+
+    def _alpha(self, state: ReactorState, geometry: EngineGeometry, time: float) -> float:
+        angle = geometry.crank_angle(time)
+        if angle >= self.eo_angle or angle < self.ic_angle:
             c3 = self.c3_gas_exchange
         else:
             c3 = self.c3_in_cylinder
         p0 = self.motored_pressure(angle)  # 倒拖缸压 [Pa]
-        p = self.reactor.thermo.P  # 缸内压力 [Pa]
-        t = self.reactor.T  # 缸内温度 [K]
+        p = state.P  # 缸内压力 [Pa]
+        t = state.T  # 缸内温度 [K]
         return (self.c1 * self._bore ** -0.214 * p ** 0.786 * t ** -0.525 *
                 (c3 * self._cm + self.c4 * (p - p0) / self.inlet_pressure *
                  self._vs / self._v1 * self.inlet_temperature) ** 0.786)
+
+    def alpha_batch(self, geometry: EngineGeometry, time: ndarray, pressure: ndarray, temperature: ndarray,
+                    volume: ndarray | None = None) -> ndarray:
+        angle = geometry.crank_angle(asarray(time, dtype=float))
+        c3 = where((angle >= self.eo_angle) | (angle < self.ic_angle),
+                   self.c3_gas_exchange, self.c3_in_cylinder)
+        p0 = self.motored_pressure(angle)  # 倒拖缸压 [Pa]
+        p = asarray(pressure)  # 缸内压力 [Pa]
+        t = asarray(temperature)  # 缸内温度 [K]
+        return (self.c1 * geometry.bore ** -0.214 * p ** 0.786 * t ** -0.525 *
+                (c3 * geometry.mean_piston_speed + self.c4 * (p - p0) / self.inlet_pressure *
+                 geometry.working_volume / self._ic_volume(geometry) * self.inlet_temperature) ** 0.786)
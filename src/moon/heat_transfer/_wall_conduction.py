@@ -0,0 +1,272 @@
+# -*- coding:utf-8 -*-
+"""
+提供缸盖、缸壁、活塞冠的壁面导热模型, 用于在一次仿真中得到循环收敛的壁面温度
+@Author: MoonCake Without Moon
+@Time: 2025/7/9
+"""
+__all__ = ['ConductionWall', 'WallTemperatureModel']
+
+from numpy import full, zeros, array, ndarray, pi, arange, concatenate
+from scipy.linalg import solve_banded
+
+from ._heat_transfer import HeatTransferBase
+from ..geometry import EngineGeometry
+
+
+class ConductionWall:
+    """
+    一维导热壁面 (有限体积, 隐式欧拉), 节点数为 1 时退化为集总参数模型
+
+        燃气侧为对流边界 (传热系数、燃气温度由燃烧模型给出), 冷却侧为对流边界 (冷却液或机油);
+        每次推进求解一个三对角方程组, 时间步长取粗的曲轴转角间隔, 不在燃烧模型的右端项中计算
+    """
+
+    def __init__(self,
+                 thickness: float = 0.01,
+                 conductivity: float = 50,
+                 density: float = 7200,
+                 specific_heat: float = 500,
+                 coolant_temperature: float = 360,
+                 coolant_heat_transfer_coefficient: float = 5000,
+                 initial_temperature: float | None = None,
+                 nodes: int = 8):
+        """
+        一维导热壁面, 默认参数对应铸铁壁面与水冷
+        :param thickness: 壁厚 [m]
+        :param conductivity: 导热系数 [W/(m*K)]
+        :param density: 密度 [kg/m**3]
+        :param specific_heat: 比热容 [J/(kg*K)]
+        :param coolant_temperature: 冷却介质温度 [K]
+        :param coolant_heat_transfer_coefficient: 冷却侧传热系数 [W/(m**2*K)]
+        :param initial_temperature: 初始温度 [K], 为 None 时取冷却介质温度
+        :param nodes: 沿壁厚的节点数, 为 1 时为集总参数模型
+        """
+        if thickness <= 0 or conductivity <= 0 or density <= 0 or specific_heat <= 0:
+            raise ValueError('thickness, conductivity, density and specific_heat must be positive')
+        if nodes < 1:
+            raise ValueError('nodes must be at least 1')
+        self.thickness = thickness  # 壁厚 [m]
+        self.conductivity = conductivity  # 导热系数 [W/(m*K)]
+        self.density = density  # 密度 [kg/m**3]
+        self.specific_heat = specific_heat  # 比热容 [J/(kg*K)]
+        self.coolant_temperature = coolant_temperature  # 冷却介质温度 [K]
+        self.coolant_heat_transfer_coefficient = coolant_heat_transfer_coefficient  # 冷却侧传热系数 [W/(m**2*K)]
+        self.nodes = nodes  # 节点数
+        init = coolant_temperature if initial_temperature is None else initial_temperature
+        self.temperatures: ndarray = full(nodes, float(init))  # 各节点温度 [K], 由燃气侧到冷却侧
+        self._dx = thickness / nodes  # 节点间距 [m]
+        self._gas_alpha = 0.  # 最近一次推进的燃气侧传热系数 [W/(m**2*K)]
+        self._gas_temperature = float(init)  # 最近一次推进的燃气温度 [K]
+        # 循环平均边界条件的累计量
+        self._sum_dt = 0.  # 累计时间 [s]
+        self._sum_alpha = 0.  # 传热系数的时间积分
+        self._sum_alpha_t = 0.  # 传热系数与燃气温度乘积的时间积分
+
+    def _boundary_conductance(self, alpha: float) -> float:
+        """
+        对流边界到首个 (或末个) 节点的串联传热系数
+        :param alpha: 对流传热系数 [W/(m**2*K)]
+        :return: 串联传热系数 [W/(m**2*K)]
+        """
+        if alpha <= 0:
+            return 0.
+        return 1 / (1 / alpha + self._dx / (2 * self.conductivity))
+
+    def advance(self, dt: float, gas_temperature: float, gas_alpha: float) -> None:
+        """
+        隐式推进一个时间步, 时间步内燃气温度与传热系数视为常数
+        :param dt: 时间步长 [s]
+        :param gas_temperature: 燃气温度 (或时间步内的传热系数加权平均温度) [K]
+        :param gas_alpha: 燃气侧传热系数 (或时间步内的平均值) [W/(m**2*K)]
+        """
+        if dt <= 0:
+            return
+        self._sum_dt += dt
+        self._sum_alpha += gas_alpha * dt
+        self._sum_alpha_t += gas_alpha * gas_temperature * dt
+        self.temperatures = self._solve(self.density * self.specific_heat * self._dx / dt, gas_temperature, gas_alpha)
+        self._gas_alpha = gas_alpha
+        self._gas_temperature = gas_temperature
+
+    def relax_to_steady(self) -> None:
+        """
+        把温度场设为循环平均边界条件 (平均传热系数与传热系数加权平均燃气温度) 下的稳态解, 并清零累计量;
+        壁面热惯性远大于一个循环, 每个循环结束时调用可使壁面温度在少数几个循环内收敛
+        """
+        if self._sum_alpha <= 0:
+            return
+        alpha = self._sum_alpha / self._sum_dt
+        self.temperatures = self._solve(0., self._sum_alpha_t / self._sum_alpha, alpha)
+        self._sum_dt = self._sum_alpha = self._sum_alpha_t = 0.
+
+    def _solve(self, capacity: float, gas_temperature: float, gas_alpha: float) -> ndarray:
+        """
+        求解隐式欧拉一步 (capacity 为 0 时为稳态) 的三对角方程组
+        :param capacity: 单位面积节点热容除以时间步长 [W/(m**2*K)]
+        :param gas_temperature: 燃气温度 [K]
+        :param gas_alpha: 燃气侧传热系数 [W/(m**2*K)]
+        :return: 各节点温度 [K]
+        """
+        n = self.nodes
+        g_inner = self.conductivity / self._dx
+        g_gas = self._boundary_conductance(gas_alpha)
+        g_coolant = self._boundary_conductance(self.coolant_heat_transfer_coefficient)
+        # 三对角矩阵按 solve_banded 的 (上对角, 主对角, 下对角) 存储
+        banded = zeros((3, n))
+        banded[1] = capacity
+        banded[0, 1:] = -g_inner
+        banded[2, :-1] = -g_inner
+        banded[1, 1:] += g_inner
+        banded[1, :-1] += g_inner
+        banded[1, 0] += g_gas
+        banded[1, -1] += g_coolant
+        rhs = capacity * self.temperatures
+        rhs[0] += g_gas * gas_temperature
+        rhs[-1] += g_coolant * self.coolant_temperature
+        return solve_banded((1, 1), banded, rhs)
+
+    @property
+    def surface_temperature(self) -> float:
+        """燃气侧表面温度 [K], 由首个节点温度与最近一次的燃气侧边界条件重构"""
+        g_wall = 2 * self.conductivity / self._dx
+        alpha = self._gas_alpha
+        return float((alpha * self._gas_temperature + g_wall * self.temperatures[0]) / (alpha + g_wall))
+
+    @property
+    def coolant_heat_flux(self) -> float:
+        """传给冷却介质的热流密度 [W/m**2]"""
+        return self._boundary_conductance(self.coolant_heat_transfer_coefficient) * (
+            float(self.temperatures[-1]) - self.coolant_temperature)
+
+
+class WallTemperatureModel:
+    """
+    壁面温度模型: 在粗的曲轴转角间隔上推进缸盖、缸壁、活塞冠的导热壁面,
+    并把表面温度写入由 bind() 绑定的右端项钩子 (SingleZoneEvaluator、TwoZoneEvaluator) 的 wall_temperatures,
+    该气缸的传热计算随之使用更新后的壁面温度; 传热策略只提供初始壁面温度, 不被修改,
+    同一策略可同时用于多个气缸, 每个气缸各有一个壁面温度模型
+
+        用法: 按 schedule() 给出的时刻推进反应器网络, 每个时刻调用 update() 传入燃气温度与传热系数;
+        每个循环结束时调用 end_cycle() 得到循环间的壁面温度变化, 据此判断是否收敛
+    """
+
+    def __init__(self,
+                 heat_transfer: HeatTransferBase,
+                 geometry: EngineGeometry,
+                 cover: ConductionWall | None = None,
+                 wall: ConductionWall | None = None,
+                 crown: ConductionWall | None = None):
+        """
+        壁面温度模型
+        :param heat_transfer: 传热策略, 其壁面温度作为各导热壁面的初始温度
+        :param geometry: 发动机几何
+        :param cover: 缸盖导热壁面, 为 None 时使用铸铁水冷的默认值
+        :param wall: 缸套导热壁面, 为 None 时使用铸铁水冷的默认值
+        :param crown: 活塞冠导热壁面, 为 None 时使用铝合金机油冷却的默认值
+        """
+        self.heat_transfer = heat_transfer  # 传热策略
+        self.geometry = geometry  # 发动机几何
+        self.cover = ConductionWall(initial_temperature=heat_transfer.cover_temperature) if cover is None else cover
+        self.wall = ConductionWall(initial_temperature=heat_transfer.wall_temperature) if wall is None else wall
+        self.crown = ConductionWall(thickness=0.012, conductivity=150, density=2700, specific_heat=900,
+                                    coolant_temperature=400, coolant_heat_transfer_coefficient=1500,
+                                    initial_temperature=heat_transfer.crown_temperature) if crown is None else crown
+        self._targets: list = []  # 由本模型更新壁面温度的右端项钩子
+        self._time: float | None = None  # 上次更新的时间 [s]
+        self._cycle_start: tuple[float, float, float] | None = None  # 本循环起始时的表面温度 [K]
+
+    def schedule(self, start: float, end: float, step_angle: float = 5 * pi / 180) -> ndarray:
+        """
+        更新时刻表
+        :param start: 起始时间 [s]
+        :param end: 结束时间 [s]
+        :param step_angle: 更新间隔 [rad]
+        :return: 更新时刻 [s]
+        """
+        step = step_angle / (2 * pi * self.geometry.speed)
+        return arange(start + step, end + step / 2, step)
+
+    def update(self, time: float, gas_temperature: float, alpha: float, wall_exposure: float | None = None) -> None:
+        """
+        把三个壁面推进到 time, 并更新所绑定钩子的壁面温度
+        :param time: 时间 [s]
+        :param gas_temperature: 燃气温度 (或上次更新以来的平均值) [K]
+        :param alpha: 传热系数 (或上次更新以来的平均值) [W/(m**2*K)]
+        :param wall_exposure: 缸套暴露于燃气的长度占缸套全长 (上止点余隙高度加冲程) 的比例,
+                              为 None 时按 time 处的活塞位置计算
+        """
+        if self._time is None:
+            self._time = time
+            self._cycle_start = self.surface_temperatures
+            return
+        dt = time - self._time
+        self._time = time
+        if wall_exposure is None:
+            geometry = self.geometry
+            wall_exposure = float(geometry.piston_position(time)) / (geometry.tdc_gap + geometry.stroke)
+        self.cover.advance(dt, gas_temperature, alpha)
+        self.wall.advance(dt, gas_temperature, alpha * wall_exposure)
+        self.crown.advance(dt, gas_temperature, alpha)
+        self.update_wall_temperatures()
+
+    def bind(self, evaluator) -> None:
+        """
+        绑定右端项钩子, 之后每次更新都把表面温度写入其 wall_temperatures
+        :param evaluator: 右端项钩子 (SingleZoneEvaluator 或 TwoZoneEvaluator)
+        """
+        self._targets.append(evaluator)
+        evaluator.wall_temperatures = self.surface_temperatures
+
+    def update_wall_temperatures(self) -> None:
+        """
+        把当前表面温度写入所绑定的右端项钩子
+        """
+        temperatures = self.surface_temperatures
+        for target in self._targets:
+            target.wall_temperatures = temperatures
+
+    def state(self) -> ndarray:
+        """
+        壁面状态量
+        :return: 缸盖、缸壁、活塞冠的各节点温度 [K], 依次连接
+        """
+        return concatenate((self.cover.temperatures, self.wall.temperatures, self.crown.temperatures))
+
+    def set_state(self, state: ndarray) -> None:
+        """
+        设置各节点温度并更新所绑定钩子的壁面温度, 用于周期稳态的加速求解;
+        此后 end_cycle() 返回的表面温度变化以设置后的温度为起点
+        :param state: 缸盖、缸壁、活塞冠的各节点温度 [K], 与 state() 的排列相同
+        """
+        if len(state) != self.cover.nodes + self.wall.nodes + self.crown.nodes:
+            raise ValueError('state length does not match the number of wall nodes')
+        start = 0
+        for wall in (self.cover, self.wall, self.crown):
+            wall.temperatures = array(state[start:start + wall.nodes], dtype=float)
+            start += wall.nodes
+        self.update_wall_temperatures()
+        self._cycle_start = self.surface_temperatures
+
+    @property
+    def surface_temperatures(self) -> tuple[float, float, float]:
+        """缸盖、缸壁、活塞冠的表面温度 [K]"""
+        return self.cover.surface_temperature, self.wall.surface_temperature, self.crown.surface_temperature
+
+    def end_cycle(self, steady: bool = False) -> float:
+        """
+        结束一个循环
+        :param steady: 是否把各壁面设为循环平均边界条件下的稳态温度场 (加速收敛);
+                       稳态温度场丢弃了壁面内的瞬态温度分布, 只用于求周期稳态, 默认按瞬态导热连续推进
+        :return: 本循环起止时表面温度的最大变化 [K]
+        """
+        if steady:
+            for wall in (self.cover, self.wall, self.crown):
+                wall.relax_to_steady()
+            self.update_wall_temperatures()
+        current = self.surface_temperatures
+        if self._cycle_start is None:
+            self._cycle_start = current
+            return float('inf')
+        change = max(abs(a - b) for a, b in zip(current, self._cycle_start))
+        self._cycle_start = current
+        return change
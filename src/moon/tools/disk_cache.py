@@ -0,0 +1,239 @@
+# -*- coding:utf-8 -*-
+"""
+提供基于磁盘的数组缓存, 用于保存预计算的数据表
+@Author: MoonCake Without Moon
+@Time: 2025/7/3
+"""
+__all__ = ['DISK_CACHE_VERSION', 'DiskCache', 'DiskCacheInfo', 'default_cache_dir']
+
+import hashlib
+import json
+import os
+import pathlib
+import tempfile
+import time
+from typing import Any, NamedTuple
+
+from numpy import ndarray, load, save, ascontiguousarray
+
+DISK_CACHE_VERSION = 1  # 缓存格式版本, 格式变化时递增, 旧版本的缓存会被忽略
+
+
+def default_cache_dir() -> pathlib.Path:
+    """
+    默认缓存文件夹, 优先使用环境变量 MOON_CACHE_DIR, 否则为 ~/.cache/moon
+    :return: 缓存文件夹路径
+    """
+    directory = os.environ.get('MOON_CACHE_DIR')
+    if directory:
+        return pathlib.Path(directory)
+    return pathlib.Path.home() / '.cache' / 'moon'
+
+
+class DiskCacheInfo(NamedTuple):
+    """磁盘缓存统计信息"""
+    hits: int  # 命中次数
+    misses: int  # 未命中次数
+    max_bytes: int  # 最大占用空间 [B]
+    curr_bytes: int  # 当前占用空间 [B]
+
+
+class DiskCache:
+    """
+    磁盘数组缓存
+
+        每个条目为一个 .npy 文件, 文件名由条目名称与参数的哈希值组成, 读取时以内存映射方式打开。
+        写入先写临时文件再原子替换, 多个进程同时写入同一条目也不会读到不完整的文件。
+        总占用超过上限时按最近访问时间淘汰最久未使用的条目。
+        写入进程被强制终止时遗留的临时文件在淘汰 (每次写入之后) 与清空时删除, 只删除超过 temp_max_age 的,
+        以免删掉其他进程正在写入的文件。
+    """
+
+    def __init__(self,
+                 directory: str | pathlib.Path | None = None,
+                 max_bytes: int = 512 * 1024 ** 2,
+                 mmap: bool = True,
+                 temp_max_age: float = 3600):
+        """
+        磁盘数组缓存
+        :param directory: 缓存文件夹, 为 None 时使用 default_cache_dir()
+        :param max_bytes: 最大占用空间 [B]
+        :param mmap: 是否以内存映射方式读取
+        :param temp_max_age: 临时文件的最长保留时间 [s], 超过后视为中断写入的遗留文件并删除
+        """
+        if max_bytes < 0 or temp_max_age < 0:
+            raise ValueError('max_bytes and temp_max_age cannot be negative')
+        root = default_cache_dir() if directory is None else pathlib.Path(directory)
+        self.directory = root / f'v{DISK_CACHE_VERSION}'  # 当前版本的缓存文件夹
+        self.max_bytes = max_bytes  # 最大占用空间 [B]
+        self.mmap = mmap  # 是否以内存映射方式读取
+        self.temp_max_age = temp_max_age  # 临时文件的最长保留时间 [s]
+        self._hits = 0  # 命中次数
+        self._misses = 0  # 未命中次数
+
+    @staticmethod
+    def key(name: str, params: dict[str, Any]) -> str:
+        """
+        计算条目的键
+        :param name: 条目名称, 例如 'flame_radius'
+        :param params: 决定条目内容的参数, 需可被 json 序列化
+        :return: 键 (同时也是文件名主干)
+        """
+        text = json.dumps(params, sort_keys=True, default=repr)
+        return f'{name}-{hashlib.sha256(text.encode()).hexdigest()[:32]}'
+
+    @staticmethod
+    def file_hash(path: str | pathlib.Path) -> str:
+        """
+        文件内容的哈希值, 用作 params 中代表输入文件 (例如反应机理) 的值, 文件被修改后键随之改变
+        :param path: 文件路径
+        :return: 哈希值, 文件不在本地 (例如 Cantera 自带的 gri30.yaml) 时为路径本身
+        """
+        try:
+            with open(path, 'rb') as file:
+                return hashlib.sha256(file.read()).hexdigest()
+        except OSError:
+            return str(path)
+
+    def path(self, name: str, params: dict[str, Any]) -> pathlib.Path:
+        """
+        条目对应的文件路径
+        :param name: 条目名称
+        :param params: 决定条目内容的参数
+        :return: 文件路径
+        """
+        return self.directory / f'{self.key(name, params)}.npy'
+
+    def load(self, name: str, params: dict[str, Any]) -> ndarray | None:
+        """
+        读取条目
+        :param name: 条目名称
+        :param params: 决定条目内容的参数
+        :return: 数组 (只读), 不存在或文件损坏时返回 None
+        """
+        path = self.path(name, params)
+        try:
+            array = load(path, mmap_mode='r' if self.mmap else None, allow_pickle=False)
+        except FileNotFoundError:
+            self._misses += 1
+            return None
+        except (OSError, ValueError):
+            # 文件损坏则删除后视为未命中
+            self._remove(path)
+            self._misses += 1
+            return None
+        try:
+            os.utime(path)  # 更新访问时间, 用于 LRU 淘汰
+        except OSError:
+            pass
+        self._hits += 1
+        return array
+
+    def save(self, name: str, params: dict[str, Any], array: ndarray) -> pathlib.Path:
+        """
+        写入条目, 写入后若超出容量则淘汰旧条目
+        :param name: 条目名称
+        :param params: 决定条目内容的参数
+        :param array: 数组
+        :return: 文件路径
+        """
+        path = self.path(name, params)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=path.stem, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                save(file, ascontiguousarray(array), allow_pickle=False)
+            os.replace(temp_path, path)
+        except BaseException:
+            self._remove(pathlib.Path(temp_path))
+            raise
+        self.evict()
+        return path
+
+    def get_or_create(self, name: str, params: dict[str, Any], factory) -> ndarray:
+        """
+        读取条目, 不存在时调用 factory 生成并写入
+        :param name: 条目名称
+        :param params: 决定条目内容的参数
+        :param factory: 无参数的生成函数, 返回数组
+        :return: 数组
+        """
+        array = self.load(name, params)
+        if array is None:
+            array = factory()
+            self.save(name, params, array)
+        return array
+
+    def discard(self, name: str, params: dict[str, Any]) -> None:
+        """
+        删除单个条目, 条目不存在时忽略
+        :param name: 条目名称
+        :param params: 决定条目内容的参数
+        """
+        self._remove(self.path(name, params))
+
+    def evict(self) -> None:
+        """
+        按最近访问时间淘汰条目, 直到总占用不超过上限, 并删除遗留的临时文件
+        """
+        self._remove_stale_temps()
+        entries = []
+        for path in self.directory.glob('*.npy'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self) -> None:
+        """
+        删除当前版本的全部条目并清空统计信息
+        """
+        for path in self.directory.glob('*.npy'):
+            self._remove(path)
+        self._remove_stale_temps()
+        self._hits = 0
+        self._misses = 0
+
+    def cache_info(self) -> DiskCacheInfo:
+        """
+        缓存统计信息
+        :return: 命中次数、未命中次数、最大占用空间、当前占用空间
+        """
+        curr_bytes = 0
+        for path in self.directory.glob('*.npy'):
+            try:
+                curr_bytes += path.stat().st_size
+            except FileNotFoundError:
+                pass
+        return DiskCacheInfo(self._hits, self._misses, self.max_bytes, curr_bytes)
+
+    def _remove_stale_temps(self) -> None:
+        """
+        删除超过 temp_max_age 的临时文件 (写入进程被终止时遗留)
+        """
+        deadline = time.time() - self.temp_max_age
+        for path in self.directory.glob('*.tmp'):
+            try:
+                stale = path.stat().st_mtime < deadline
+            except FileNotFoundError:
+                continue
+            if stale:
+                self._remove(path)
+
+    @staticmethod
+    def _remove(path: pathlib.Path) -> None:
+        """
+        删除文件, 文件已被其他进程删除或仍被占用时忽略
+        :param path: 文件路径
+        """
+        try:
+            path.unlink()
+        except OSError:
+            pass
@@ -8,35 +8,27 @@ __all__ = [
     'indicated_power', 'mean_indicated_power', 'indicated_torque', 'mean_indicated_torque', 'imep'
 ]
 
-from numpy import array, sin, cos, sqrt, pi, remainder, max, min
+from numpy import array, ndarray, sin, cos, sqrt, pi, max, min
 from scipy.integrate import simpson
 
 
-def indicated_power(pressure: float, time: float, speed: float,
-                    bore: float, stroke: float, lambda_: float) -> float:
+def indicated_power(pressure: float | ndarray, time: float | ndarray, speed: float,
+                    bore: float, stroke: float, lambda_: float) -> float | ndarray:
     """
     瞬时指示功率 [W]
-    :param pressure: 压力 [Pa]
-    :param time: 压力对应的时间 [s]
+    :param pressure: 压力 [Pa], 标量或数组
+    :param time: 压力对应的时间 [s], 标量或数组
     :param speed: 发动机转速 [r/s]
     :param bore: 缸径 [m]
     :param stroke: 冲程 [m]
     :param lambda_: 曲柄连杆比
     :return: 瞬时指示功率 [W]
     """
-
-    def piston_velocity(t: float) -> float:
-        """
-        活塞速度
-        :param t: 时间 [s]
-        :return: 活塞速度 (向下为正) [m/s]
-        """
-        angle = remainder(2 * pi * speed * t, 4 * pi)
-        return stroke * (lambda_ * sin(angle) * cos(angle) / sqrt(lambda_ ** 2 * sin(angle) ** 2 + 1)
-                         + sin(angle)) * pi * speed
-
-    area = 0.25 * pi * bore ** 2  # 气缸圆面积 [m**2]
-    return pressure * area * piston_velocity(time)
+    # 功率只与活塞运动学有关, 直接使用与 EngineGeometry.piston_velocity 相同的解析式
+    angle = 2 * pi * speed * time  # 曲轴转角 [rad] (正弦、余弦以 2pi 为周期, 不必取余)
+    velocity = stroke * (lambda_ * sin(angle) * cos(angle) / sqrt(1 - lambda_ ** 2 * sin(angle) ** 2)
+                         + sin(angle)) * pi * speed  # 活塞速度 [m/s]
+    return pressure * 0.25 * pi * bore ** 2 * velocity
 
 
 def mean_indicated_power(pressures: array, times: array, speed: float,
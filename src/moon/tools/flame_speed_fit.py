@@ -0,0 +1,226 @@
+# -*- coding:utf-8 -*-
+"""
+拟合层流火焰速度关联式, 输出与 fit_coefficients/hydrogen_methanol.csv 相同格式的系数文件, 供 CorrelationFlameSpeed 使用
+
+    s_l = s_l0 * (T_u / T_ref) ** alpha * (p / p_ref) ** beta * (1 - gamma * y_dil) * 1e-2 [m/s]
+    s_l0、alpha 在 phi <= 1 与 phi > 1 两段分别拟合 (a_lower/a_upper, b_lower/b_upper),
+    s_l0、alpha、gamma (d) 为 phi 与 alpha_h2 的 9 项多项式, beta (c) 为 phi、alpha_h2、T_u / T_ref 的 15 项多项式
+@Author: MoonCake Without Moon
+@Time: 2025/7/12
+"""
+__all__ = ['FlameSpeedFit', 'fit_flame_speed_correlation', 'fit_flame_speed_table']
+
+import json
+import pathlib
+from dataclasses import dataclass, field
+
+from loguru import logger
+from numpy import ndarray, asarray, broadcast_arrays, stack, ones_like, log, exp, zeros, concatenate, abs as np_abs, \
+    sqrt, mean, isfinite, any as np_any
+from numpy.linalg import lstsq
+from pandas import DataFrame
+from scipy.optimize import least_squares
+
+from ..flame_speed import FlameSpeedTable
+
+_COLUMNS = (('a_lower', 9), ('a_upper', 9), ('b_lower', 9), ('b_upper', 9), ('c', 15), ('d', 9))  # 系数列与项数
+_NAMES = ('equivalence ratio', 'unburned gas temperature', 'pressure', 'residual gas mass fraction',
+          'hydrogen volume fraction')  # 数据范围的参数名, 与 MethanolHydrogenFlameSpeed.data_ranges 一致
+_UNITS = (None, 'K', 'Pa', None, None)  # 数据范围的单位
+
+
+def _basis_9(phi: ndarray, alpha: ndarray) -> ndarray:
+    """
+    9 项多项式的基函数, 项的顺序与系数文件一致
+    :return: 形状为 (点数, 9)
+    """
+    one = ones_like(phi)
+    return stack([one, phi, phi ** 2, alpha, alpha ** 2, phi * alpha, phi ** 2 * alpha, phi * alpha ** 2,
+                  phi ** 2 * alpha ** 2], axis=1)
+
+
+def _basis_15(phi: ndarray, alpha: ndarray, theta: ndarray) -> ndarray:
+    """
+    15 项多项式的基函数, 项的顺序与系数文件一致
+    :return: 形状为 (点数, 15)
+    """
+    one = ones_like(phi)
+    return stack([one, phi, phi ** 2, alpha, alpha ** 2, theta, theta ** 2, phi * alpha, phi * theta, alpha * theta,
+                  phi ** 2 * alpha, phi * alpha ** 2, phi ** 2 * alpha ** 2, phi * theta ** 2, alpha * theta ** 2],
+                 axis=1)
+
+
+@dataclass
+class FlameSpeedFit:
+    """
+    关联式拟合结果
+    """
+    coefficients: dict[str, ndarray]  # 各列拟合系数
+    data_ranges: dict[str, dict]  # 数据范围
+    reference_temperature: float  # 参考温度 [K]
+    reference_pressure: float  # 参考压力 [Pa]
+    rms_error: float  # 相对误差的均方根
+    max_error: float  # 相对误差绝对值的最大值
+    relative_error: ndarray  # 各数据点的相对误差
+    marker: str | None = None  # 残余气体标记组分
+    marker_phi: list[float] = field(default_factory=list)  # 标记组分质量分数表的当量比坐标
+    marker_fraction: list[float] = field(default_factory=list)  # 残余气体中标记组分的质量分数
+    secondary_fuel: str | None = None  # 第二燃料组分 (关联式中的 alpha_h2)
+
+    def to_frame(self) -> DataFrame:
+        """
+        系数表, 与 hydrogen_methanol.csv 的格式相同, 项数不足 15 的列以空值补齐
+        :return: 系数表
+        """
+        return DataFrame({name: list(self.coefficients[name]) + [None] * (15 - size) for name, size in _COLUMNS})
+
+    def save(self, path: str | pathlib.Path) -> pathlib.Path:
+        """
+        保存系数文件 (.csv) 与同名的范围记录 (.json)
+        :param path: 系数文件路径
+        :return: 范围记录路径
+        """
+        path = pathlib.Path(path)
+        self.to_frame().to_csv(path)
+        record_path = path.with_suffix('.json')
+        record = {'reference_temperature': self.reference_temperature,
+                  'reference_pressure': self.reference_pressure,
+                  'data_ranges': {name: {'range': list(item['range']), 'unit': item['unit']}
+                                  for name, item in self.data_ranges.items()},
+                  'marker': self.marker, 'marker_phi': self.marker_phi, 'marker_fraction': self.marker_fraction,
+                  'secondary_fuel': self.secondary_fuel,
+                  'rms_error': self.rms_error, 'max_error': self.max_error}
+        with open(record_path, 'w') as file:
+            json.dump(record, file, indent=2)
+        return record_path
+
+
+def fit_flame_speed_correlation(phi, t_u, p, y_dil, alpha_h2, speed,
+                                reference_temperature: float = 400,
+                                reference_pressure: float = 1e5,
+                                path: str | pathlib.Path | None = None,
+                                marker: str | None = None,
+                                marker_phi=(),
+                                marker_fraction=(),
+                                secondary_fuel: str | None = None,
+                                refine: bool = True) -> FlameSpeedFit:
+    """
+    由火焰速度数据拟合关联式系数
+
+        第一步在对数空间中求解线性最小二乘 (ln s_l0 以多项式近似, ln(1 - gamma * y_dil) 近似为 -gamma * y_dil),
+        再把 ln s_l0 多项式换算为 s_l0 多项式; 第二步以相对误差为目标做非线性最小二乘 (解析雅可比矩阵) 修正全部系数。
+        数据中不变化的自变量 (例如不含第二燃料时的 alpha_h2) 对应的系数取 0
+    :param phi: 当量比
+    :param t_u: 未燃气体温度 [K]
+    :param p: 压力 [Pa]
+    :param y_dil: 残余气体质量分数
+    :param alpha_h2: 第二燃料体积分数
+    :param speed: 层流火焰速度 [m/s], 不大于 0 的点不参与拟合
+    :param reference_temperature: 参考温度 [K]
+    :param reference_pressure: 参考压力 [Pa]
+    :param path: 系数文件保存路径 (.csv), 为 None 时不保存
+    :param marker: 残余气体标记组分, 运行时由其质量分数得到残余气体质量分数
+    :param marker_phi: 标记组分质量分数表的当量比坐标
+    :param marker_fraction: 各当量比下残余气体中标记组分的质量分数
+    :param secondary_fuel: 第二燃料组分, 为 None 时运行时 alpha_h2 取 0
+    :param refine: 是否做非线性最小二乘修正
+    :return: 拟合结果
+    """
+    phi, t_u, p, y_dil, alpha_h2, speed = (
+        value.ravel() for value in broadcast_arrays(*(asarray(value, dtype=float)
+                                                      for value in (phi, t_u, p, y_dil, alpha_h2, speed))))
+    valid = (speed > 0) & isfinite(speed)
+    if not valid.all():
+        logger.warning(f'flame speed fit: {int((~valid).sum())} non-positive or non-finite points are ignored')
+        phi, t_u, p, y_dil, alpha_h2, speed = (value[valid] for value in (phi, t_u, p, y_dil, alpha_h2, speed))
+    if np_any(y_dil > 0) and marker is None:
+        raise ValueError('marker is required when the data contain residual gas')
+    target = speed * 1e2  # 系数以 cm/s 为单位
+    theta = t_u / reference_temperature
+    log_theta = log(theta)
+    log_pi = log(p / reference_pressure)
+    lower = (phi <= 1)[:, None]
+    basis_9 = _basis_9(phi, alpha_h2)
+    basis_15 = _basis_15(phi, alpha_h2, theta)
+    # 第一步: 对数空间线性最小二乘, 列的排列与系数向量一致
+    design = concatenate([basis_9 * lower, basis_9 * ~lower, basis_9 * log_theta[:, None] * lower,
+                          basis_9 * log_theta[:, None] * ~lower, basis_15 * log_pi[:, None],
+                          -basis_9 * y_dil[:, None]], axis=1)
+    active = np_any(design != 0, axis=0)  # 自变量不变化时对应的列全为 0, 系数取 0
+    x = zeros(design.shape[1])
+    x[active] = lstsq(design[:, active], log(target), rcond=None)[0]
+    # ln s_l0 多项式换算为 s_l0 多项式
+    for start, branch in ((0, lower[:, 0]), (9, ~lower[:, 0])):
+        if branch.any():
+            x[start:start + 9] = lstsq(basis_9[branch], exp(basis_9[branch] @ x[start:start + 9]), rcond=None)[0]
+
+    def model(coefficients: ndarray) -> tuple[ndarray, ...]:
+        """关联式的值 (cm/s) 及中间量"""
+        a_lower, a_upper, b_lower, b_upper, c, d = (coefficients[0:9], coefficients[9:18], coefficients[18:27],
+                                                    coefficients[27:36], coefficients[36:51], coefficients[51:60])
+        s_l0 = (basis_9 * (lower * a_lower + ~lower * a_upper)).sum(axis=1)
+        alpha = (basis_9 * (lower * b_lower + ~lower * b_upper)).sum(axis=1)
+        beta = basis_15 @ c
+        dilution = 1 - (basis_9 @ d) * y_dil
+        return s_l0 * theta ** alpha * exp(beta * log_pi) * dilution, s_l0, dilution
+
+    def residual(values: ndarray) -> ndarray:
+        x[active] = values
+        return model(x)[0] / target - 1
+
+    def jacobian(values: ndarray) -> ndarray:
+        x[active] = values
+        value, s_l0, dilution = model(x)
+        scale = (value / target)[:, None]
+        jac = concatenate([basis_9 * lower / s_l0[:, None], basis_9 * ~lower / s_l0[:, None],
+                           basis_9 * log_theta[:, None] * lower, basis_9 * log_theta[:, None] * ~lower,
+                           basis_15 * log_pi[:, None], -basis_9 * (y_dil / dilution)[:, None]], axis=1) * scale
+        return jac[:, active]
+
+    if refine:
+        solution = least_squares(residual, x[active], jac=jacobian, method='trf', x_scale='jac')
+        x[active] = solution.x
+    relative_error = model(x)[0] / target - 1
+    coefficients = {}
+    start = 0
+    for name, size in _COLUMNS:
+        coefficients[name] = x[start:start + size].copy()
+        start += size
+    data_ranges = {name: {'range': (float(value.min()), float(value.max())), 'unit': unit}
+                   for name, unit, value in zip(_NAMES, _UNITS, (phi, t_u, p, y_dil, alpha_h2))}
+    fit = FlameSpeedFit(coefficients=coefficients, data_ranges=data_ranges,
+                        reference_temperature=float(reference_temperature),
+                        reference_pressure=float(reference_pressure),
+                        rms_error=float(sqrt(mean(relative_error ** 2))),
+                        max_error=float(np_abs(relative_error).max()), relative_error=relative_error,
+                        marker=marker, marker_phi=[float(value) for value in marker_phi],
+                        marker_fraction=[float(value) for value in marker_fraction], secondary_fuel=secondary_fuel)
+    logger.info(f'flame speed fit: {len(target)} points, relative error rms {fit.rms_error:.2%}, '
+                f'max {fit.max_error:.2%}')
+    if path is not None:
+        fit.save(path)
+    return fit
+
+
+def fit_flame_speed_table(table: FlameSpeedTable | str | pathlib.Path,
+                          path: str | pathlib.Path | None = None,
+                          reference_temperature: float = 400,
+                          reference_pressure: float = 1e5,
+                          refine: bool = True) -> FlameSpeedFit:
+    """
+    由 generate_flame_speed_table 生成的数据表拟合关联式 (不含第二燃料, alpha_h2 取 0)
+    :param table: 数据表或其文件路径
+    :param path: 系数文件保存路径 (.csv), 为 None 时不保存
+    :param reference_temperature: 参考温度 [K]
+    :param reference_pressure: 参考压力 [Pa]
+    :param refine: 是否做非线性最小二乘修正
+    :return: 拟合结果
+    """
+    table = table if isinstance(table, FlameSpeedTable) else FlameSpeedTable.load(table)
+    phi, t_u, p, y_dil = (value.ravel() for value in broadcast_arrays(
+        table.phi[:, None, None, None], table.temperature[None, :, None, None],
+        table.pressure[None, None, :, None], table.dilution[None, None, None, :]))
+    return fit_flame_speed_correlation(phi, t_u, p, y_dil, 0., table.speed.ravel(),
+                                       reference_temperature=reference_temperature,
+                                       reference_pressure=reference_pressure, path=path, marker=table.marker,
+                                       marker_phi=table.phi, marker_fraction=table.marker_fraction, refine=refine)
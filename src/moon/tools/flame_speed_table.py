@@ -0,0 +1,160 @@
+# -*- coding:utf-8 -*-
+"""
+用 Cantera FreeFlame 生成层流火焰速度数据表, 供 TabulatedFlameSpeed 使用
+@Author: MoonCake Without Moon
+@Time: 2025/7/11
+"""
+__all__ = ['generate_flame_speed_table']
+
+import json
+import os
+import pathlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+
+from cantera import Solution, FreeFlame
+from loguru import logger
+from numpy import asarray, full, nan, isnan, array
+
+from .disk_cache import DiskCache
+from .tabulation import residual_composition
+from ..flame_speed import FlameSpeedTable
+
+
+def _flame_row(task: tuple) -> tuple[tuple[int, int, int], list[float]]:
+    """
+    计算一行数据 (固定未燃温度、压力、残余气体质量分数, 遍历当量比), 以上一个当量比的解为初值,
+    以其为初值求解失败时重新初始化再求解一次 (进程池任务, 须为模块级函数)
+    :param task: (行序号, 反应机理, 燃料, 氧化剂, 当量比坐标轴, 未燃温度 [K], 压力 [Pa], 残余气体质量分数,
+                  各当量比下的残余气体质量分数组成, 火焰计算域宽度 [m], 细化准则)
+    :return: (行序号, 各当量比下的层流火焰速度 [m/s], 失败为 nan)
+    """
+    index, mechanism, fuel, oxidizer, phis, temperature, pressure, dilution, residuals, width, refine = task
+    gas = Solution(mechanism)
+    flame: FreeFlame | None = None
+    speeds = []
+    for phi, residual in zip(phis, residuals):
+        gas.set_equivalence_ratio(phi, fuel, oxidizer)
+        y_unburned = (1 - dilution) * gas.Y + dilution * asarray(residual)  # 未燃混合气质量分数
+        speed = nan
+        if flame is not None:
+            try:
+                flame.inlet.T = temperature
+                flame.inlet.Y = y_unburned
+                flame.P = pressure
+                flame.solve(loglevel=0, auto=False)
+                speed = float(flame.velocity[0])
+            except Exception:  # 以上一点的解为初值失败, 重新初始化后再求解一次
+                flame = None
+        if flame is None:
+            try:
+                gas.TPY = temperature, pressure, y_unburned  # 求解会改变 gas 的状态, 每次新建火焰前重新设置
+                flame = FreeFlame(gas, width=width)
+                flame.set_refine_criteria(**refine)
+                flame.solve(loglevel=0, auto=True)
+                speed = float(flame.velocity[0])
+            except Exception:  # Cantera 求解失败 (例如超出可燃极限), 下一个点重新初始化
+                flame = None
+        speeds.append(speed)
+    return index, speeds
+
+
+def generate_flame_speed_table(mechanism: str | pathlib.Path,
+                               fuel: str,
+                               oxidizer: str,
+                               phi,
+                               temperature,
+                               pressure,
+                               dilution=(0.,),
+                               path: str | pathlib.Path | None = None,
+                               checkpoint: str | pathlib.Path | None = None,
+                               marker: str | None = None,
+                               workers: int | None = None,
+                               width: float = 0.03,
+                               refine: dict | None = None) -> FlameSpeedTable:
+    """
+    在 (当量比, 未燃温度, 压力, 残余气体质量分数) 网格上用 FreeFlame 计算层流火焰速度
+
+        每个 (未燃温度, 压力, 残余气体质量分数) 组合为一个进程池任务, 任务内遍历当量比并以上一点的解为初值;
+        每完成一个任务即向 checkpoint 追加一行 JSON, 中断后以相同参数重新调用会跳过已完成的任务;
+        检查点记录反应机理文件内容的哈希值, 文件被修改后旧检查点不再适用。
+        求解失败的点保留为 nan 并在日志中汇总, 由 TabulatedFlameSpeed 以相邻节点补齐
+    :param mechanism: 反应机理
+    :param fuel: 燃料组成, 例如 'CH3OH:1'
+    :param oxidizer: 氧化剂组成, 例如 'O2:1, N2:3.76'
+    :param phi: 当量比坐标轴, 递增
+    :param temperature: 未燃温度坐标轴 [K], 递增
+    :param pressure: 压力坐标轴 [Pa], 递增
+    :param dilution: 残余气体质量分数坐标轴, 递增
+    :param path: 数据表保存路径 (.npz), 为 None 时不保存
+    :param checkpoint: 检查点文件路径 (JSON lines), 为 None 时不保存检查点
+    :param marker: 残余气体标记组分, 为 None 时燃料含碳则取 CO2, 否则取 H2O
+    :param workers: 进程数, 为 None 时使用全部 CPU, 为 1 时在当前进程中计算
+    :param width: 火焰计算域宽度 [m]
+    :param refine: FreeFlame.set_refine_criteria 的参数, 默认 ratio=3, slope=0.1, curve=0.2
+    :return: 层流火焰速度数据表
+    """
+    mechanism = str(mechanism)
+    phi, temperature, pressure, dilution = (asarray(axis, dtype=float)
+                                            for axis in (phi, temperature, pressure, dilution))
+    refine = {'ratio': 3, 'slope': 0.1, 'curve': 0.2} if refine is None else refine
+    if marker is None:
+        gas = Solution(mechanism)
+        gas.set_equivalence_ratio(1., fuel, oxidizer)
+        marker = 'CO2' if 'C' in gas.element_names and gas.elemental_mole_fraction('C') > 0 else 'H2O'
+    residuals, marker_fraction = zip(*(residual_composition(mechanism, fuel, oxidizer, value, marker) for value in phi))
+    # 检查点: 首行为参数, 之后每行为一个已完成的任务
+    header = {'mechanism': DiskCache.file_hash(mechanism), 'fuel': fuel, 'oxidizer': oxidizer, 'phi': phi.tolist(),
+              'temperature': temperature.tolist(), 'pressure': pressure.tolist(), 'dilution': dilution.tolist(),
+              'marker': marker, 'width': width, 'refine': refine}
+    speed = full((len(phi), len(temperature), len(pressure), len(dilution)), nan)
+    done = set()
+    if checkpoint is not None:
+        checkpoint = pathlib.Path(checkpoint)
+        if checkpoint.exists():
+            with open(checkpoint) as file:
+                lines = file.read().splitlines()
+            if not lines or json.loads(lines[0]) != header:
+                raise ValueError(f'checkpoint {checkpoint} was written with different parameters')
+            for line in lines[1:]:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:  # 中断时写了一半的行
+                    continue
+                i, j, k = record['index']
+                speed[:, i, j, k] = record['speed']
+                done.add((i, j, k))
+        else:
+            checkpoint.parent.mkdir(parents=True, exist_ok=True)
+            with open(checkpoint, 'w') as file:
+                file.write(json.dumps(header) + '\n')
+    tasks = [((i, j, k), mechanism, fuel, oxidizer, phi.tolist(), t_u, p, y_dil, residuals, width, refine)
+             for (i, t_u), (j, p), (k, y_dil) in product(enumerate(temperature.tolist()),
+                                                         enumerate(pressure.tolist()),
+                                                         enumerate(dilution.tolist()))
+             if (i, j, k) not in done]
+    logger.info(f'flame speed table: {len(tasks)} of {len(tasks) + len(done)} rows to compute')
+
+    def record(index: tuple[int, int, int], speeds: list[float]) -> None:
+        speed[(slice(None), *index)] = speeds
+        if checkpoint is not None:
+            with open(checkpoint, 'a') as file:
+                file.write(json.dumps({'index': list(index), 'speed': speeds}) + '\n')
+
+    workers = os.cpu_count() if workers is None else workers
+    if workers <= 1:
+        for task in tasks:
+            record(*_flame_row(task))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, max(len(tasks), 1))) as executor:
+            for future in as_completed([executor.submit(_flame_row, task) for task in tasks]):
+                record(*future.result())
+    failed = isnan(speed)
+    if failed.any():
+        logger.warning(f'flame speed table: {int(failed.sum())} of {speed.size} points failed and are left as nan')
+    table = FlameSpeedTable(phi=phi, temperature=temperature, pressure=pressure, dilution=dilution, speed=speed,
+                            marker=marker, marker_fraction=array(marker_fraction), mechanism=mechanism, fuel=fuel,
+                            oxidizer=oxidizer)
+    if path is not None:
+        table.save(path)
+    return table
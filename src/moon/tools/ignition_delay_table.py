@@ -0,0 +1,116 @@
+# -*- coding:utf-8 -*-
+"""
+用 Cantera 定容反应器生成着火延迟数据表, 供 TabulatedIgnitionDelay 与 LivengoodWu 爆震预测使用
+@Author: MoonCake Without Moon
+@Time: 2025/7/19
+"""
+__all__ = ['generate_ignition_delay_table']
+
+import os
+import pathlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+
+from cantera import Solution
+from loguru import logger
+from numpy import asarray, array, full, nan, isinf
+
+from .disk_cache import DiskCache
+from .mechanism_reduction import ignition_delay
+from .tabulation import residual_composition
+from ..combustion_models import IgnitionDelayTable
+
+
+def _delay_row(task: tuple) -> tuple[tuple[int, int, int], list[float]]:
+    """
+    计算一行数据 (固定当量比、压力、残余气体质量分数, 遍历温度) (进程池任务, 须为模块级函数)
+    :param task: (行序号, 反应机理, 燃料, 氧化剂, 当量比, 温度坐标轴 [K], 压力 [Pa], 残余气体质量分数,
+                  残余气体质量分数组成, 最长计算时间 [s])
+    :return: (行序号, 各温度下的着火延迟 [s], 未着火为 inf)
+    """
+    index, mechanism, fuel, oxidizer, phi, temperatures, pressure, dilution, residual, end_time = task
+    gas = Solution(mechanism)
+    delays = []
+    for temperature in temperatures:
+        gas.set_equivalence_ratio(phi, fuel, oxidizer)
+        gas.TPY = temperature, pressure, (1 - dilution) * gas.Y + dilution * asarray(residual)
+        delays.append(ignition_delay(gas, temperature, pressure, gas.X, end_time)[0])
+    return index, delays
+
+
+def generate_ignition_delay_table(mechanism: str | pathlib.Path,
+                                  fuel: str,
+                                  oxidizer: str,
+                                  phi,
+                                  temperature,
+                                  pressure,
+                                  dilution=(0.,),
+                                  path: str | pathlib.Path | None = None,
+                                  cache: DiskCache | None = None,
+                                  marker: str | None = None,
+                                  workers: int | None = None,
+                                  end_time: float = 0.1) -> IgnitionDelayTable:
+    """
+    在 (当量比, 温度, 压力, 残余气体质量分数) 网格上用定容绝热反应器计算着火延迟 (温升速率最大处)
+
+        每个 (当量比, 压力, 残余气体质量分数) 组合为一个进程池任务, 任务内遍历温度;
+        给出 cache 时以全部参数 (反应机理以文件内容) 为键缓存着火延迟数组, 相同参数再次调用直接读取
+    :param mechanism: 反应机理
+    :param fuel: 燃料组成, 例如 'CH3OH:1'
+    :param oxidizer: 氧化剂组成, 例如 'O2:1, N2:3.76'
+    :param phi: 当量比坐标轴, 递增
+    :param temperature: 温度坐标轴 [K], 递增
+    :param pressure: 压力坐标轴 [Pa], 递增
+    :param dilution: 残余气体质量分数坐标轴, 递增
+    :param path: 数据表保存路径 (.npz), 为 None 时不保存
+    :param cache: 磁盘缓存, 为 None 时不缓存
+    :param marker: 残余气体标记组分, 为 None 时燃料含碳则取 CO2, 否则取 H2O
+    :param workers: 进程数, 为 None 时使用全部 CPU, 为 1 时在当前进程中计算
+    :param end_time: 最长计算时间 [s], 超过仍未着火的点记为 inf
+    :return: 着火延迟数据表
+    """
+    mechanism = str(mechanism)
+    phi, temperature, pressure, dilution = (asarray(axis, dtype=float)
+                                            for axis in (phi, temperature, pressure, dilution))
+    if marker is None:
+        gas = Solution(mechanism)
+        gas.set_equivalence_ratio(1., fuel, oxidizer)
+        marker = 'CO2' if 'C' in gas.element_names and gas.elemental_mole_fraction('C') > 0 else 'H2O'
+    residuals, marker_fraction = zip(*(residual_composition(mechanism, fuel, oxidizer, value, marker) for value in phi))
+    params = {'mechanism': DiskCache.file_hash(mechanism), 'fuel': fuel, 'oxidizer': oxidizer, 'phi': phi.tolist(),
+              'temperature': temperature.tolist(), 'pressure': pressure.tolist(), 'dilution': dilution.tolist(),
+              'marker': marker, 'end_time': end_time}
+
+    def calculate():
+        """计算全部任务"""
+        delay = full((len(phi), len(temperature), len(pressure), len(dilution)), nan)
+        tasks = [((i, j, k), mechanism, fuel, oxidizer, phi_i, temperature.tolist(), p, y_dil, residuals[i], end_time)
+                 for (i, phi_i), (j, p), (k, y_dil) in product(enumerate(phi.tolist()),
+                                                               enumerate(pressure.tolist()),
+                                                               enumerate(dilution.tolist()))]
+        logger.info(f'ignition delay table: {len(tasks)} rows to compute')
+
+        def record(index: tuple[int, int, int], delays: list[float]) -> None:
+            i, j, k = index
+            delay[i, :, j, k] = delays
+
+        n = os.cpu_count() if workers is None else workers
+        if n <= 1:
+            for task in tasks:
+                record(*_delay_row(task))
+        else:
+            with ProcessPoolExecutor(max_workers=min(n, len(tasks))) as executor:
+                for future in as_completed([executor.submit(_delay_row, task) for task in tasks]):
+                    record(*future.result())
+        return delay
+
+    delay = calculate() if cache is None else array(cache.get_or_create('ignition_delay', params, calculate))
+    if isinf(delay).any():
+        logger.warning(f'ignition delay table: {int(isinf(delay).sum())} of {delay.size} points '
+                       f'did not ignite within {end_time} s and are set to inf')
+    table = IgnitionDelayTable(phi=phi, temperature=temperature, pressure=pressure, dilution=dilution, delay=delay,
+                               marker=marker, marker_fraction=array(marker_fraction), mechanism=mechanism, fuel=fuel,
+                               oxidizer=oxidizer)
+    if path is not None:
+        table.save(path)
+    return table
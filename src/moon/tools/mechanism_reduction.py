@@ -0,0 +1,393 @@
+# -*- coding:utf-8 -*-
+"""
+用 DRG / DRGEP 方法对反应机理做骨架简化, 生成可直接使用的简化机理 YAML 文件
+@Author: MoonCake Without Moon
+@Time: 2025/7/18
+"""
+__all__ = ['StateSampler', 'ReducedMechanism', 'ignition_delay', 'sample_ignition_states', 'species_importance',
+           'reduce_mechanism']
+
+import hashlib
+import json
+import pathlib
+from dataclasses import dataclass, asdict
+from itertools import product
+
+from cantera import Solution, IdealGasReactor, ReactorNet, Reaction, FreeFlame
+from loguru import logger
+from numpy import ndarray, asarray, array, zeros, abs as np_abs, maximum, minimum, argmax, where, inf, unique
+from numpy import concatenate, vstack
+
+from .disk_cache import DiskCache, default_cache_dir
+
+REDUCED_MECHANISM_VERSION = 2  # 简化结果记录 (.json) 的格式版本, 参与缓存键, 格式或算法变化时递增
+
+
+class StateSampler:
+    """
+    反应器状态采样器: 在 ZeroDimensional / TwoZoneModel 等计算中每次推进反应器网络后调用, 记录反应器的热力学状态,
+    作为 reduce_mechanism 的附加采样状态 (反应器须使用完整的详细机理)
+    """
+
+    def __init__(self, min_temperature: float = 600.):
+        """
+        反应器状态采样器
+        :param min_temperature: 低于此温度的状态化学反应可忽略, 不记录 [K]
+        """
+        self.min_temperature = min_temperature  # 记录的最低温度 [K]
+        self._rows: list[ndarray] = []  # 已记录的状态
+
+    def __call__(self, *reactors: IdealGasReactor) -> None:
+        """
+        记录反应器的当前状态
+        :param reactors: 反应器
+        """
+        for reactor in reactors:
+            thermo = reactor.thermo
+            if thermo.T >= self.min_temperature:
+                self._rows.append(array([thermo.T, thermo.P, *thermo.Y]))
+
+    @property
+    def states(self) -> ndarray:
+        """已记录的状态, 每行为温度 [K]、压力 [Pa]、各组分质量分数"""
+        return vstack(self._rows) if self._rows else zeros((0, 0))
+
+
+@dataclass
+class ReducedMechanism:
+    """
+    简化机理
+    """
+    path: pathlib.Path  # 简化机理 YAML 文件路径, 可直接赋给 ReactionMechanismComponent.reaction_mechanism
+    source: str  # 详细机理
+    method: str  # 简化方法
+    threshold: float  # 组分重要度阈值
+    species: list[str]  # 保留的组分, 简化机理组分数即其长度
+    n_reactions: int  # 简化机理反应数
+    source_n_species: int  # 详细机理组分数
+    source_n_reactions: int  # 详细机理反应数
+    ignition_delay_error: float  # 着火延迟相对误差绝对值的最大值
+    flame_speed_error: float | None  # 层流火焰速度相对误差绝对值的最大值, 不校验时为 None
+
+
+def ignition_delay(gas: Solution, temperature: float, pressure: float, composition,
+                   end_time: float = 0.1, sample_step: float = 10.) -> tuple[float, list[ndarray]]:
+    """
+    定容绝热着火计算, 着火时刻取温升速率最大处
+    :param gas: 气体 (状态会被修改)
+    :param temperature: 初始温度 [K]
+    :param pressure: 初始压力 [Pa]
+    :param composition: 初始组成 (摩尔分数)
+    :param end_time: 最长计算时间 [s]
+    :param sample_step: 采样的温度间隔 [K], 每升高此温度记录一次状态
+    :return: (着火延迟 [s], 温升不足 400 K 时为 inf; 采样状态, 每个为温度、压力、各组分质量分数)
+    """
+    gas.TPX = temperature, pressure, composition
+    reactor = IdealGasReactor(gas)
+    net = ReactorNet([reactor])
+    time, temp = 0., reactor.T
+    states = [array([temp, gas.P, *gas.Y])]
+    delay, max_rate, last_sample = inf, 0., temp
+    while net.time < end_time:
+        net.step()
+        rate = (reactor.T - temp) / (net.time - time)  # 温升速率 [K/s]
+        if rate > max_rate:
+            max_rate, delay = rate, 0.5 * (net.time + time)
+        time, temp = net.time, reactor.T
+        if abs(temp - last_sample) >= sample_step:
+            states.append(array([temp, reactor.thermo.P, *reactor.thermo.Y]))
+            last_sample = temp
+        if temp > temperature + 400 and rate < 1e-3 * max_rate:
+            break  # 已着火且放热基本结束
+    if reactor.T < temperature + 400:
+        delay = inf
+    return delay, states
+
+
+def sample_ignition_states(mechanism: str | pathlib.Path, fuel: str, oxidizer: str,
+                           phi, temperature, pressure,
+                           end_time: float = 0.1) -> tuple[ndarray, ndarray]:
+    """
+    在 (当量比, 初始温度, 初始压力) 网格上做定容着火计算, 采样热力学状态
+    :param mechanism: 反应机理
+    :param fuel: 燃料组成, 例如 'CH3OH:1'
+    :param oxidizer: 氧化剂组成, 例如 'O2:1, N2:3.76'
+    :param phi: 当量比
+    :param temperature: 初始温度 [K]
+    :param pressure: 初始压力 [Pa]
+    :param end_time: 最长计算时间 [s]
+    :return: (采样状态, 每行为温度、压力、各组分质量分数; 各工况的着火延迟 [s], 形状为 (当量比, 温度, 压力))
+    """
+    gas = Solution(str(mechanism))
+    phi, temperature, pressure = (asarray(axis, dtype=float).ravel() for axis in (phi, temperature, pressure))
+    delays = zeros((len(phi), len(temperature), len(pressure)))
+    states = []
+    for (i, phi_i), (j, t), (k, p) in product(enumerate(phi), enumerate(temperature), enumerate(pressure)):
+        gas.set_equivalence_ratio(phi_i, fuel, oxidizer)
+        delays[i, j, k], samples = ignition_delay(gas, t, p, gas.X, end_time)
+        states.extend(samples)
+    return vstack(states), delays
+
+
+def species_importance(gas: Solution, states: ndarray, targets: list[str], method: str = 'DRGEP') -> ndarray:
+    """
+    各组分相对目标组分的重要度, 取各采样状态中的最大值
+
+        直接关系系数 (A 的生成与消耗中与 B 有关的反应所占比例):
+        DRG: r_AB = Σ_i |ν_Ai ω_i δ_Bi| / Σ_i |ν_Ai ω_i|, 重要度为从目标组分出发各路径上最小系数的最大值;
+        DRGEP: r_AB = |Σ_i ν_Ai ω_i δ_Bi| / max(P_A, C_A), 重要度为各路径上系数乘积的最大值。
+        重要度不小于阈值 ε 的组分集合即 DRG (图搜索) / DRGEP 在阈值 ε 下保留的组分
+    :param gas: 详细机理气体 (状态会被修改)
+    :param states: 采样状态, 每行为温度 [K]、压力 [Pa]、各组分质量分数
+    :param targets: 目标组分
+    :param method: 'DRG' 或 'DRGEP'
+    :return: 各组分的重要度, 目标组分为 1
+    """
+    if method not in ('DRG', 'DRGEP'):
+        raise ValueError("method can only be 'DRG' or 'DRGEP'")
+    nu = gas.product_stoich_coeffs - gas.reactant_stoich_coeffs  # 净化学计量系数 (组分, 反应)
+    delta = ((gas.product_stoich_coeffs != 0) | (gas.reactant_stoich_coeffs != 0)).T.astype(float)  # (反应, 组分)
+    n = gas.n_species
+    target_index = [gas.species_index(name) for name in targets]
+    importance = zeros(n)
+    for row in states:
+        gas.TPY = row[0], row[1], row[2:]
+        rates = nu * gas.net_rates_of_progress  # 各反应对各组分的净生成速率 (组分, 反应)
+        if method == 'DRG':
+            denominator = np_abs(rates).sum(axis=1)
+            r = np_abs(rates) @ delta
+        else:
+            denominator = maximum(where(rates > 0, rates, 0).sum(axis=1), -where(rates < 0, rates, 0).sum(axis=1))
+            r = np_abs(rates @ delta)
+        r = where(denominator[:, None] > 0, r / where(denominator > 0, denominator, 1)[:, None], 0)
+        r[range(n), range(n)] = 0
+        # 以稠密 Dijkstra 求从目标组分出发的最大路径值 (DRG 取路径上的最小值, DRGEP 取乘积)
+        score = zeros(n)
+        score[target_index] = 1
+        visited = zeros(n, dtype=bool)
+        for _ in range(n):
+            u = argmax(where(visited, -1, score))
+            if visited[u] or score[u] <= 0:
+                break
+            visited[u] = True
+            path = minimum(score[u], r[u]) if method == 'DRG' else score[u] * r[u]
+            score = where(visited, score, maximum(score, path))
+        importance = maximum(importance, score)
+    return importance
+
+
+def _reduced_solution(gas: Solution, keep: ndarray) -> Solution:
+    """
+    由保留的组分构建简化机理: 只保留全部反应物、生成物 (以及指定的第三体) 都在保留组分中的反应,
+    删去第三体效率中被去掉的组分, 失去配对的重复反应取消重复标记
+    :param gas: 详细机理气体
+    :param keep: 各组分是否保留
+    :return: 简化机理气体
+    """
+    names = {name for name, flag in zip(gas.species_names, keep) if flag}
+    species = [gas.species(name) for name in gas.species_names if name in names]
+    reactions: list[tuple[frozenset, dict]] = []
+    groups: dict[frozenset, int] = {}  # 各组反应物与生成物对应的反应数
+    for reaction in gas.reactions():
+        involved = set(reaction.reactants) | set(reaction.products) | set(reaction.orders)
+        third_body = reaction.third_body_name
+        if third_body is not None and third_body != 'M':
+            involved.add(third_body)
+        if not involved <= names:
+            continue
+        data = reaction.input_data
+        if 'efficiencies' in data:
+            data['efficiencies'] = {name: value for name, value in data['efficiencies'].items() if name in names}
+        key = frozenset([frozenset(reaction.reactants.items()), frozenset(reaction.products.items())])
+        groups[key] = groups.get(key, 0) + 1
+        reactions.append((key, data))
+    reduced = Solution(thermo='ideal-gas', kinetics='gas', species=species, reactions=[],
+                       transport_model=gas.transport_model)
+    for key, data in reactions:
+        # 重复反应: 同一组反应物与生成物只剩一个时取消重复标记
+        if data.get('duplicate') and groups[key] < 2:
+            data.pop('duplicate')
+        reduced.add_reaction(Reaction.from_dict(data, reduced))
+    return reduced
+
+
+def _flame_speed(gas: Solution, phi: float, fuel: str, oxidizer: str, temperature: float, pressure: float,
+                 width: float = 0.03) -> float:
+    """
+    层流火焰速度
+    :return: 层流火焰速度 [m/s], 求解失败为 nan
+    """
+    gas.set_equivalence_ratio(phi, fuel, oxidizer)
+    gas.TP = temperature, pressure
+    flame = FreeFlame(gas, width=width)
+    flame.set_refine_criteria(ratio=3, slope=0.1, curve=0.2)
+    try:
+        flame.solve(loglevel=0, auto=True)
+    except Exception:  # Cantera 求解失败 (例如超出可燃极限)
+        return float('nan')
+    return float(flame.velocity[0])
+
+
+def _relative_error(reference: ndarray, value: ndarray) -> float:
+    """
+    相对误差绝对值的最大值; 参考值不着火 (inf) 或求解失败 (nan) 的点不计, 参考值着火而简化机理不着火时为 inf
+    """
+    reference, value = asarray(reference).ravel(), asarray(value).ravel()
+    valid = (reference < inf) & (reference > 0)
+    if not valid.any():
+        return 0.
+    error = np_abs(value[valid] - reference[valid]) / reference[valid]
+    error[~(error < inf)] = inf
+    return float(error.max())
+
+
+def reduce_mechanism(mechanism: str | pathlib.Path,
+                     fuel: str,
+                     oxidizer: str,
+                     phi,
+                     temperature,
+                     pressure,
+                     tolerance: float = 0.05,
+                     method: str = 'DRGEP',
+                     targets: list[str] | None = None,
+                     retained: list[str] | None = None,
+                     states: ndarray | None = None,
+                     flame_tp: tuple[float, float] | None = (300., 101325.),
+                     flame_speed_tolerance: float | None = None,
+                     end_time: float = 0.1,
+                     cache_dir: str | pathlib.Path | None = None) -> ReducedMechanism:
+    """
+    对反应机理做骨架简化
+
+        1. 在工况范围 (当量比、初始温度、初始压力网格) 上做定容着火计算, 采样状态并得到参考着火延迟,
+           可附加 StateSampler 从 ZeroDimensional / TwoZoneModel 计算中记录的状态;
+        2. 用 DRG / DRGEP 计算各组分的重要度, 候选阈值为各组分重要度;
+        3. 二分查找着火延迟误差不超过 tolerance 的最大阈值 (保留组分最少), 再在 flame_tp 条件下
+           校验各当量比的层流火焰速度, 超出误差时在阈值 0 (详细机理) 与该阈值之间二分查找满足火焰速度误差的最大阈值;
+        4. 写出简化机理 YAML 文件与同名的记录 (.json)。
+        结果按 (详细机理文件内容, 工况范围与附加状态, 误差限与简化参数) 缓存, 相同参数再次调用直接读取
+    :param mechanism: 详细反应机理
+    :param fuel: 燃料组成, 例如 'CH3OH:1'
+    :param oxidizer: 氧化剂组成, 例如 'O2:1, N2:3.76'
+    :param phi: 当量比
+    :param temperature: 初始温度 [K]
+    :param pressure: 初始压力 [Pa]
+    :param tolerance: 着火延迟相对误差限
+    :param method: 'DRG' 或 'DRGEP'
+    :param targets: 目标组分, 为 None 时取燃料与氧化剂中的组分
+    :param retained: 总是保留的组分 (例如残余气体标记组分), 燃料、氧化剂与目标组分总是保留
+    :param states: 附加采样状态, 每行为温度 [K]、压力 [Pa]、详细机理各组分质量分数, 见 StateSampler
+    :param flame_tp: 校验层流火焰速度的未燃温度 [K] 与压力 [Pa], 为 None 时不校验
+    :param flame_speed_tolerance: 层流火焰速度相对误差限, 为 None 时与 tolerance 相同
+    :param end_time: 定容着火的最长计算时间 [s]
+    :param cache_dir: 缓存文件夹, 为 None 时为 default_cache_dir() 下的 mechanisms 文件夹
+    :return: 简化机理
+    """
+    mechanism = str(mechanism)
+    phi, temperature, pressure = (asarray(axis, dtype=float).ravel() for axis in (phi, temperature, pressure))
+    flame_speed_tolerance = tolerance if flame_speed_tolerance is None else flame_speed_tolerance
+    gas = Solution(mechanism)
+    composition = set()
+    for text in (fuel, oxidizer):
+        composition.update(item.split(':')[0].strip() for item in text.split(','))
+    targets = sorted(composition) if targets is None else list(targets)
+    retained = sorted(composition | set(targets) | set(retained or ()))
+    # 缓存
+    params = {'version': REDUCED_MECHANISM_VERSION, 'mechanism': DiskCache.file_hash(mechanism), 'fuel': fuel,
+              'oxidizer': oxidizer, 'phi': phi.tolist(), 'temperature': temperature.tolist(),
+              'pressure': pressure.tolist(),
+              'states': None if states is None else hashlib.sha256(asarray(states, dtype=float).tobytes()).hexdigest(),
+              'tolerance': tolerance, 'method': method, 'targets': targets, 'retained': retained,
+              'flame_tp': None if flame_tp is None else list(flame_tp), 'flame_speed_tolerance': flame_speed_tolerance,
+              'end_time': end_time}
+    directory = default_cache_dir() / 'mechanisms' if cache_dir is None else pathlib.Path(cache_dir)
+    key = DiskCache.key(pathlib.Path(mechanism).stem, params)
+    path = directory / f'{key}.yaml'
+    record_path = path.with_suffix('.json')
+    if path.exists() and record_path.exists():
+        with open(record_path) as file:
+            record = json.load(file)
+        record['path'] = path
+        logger.info(f'reduced mechanism loaded from cache: {path}')
+        return ReducedMechanism(**record)
+    # 1. 采样
+    samples, reference = sample_ignition_states(mechanism, fuel, oxidizer, phi, temperature, pressure, end_time)
+    if states is not None and len(states):
+        states = asarray(states, dtype=float)
+        if states.shape[1] != gas.n_species + 2:
+            raise ValueError(f'states must have {gas.n_species + 2} columns (T, P and Y of the detailed mechanism)')
+        samples = vstack([samples, states])
+    if not (reference < inf).any():
+        raise ValueError('no ignition in the operating envelope, increase temperature or end_time')
+    logger.info(f'mechanism reduction: {len(samples)} sampled states, '
+                f'{int((reference < inf).sum())} of {reference.size} conditions ignite')
+    # 2. 组分重要度
+    importance = species_importance(gas, samples, targets, method)
+    importance[[gas.species_index(name) for name in retained]] = inf
+    # 候选阈值, 递增; 阈值 0 保留全部组分 (即详细机理)
+    thresholds = concatenate([[0.], unique(importance[(importance > 0) & (importance < inf)])])
+
+    def evaluate(threshold: float) -> tuple[Solution, float]:
+        """阈值 threshold 下的简化机理与着火延迟误差"""
+        reduced = _reduced_solution(gas, importance >= threshold)
+        delays = zeros(reference.shape)
+        for (i, phi_i), (j, t), (k, p) in product(enumerate(phi), enumerate(temperature), enumerate(pressure)):
+            reduced.set_equivalence_ratio(phi_i, fuel, oxidizer)
+            delays[i, j, k] = ignition_delay(reduced, t, p, reduced.X, end_time)[0]
+        return reduced, _relative_error(reference, delays)
+
+    # 3. 二分查找满足着火延迟误差的最大阈值 (thresholds[low] 总是满足)
+    low, high = 0, len(thresholds)
+    cache: dict[int, tuple[Solution, float]] = {}
+    while high - low > 1:
+        middle = (low + high) // 2
+        cache[middle] = evaluate(thresholds[middle])
+        if cache[middle][1] <= tolerance:
+            low = middle
+        else:
+            high = middle
+    reduced, delay_error = cache[low] if low in cache else evaluate(thresholds[low])
+    flame_error = None
+    if flame_tp is not None:
+        detailed_speed = array([_flame_speed(gas, value, fuel, oxidizer, *flame_tp) for value in phi])
+
+        def flame_speed_error(mechanism_gas: Solution) -> float:
+            """简化机理在各当量比下的层流火焰速度误差"""
+            speed = array([_flame_speed(mechanism_gas, value, fuel, oxidizer, *flame_tp) for value in phi])
+            return _relative_error(detailed_speed, speed)
+
+        flame_error = flame_speed_error(reduced)
+        if flame_error > flame_speed_tolerance and low > 0:
+            # 二分查找满足火焰速度误差的最大阈值, 阈值 0 为详细机理 (总是满足), thresholds[high] 不满足
+            high, low = low, 0
+            passed = None
+            while high - low > 1:
+                middle = (low + high) // 2
+                candidate = cache[middle] if middle in cache else evaluate(thresholds[middle])
+                error = flame_speed_error(candidate[0])
+                if error <= flame_speed_tolerance:
+                    low, passed = middle, (candidate, error)
+                else:
+                    high = middle
+            if passed is None:
+                passed = (cache[0] if 0 in cache else evaluate(thresholds[0])), 0.  # 详细机理, 误差为 0
+            (reduced, delay_error), flame_error = passed
+        if flame_error > flame_speed_tolerance:
+            logger.warning(f'mechanism reduction: flame speed error {flame_error:.3g} exceeds the tolerance')
+    # 4. 写出
+    directory.mkdir(parents=True, exist_ok=True)
+    reduced.name = f'{pathlib.Path(mechanism).stem}-{method}'
+    reduced.write_yaml(path)
+    result = ReducedMechanism(path=path, source=mechanism, method=method, threshold=float(thresholds[low]),
+                              species=list(reduced.species_names), n_reactions=reduced.n_reactions,
+                              source_n_species=gas.n_species, source_n_reactions=gas.n_reactions,
+                              ignition_delay_error=delay_error,
+                              flame_speed_error=flame_error)
+    record = asdict(result)
+    record.pop('path')
+    with open(record_path, 'w') as file:
+        json.dump(record, file, indent=2)
+    logger.info(f'reduced mechanism: {reduced.n_species} of {gas.n_species} species, '
+                f'{reduced.n_reactions} of {gas.n_reactions} reactions, ignition delay error {delay_error:.3g}, '
+                f'written to {path}')
+    return result
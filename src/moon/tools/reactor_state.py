@@ -0,0 +1,150 @@
+# -*- coding:utf-8 -*-
+"""
+提供反应器状态快照: 每次右端项计算只从反应器读取一次状态量, 各策略 (传热、火焰速度、卷吸) 共用
+@Author: MoonCake Without Moon
+@Time: 2025/7/13
+"""
+__all__ = ['ReactorState', 'as_reactor_state']
+
+from cantera import IdealGasReactor
+from numpy import ndarray
+
+
+class ReactorState:
+    """
+    反应器状态快照
+
+        refresh() 读取温度、压力、密度、质量、体积, 以及被请求过的量 (比焓、粘度、当量比、指定组分的质量分数与摩尔分数);
+        组分只在有请求时读取一次质量分数数组, 摩尔分数由质量分数与平均摩尔质量换算, 不再读取 X。
+        首次请求某个未跟踪的量时直接从反应器读取, 并在之后的 refresh() 中一并读取。
+        快照由单回调气缸反应器的钩子 (SingleZoneEvaluator、TwoZoneEvaluator) 在每次右端项计算开始时刷新,
+        各策略共用; 未提供快照时 (Wall、MassFlowController 各自回调的接法) 策略自建快照并在每次调用时刷新
+    """
+
+    def __init__(self, reactor: IdealGasReactor):
+        """
+        反应器状态快照, 创建时刷新一次
+        :param reactor: 反应器
+        """
+        self.reactor = reactor  # 反应器
+        self.T = 0.  # 温度 [K]
+        self.P = 0.  # 压力 [Pa]
+        self.density = 0.  # 密度 [kg/m**3]
+        self.mass = 0.  # 质量 [kg]
+        self.volume = 0.  # 体积 [m**3]
+        self._enthalpy_mass: float | None = None  # 比焓 [J/kg], 未跟踪时为 None
+        self._viscosity: float | None = None  # 动力粘度 [Pa*s], 未跟踪时为 None
+        self._equivalence_ratio: float | None = None  # 当量比, 未跟踪时为 None
+        self._mean_molecular_weight = 0.  # 平均摩尔质量 [kg/kmol]
+        self._molecular_weights: dict[int, float] = {}  # 被跟踪组分的摩尔质量 [kg/kmol]
+        self._mass_fractions: dict[int, float] = {}  # 被跟踪组分的质量分数
+        self.Y: ndarray | None = None  # 全部组分的质量分数, 调用 track_all_species() 后每次刷新读取
+        self.refreshes = 0  # 刷新次数
+        self.refresh()
+
+    def track_species(self, species: str | int) -> int:
+        """
+        跟踪一个组分, 之后每次刷新都读取其质量分数
+        :param species: 组分名或索引
+        :return: 组分索引, 供 mass_fraction()、mole_fraction() 使用
+        """
+        thermo = self.reactor.thermo
+        k = species if isinstance(species, int) else thermo.species_index(species)
+        if k not in self._mass_fractions:
+            self._molecular_weights[k] = float(thermo.molecular_weights[k])
+            self._mass_fractions[k] = float(thermo.Y[k])
+            self._mean_molecular_weight = thermo.mean_molecular_weight
+        return k
+
+    def track_all_species(self) -> ndarray:
+        """
+        每次刷新读取全部组分的质量分数 (Y), 用于需要整个组成的计算 (例如卷吸带入已燃区的组分)
+        :return: 当前的质量分数
+        """
+        if self.Y is None:
+            thermo = self.reactor.thermo
+            self.Y = thermo.Y
+            self._mean_molecular_weight = thermo.mean_molecular_weight
+        return self.Y
+
+    def refresh(self) -> None:
+        """
+        从反应器读取一次全部跟踪的量
+        """
+        self.refreshes += 1
+        reactor = self.reactor
+        thermo = reactor.thermo  # 同时把共用的热力学对象恢复到本反应器的状态
+        self.T = thermo.T
+        self.P = thermo.P
+        self.density = thermo.density_mass
+        self.mass = reactor.mass
+        self.volume = reactor.volume
+        if self._enthalpy_mass is not None:
+            self._enthalpy_mass = thermo.enthalpy_mass
+        if self._viscosity is not None:
+            self._viscosity = thermo.viscosity
+        if self._equivalence_ratio is not None:
+            self._equivalence_ratio = thermo.equivalence_ratio()
+        fractions = self._mass_fractions
+        if self.Y is not None:
+            self.Y = thermo.Y
+        if fractions or self.Y is not None:
+            y = thermo.Y if self.Y is None else self.Y
+            for k in fractions:
+                fractions[k] = float(y[k])
+            self._mean_molecular_weight = thermo.mean_molecular_weight
+
+    @property
+    def enthalpy_mass(self) -> float:
+        """比焓 [J/kg]"""
+        if self._enthalpy_mass is None:
+            self._enthalpy_mass = self.reactor.thermo.enthalpy_mass
+        return self._enthalpy_mass
+
+    @property
+    def viscosity(self) -> float:
+        """动力粘度 [Pa*s]"""
+        if self._viscosity is None:
+            self._viscosity = self.reactor.thermo.viscosity
+        return self._viscosity
+
+    def equivalence_ratio(self) -> float:
+        """
+        当量比
+        :return: 当量比
+        """
+        if self._equivalence_ratio is None:
+            self._equivalence_ratio = self.reactor.thermo.equivalence_ratio()
+        return self._equivalence_ratio
+
+    def mass_fraction(self, k: int) -> float:
+        """
+        组分质量分数
+        :param k: 组分索引 (由 track_species() 得到)
+        :return: 质量分数
+        """
+        fractions = self._mass_fractions
+        if k not in fractions:
+            self.track_species(k)
+        return fractions[k]
+
+    def mole_fraction(self, k: int) -> float:
+        """
+        组分摩尔分数, 由质量分数换算
+        :param k: 组分索引 (由 track_species() 得到)
+        :return: 摩尔分数
+        """
+        y = self.mass_fraction(k)
+        return y * self._mean_molecular_weight / self._molecular_weights[k]
+
+
+def as_reactor_state(reactor: IdealGasReactor | ReactorState) -> tuple[ReactorState, bool]:
+    """
+    取得反应器的状态快照
+    :param reactor: 反应器或状态快照
+    :return: (状态快照, 是否由调用方自行刷新); 传入反应器时新建快照, 调用方须在每次计算开始时调用 refresh(),
+             传入快照时由快照的提供者 (单回调气缸反应器的钩子) 负责刷新
+    """
+    if isinstance(reactor, ReactorState):
+        return reactor, False
+    return ReactorState(reactor), True
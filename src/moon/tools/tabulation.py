@@ -0,0 +1,45 @@
+# -*- coding:utf-8 -*-
+"""
+提供数据表生成与查表共用的函数: 递增坐标轴上的定位, 残余气体组成
+@Author: MoonCake Without Moon
+@Time: 2025/7/20
+"""
+__all__ = ['locate', 'residual_composition']
+
+from bisect import bisect_right
+
+from cantera import Solution
+
+
+def locate(axis: list[float], value: float) -> tuple[int, float]:
+    """
+    在递增坐标轴上定位, 超出范围时取端点
+    :param axis: 坐标轴
+    :param value: 坐标值
+    :return: (左侧节点序号, 线性插值权重)
+    """
+    n = len(axis)
+    if n == 1:
+        return 0, 0.
+    j = bisect_right(axis, value) - 1
+    j = 0 if j < 0 else n - 2 if j > n - 2 else j
+    t = (value - axis[j]) / (axis[j + 1] - axis[j])
+    return j, 0. if t < 0 else 1. if t > 1 else t
+
+
+def residual_composition(mechanism: str, fuel: str, oxidizer: str, phi: float,
+                         marker: str) -> tuple[list[float], float]:
+    """
+    残余气体组成: 同当量比新鲜混合气的定焓定压平衡产物
+    :param mechanism: 反应机理
+    :param fuel: 燃料组成
+    :param oxidizer: 氧化剂组成
+    :param phi: 当量比
+    :param marker: 标记组分
+    :return: (残余气体质量分数, 残余气体中标记组分的质量分数)
+    """
+    gas = Solution(mechanism)
+    gas.set_equivalence_ratio(phi, fuel, oxidizer)
+    gas.TP = 300, 101325
+    gas.equilibrate('HP')
+    return gas.Y.tolist(), float(gas.Y[gas.species_index(marker)])
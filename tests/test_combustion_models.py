@@ -0,0 +1,100 @@
+# -*- coding:utf-8 -*-
+"""
+燃烧模型: Wiebe 平衡燃烧的质量守恒, 全循环计算的循环间状态延续
+@Author: MoonCake Without Moon
+@Time: 2025/7/20
+"""
+from math import pi
+
+import numpy as np
+import pytest
+from cantera import ReactorNet
+from loguru import logger
+
+from moon.combustion_models import CycleSimulation, TwoZoneModel, ValveTiming, Wiebe
+from moon.geometry import EngineGeometry, SITwoZoneGeometry
+from moon.heat_transfer import Hohenberg
+from moon.reaction_mechanism import Li
+
+DEG = pi / 180
+
+
+@pytest.fixture(autouse=True)
+def _quiet():
+    """关闭求解过程中的日志"""
+    logger.disable('moon')
+    yield
+    logger.enable('moon')
+
+
+def test_wiebe_equilibrium_mass_balance():
+    """Wiebe 平衡燃烧: 两区总质量守恒, 已燃质量分数跟随 Wiebe 函数"""
+    speed = 2000 / 60
+    omega = 2 * pi * speed
+    geometry = SITwoZoneGeometry(speed, 0.1, 10, 0.09, 0.3)
+    ignition_time = (340 + 360) * DEG / omega
+
+    def ignition(time: float) -> float:
+        return 2e5 if ignition_time <= time <= ignition_time + 1e-4 else 0.
+
+    entrain = Wiebe(geometry, -15 * DEG, 50 * DEG, 2.0)
+    model = TwoZoneModel(str(Li), geometry, ignition, entrain, Hohenberg(), single_callback=True,
+                         burn_mode='equilibrium')
+    start = ignition_time - 2e-4
+    result = model.build_ignition((700, 2e6, {'CH3OH': 1, 'O2': 1.5, 'N2': 1.5 * 3.76}),
+                                  geometry.cylinder_volume(start))
+    burned, unburned = result['burned zone'], result['unburned zone']
+    total = burned.mass + unburned.mass
+    reactor_net = ReactorNet(result['reactors'])
+    reactor_net.initial_time = start
+    for time in np.linspace(start, start + 15 * DEG / omega, 31)[1:]:
+        reactor_net.advance(time)
+        result['evaluator'].equilibrate(reactor_net)
+        assert burned.mass + unburned.mass == pytest.approx(total, rel=1e-6)
+    assert burned.mass / total == pytest.approx(entrain.burned_fraction(omega * time), abs=0.01)
+    assert burned.mass / total > 0.02
+
+
+def _cycle_simulation() -> CycleSimulation:
+    """粗分辨率的倒拖全循环计算"""
+    geometry = EngineGeometry(25, 0.09, 10, 0.08, 0.3, 0.01)
+    return CycleSimulation('gri30.yaml', geometry, (300, 0.5e5, 'O2:1, N2:3.76'), (800, 1.05e5, 'CO2:1, N2:3.76'),
+                           [ValveTiming(690 * DEG, 950 * DEG, 2e-6)], [ValveTiming(500 * DEG, 750 * DEG, 2e-6)],
+                           resolution=2 * DEG)
+
+
+def test_cycle_state_carries_over():
+    """下一循环从上一循环的终了状态开始, 残余废气保留在缸内, 循环残差与两循环缸压一致"""
+    simulation = _cycle_simulation()
+    first, second = simulation.run(2)
+    assert (first.cycle, second.cycle) == (1, 2)
+    assert second.mass[0] == first.mass[-1]
+    assert second.pressure[0] == pytest.approx(first.pressure[-1], rel=1e-12)
+    assert second.temperature[0] == pytest.approx(first.temperature[-1], rel=1e-12)
+    np.testing.assert_array_equal(second.angle, first.angle)
+    assert simulation.state()[0] == pytest.approx(second.mass[-1], rel=1e-12)
+
+    assert 0 < second.residual_mass < second.trapped_mass
+    assert second.residual_fraction == second.residual_mass / second.trapped_mass
+    assert first.cycle_residual is None
+    expected = np.abs(second.pressure - first.pressure).max() / second.peak_pressure
+    assert second.cycle_residual == pytest.approx(expected, rel=1e-12)
+
+
+def test_cycle_set_state_restarts_from_given_state():
+    """set_state 设置的循环边界状态与从该状态连续计算的结果一致"""
+    simulation = _cycle_simulation()
+    simulation.run(1)
+    state = simulation.state()
+    continued = simulation.run(1)[0]
+    restarted = _cycle_simulation()
+    restarted.set_state(state)
+    record = restarted.run(1)[0]
+    assert record.mass[0] == pytest.approx(continued.mass[0], rel=1e-12)
+    np.testing.assert_allclose(record.pressure, continued.pressure, rtol=1e-4)
+
+
+def test_cycle_run_rejects_zero_cycles():
+    """循环数小于 1 时报错"""
+    with pytest.raises(ValueError):
+        _cycle_simulation().run(0)
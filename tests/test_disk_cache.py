@@ -0,0 +1,105 @@
+# -*- coding:utf-8 -*-
+"""
+磁盘数组缓存: 键的确定性, 原子写入, 损坏文件与遗留临时文件的处理, LRU 淘汰
+@Author: MoonCake Without Moon
+@Time: 2025/7/20
+"""
+import os
+import time
+
+import numpy as np
+import pytest
+
+from moon.tools.disk_cache import DISK_CACHE_VERSION, DiskCache
+
+
+def test_key_is_deterministic():
+    """键与参数顺序无关, 参数不同则键不同"""
+    params = {'mechanism': 'gri30.yaml', 'phi': [0.8, 1.0], 'pressure': 1e5}
+    reordered = {'pressure': 1e5, 'phi': [0.8, 1.0], 'mechanism': 'gri30.yaml'}
+    assert DiskCache.key('table', params) == DiskCache.key('table', reordered)
+    assert DiskCache.key('table', params) != DiskCache.key('table', {**params, 'pressure': 2e5})
+    assert DiskCache.key('table', params) != DiskCache.key('other', params)
+    assert DiskCache.key('table', params).startswith('table-')
+
+
+def test_file_hash_follows_content(tmp_path):
+    """文件内容改变时哈希值改变, 文件不存在时返回路径本身"""
+    path = tmp_path / 'mechanism.yaml'
+    path.write_text('species: [A]')
+    first = DiskCache.file_hash(path)
+    assert DiskCache.file_hash(path) == first
+    path.write_text('species: [A, B]')
+    assert DiskCache.file_hash(path) != first
+    assert DiskCache.file_hash('gri30.yaml') == 'gri30.yaml'
+
+
+def test_round_trip_leaves_no_temp_file(tmp_path):
+    """写入后读取得到相同数组, 文件位于版本子文件夹且不遗留临时文件"""
+    cache = DiskCache(tmp_path)
+    array = np.arange(12.).reshape(3, 4)
+    path = cache.save('entry', {'n': 1}, array)
+    assert path.parent == tmp_path / f'v{DISK_CACHE_VERSION}'
+    assert not list(cache.directory.glob('*.tmp'))
+    loaded = cache.load('entry', {'n': 1})
+    np.testing.assert_array_equal(loaded, array)
+    assert not loaded.flags.writeable
+    assert cache.load('entry', {'n': 2}) is None
+    info = cache.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+
+
+def test_failed_save_keeps_previous_entry(tmp_path):
+    """写入失败时删除临时文件, 原有条目保持完整"""
+    cache = DiskCache(tmp_path, mmap=False)
+    cache.save('entry', {'n': 1}, np.ones(4))
+    with pytest.raises(ValueError):
+        cache.save('entry', {'n': 1}, np.array([object()]))
+    assert not list(cache.directory.glob('*.tmp'))
+    np.testing.assert_array_equal(cache.load('entry', {'n': 1}), np.ones(4))
+
+
+def test_corrupt_file_is_a_miss(tmp_path):
+    """损坏的文件视为未命中并被删除, get_or_create 随后重新生成"""
+    cache = DiskCache(tmp_path)
+    path = cache.save('entry', {'n': 1}, np.ones(4))
+    path.write_bytes(b'not an npy file')
+    assert cache.load('entry', {'n': 1}) is None
+    assert not path.exists()
+    array = cache.get_or_create('entry', {'n': 1}, lambda: np.zeros(3))
+    np.testing.assert_array_equal(array, np.zeros(3))
+    assert path.exists()
+
+
+def test_stale_temps_respect_max_age(tmp_path):
+    """只删除超过 temp_max_age 的临时文件, 其他进程正在写入的临时文件保留"""
+    cache = DiskCache(tmp_path, temp_max_age=60)
+    cache.directory.mkdir(parents=True)
+    stale = cache.directory / 'stale.tmp'
+    fresh = cache.directory / 'fresh.tmp'
+    stale.write_bytes(b'')
+    fresh.write_bytes(b'')
+    old = time.time() - 120
+    os.utime(stale, (old, old))
+    cache.evict()
+    assert not stale.exists()
+    assert fresh.exists()
+
+
+def test_eviction_removes_least_recently_used(tmp_path):
+    """超出容量时先淘汰最久未访问的条目"""
+    array = np.ones(100)
+    cache = DiskCache(tmp_path)
+    entry_bytes = cache.save('probe', {}, array).stat().st_size
+    cache.clear()
+    cache = DiskCache(tmp_path, max_bytes=2 * entry_bytes)
+    first = cache.save('entry', {'n': 1}, array)
+    second = cache.save('entry', {'n': 2}, array)
+    old = time.time() - 100
+    os.utime(first, (old, old))
+    os.utime(second, (old - 100, old - 100))
+    cache.load('entry', {'n': 1})
+    cache.save('entry', {'n': 3}, array)
+    assert first.exists()
+    assert not second.exists()
+    assert cache.cache_info().curr_bytes <= cache.max_bytes
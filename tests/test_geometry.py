@@ -0,0 +1,76 @@
+# -*- coding:utf-8 -*-
+"""
+发动机几何: 标量与数组计算一致, 几何缓存的命中与失效, 火焰半径反求精度
+@Author: MoonCake Without Moon
+@Time: 2025/7/20
+"""
+import numpy as np
+import pytest
+
+from moon.geometry import EngineGeometry, SITwoZoneGeometry
+
+SPEED = 2000 / 60  # 转速 [r/s]
+CYCLE = 2 / SPEED  # 一个工作循环的时间 [s]
+
+
+def test_scalar_and_array_kinematics_agree():
+    """时间为标量 (math 路径) 与数组 (numpy 路径) 时结果相同"""
+    geometry = EngineGeometry(SPEED, 0.1, 10, 0.09, 0.3, 0.1 / 9)
+    times = np.linspace(0, CYCLE, 181)
+    for name in ('crank_angle', 'piston_position', 'piston_velocity', 'cylinder_volume'):
+        method = getattr(geometry, name)
+        array_result = method(times)
+        scalar_result = np.array([method(float(time)) for time in times])
+        np.testing.assert_allclose(scalar_result, array_result, rtol=1e-13, atol=1e-15, err_msg=name)
+
+
+def test_array_parameters_broadcast():
+    """几何参数为数组时逐个方案的结果与标量参数的实例相同"""
+    speeds = np.array([1000, 2000, 3000]) / 60
+    geometry = EngineGeometry(speeds, 0.1, 10, 0.09, 0.3, 0.1 / 9)
+    time = 0.013
+    for k, speed in enumerate(speeds):
+        single = EngineGeometry(float(speed), 0.1, 10, 0.09, 0.3, 0.1 / 9)
+        assert geometry.cylinder_volume(time)[k] == pytest.approx(single.cylinder_volume(time), rel=1e-13)
+        assert geometry.piston_velocity(time)[k] == pytest.approx(single.piston_velocity(time), rel=1e-12)
+
+
+def test_geometry_cache_hits_and_invalidation():
+    """相同转角命中缓存, 修改几何参数后缓存清空且结果随之更新, 数组时间不经过缓存"""
+    geometry = EngineGeometry(SPEED, 0.1, 10, 0.09, 0.3, 0.1 / 9, cache_size=16)
+    time = 0.3 * CYCLE
+    first = geometry.piston_position(time)
+    assert geometry.piston_position(time) == first
+    info = geometry.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+
+    geometry.stroke = 0.12
+    info = geometry.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (0, 0, 0)
+    assert geometry.piston_position(time) != first
+    assert geometry.cache_info().misses == 1
+
+    geometry.piston_position(np.array([time, 0.5 * CYCLE]))
+    assert geometry.cache_info().currsize == 1
+
+
+def test_geometry_cache_lru_eviction():
+    """超出最大条目数时淘汰最久未使用的条目"""
+    geometry = EngineGeometry(SPEED, 0.1, 10, 0.09, 0.3, 0.1 / 9, cache_size=2)
+    for fraction in (0.1, 0.2, 0.3):
+        geometry.cylinder_volume(fraction * CYCLE)
+    info = geometry.cache_info()
+    assert (info.evictions, info.currsize) == (1, 2)
+
+
+@pytest.mark.parametrize('angle', [330., 360., 380., 420., 500.])
+def test_flame_radius_inversion(angle):
+    """反求的火焰半径代回解析的已燃区体积, 与给定的已燃体积百分比一致"""
+    geometry = SITwoZoneGeometry(SPEED, 0.1, 10, 0.09, 0.3)
+    time = np.deg2rad(angle + 360) / (2 * np.pi * SPEED)
+    h_gap = geometry.piston_position(time)
+    volume = geometry.cylinder_volume(time)
+    for fraction in (1e-4, 0.01, 0.1, 0.3, 0.5, 0.7, 0.9, 0.99, 0.9999):
+        r_f = geometry.flame_radius(time, fraction)
+        burned = geometry._v_f(r_f, geometry._alpha(r_f), geometry._beta(h_gap, r_f))
+        assert burned / volume == pytest.approx(fraction, rel=1e-9, abs=1e-12)
@@ -0,0 +1,94 @@
+# -*- coding:utf-8 -*-
+"""
+传热: 导热壁面的稳态解, 倒拖缸压缓存的命中与失效
+@Author: MoonCake Without Moon
+@Time: 2025/7/20
+"""
+import numpy as np
+import pytest
+
+from moon.geometry import EngineGeometry
+from moon.heat_transfer import ConductionWall, MotoredCylinder
+from moon.tools.disk_cache import DiskCache
+
+GAS_TEMPERATURE = 900.  # 燃气温度 [K]
+GAS_ALPHA = 800.  # 燃气侧传热系数 [W/(m**2*K)]
+
+
+def _series_heat_flux(wall: ConductionWall) -> float:
+    """燃气侧对流、壁面导热、冷却侧对流串联的稳态热流密度 [W/m**2]"""
+    resistance = 1 / GAS_ALPHA + wall.thickness / wall.conductivity + 1 / wall.coolant_heat_transfer_coefficient
+    return (GAS_TEMPERATURE - wall.coolant_temperature) / resistance
+
+
+@pytest.mark.parametrize('nodes', [1, 2, 8])
+def test_wall_steady_state_matches_series_resistance(nodes):
+    """循环平均边界条件下的稳态解与串联热阻的解析解一致"""
+    wall = ConductionWall(nodes=nodes)
+    wall.advance(1e-3, GAS_TEMPERATURE, GAS_ALPHA)
+    wall.relax_to_steady()
+    flux = _series_heat_flux(wall)
+    assert wall.coolant_heat_flux == pytest.approx(flux, rel=1e-10)
+    assert wall.surface_temperature == pytest.approx(GAS_TEMPERATURE - flux / GAS_ALPHA, rel=1e-10)
+    # 稳态温度场线性分布, 相邻节点温差相同
+    if nodes > 1:
+        np.testing.assert_allclose(np.diff(wall.temperatures), -flux * wall.thickness / nodes / wall.conductivity)
+
+
+def test_wall_transient_converges_to_steady_state():
+    """长时间隐式推进收敛到同一稳态"""
+    steady = ConductionWall()
+    steady.advance(1e-3, GAS_TEMPERATURE, GAS_ALPHA)
+    steady.relax_to_steady()
+    wall = ConductionWall()
+    for _ in range(400):
+        wall.advance(10., GAS_TEMPERATURE, GAS_ALPHA)
+    np.testing.assert_allclose(wall.temperatures, steady.temperatures, rtol=1e-8)
+    assert wall.coolant_heat_flux == pytest.approx(_series_heat_flux(wall), rel=1e-6)
+
+
+def _motored_cylinder(result_cache: DiskCache | None = None) -> MotoredCylinder:
+    """小插值点数的倒拖缸, 进气阀在 360-540 deg 开启, 排气阀在 180-360 deg 开启"""
+    geometry = EngineGeometry(25, 0.09, 10, 0.08, 0.3, 0.01)
+    cycle = 2 / geometry.speed
+
+    def inlet(time: float) -> float:
+        return 1. if 0.5 * cycle <= time % cycle < 0.75 * cycle else 0.
+
+    def outlet(time: float) -> float:
+        return 1. if 0.25 * cycle <= time % cycle < 0.5 * cycle else 0.
+
+    return MotoredCylinder('h2o2.yaml', geometry, (300, 1e5, 'O2:1, AR:3.76'), (300, 1e5, 'O2:1, AR:3.76'),
+                           [2e-6], [inlet], [2e-6], [outlet], interp_num=37, result_cache=result_cache)
+
+
+def test_motored_pressure_cache(tmp_path):
+    """相同输入命中进程内缓存, invalidate 后重新求解, 进程内缓存清空后命中磁盘缓存"""
+    MotoredCylinder.cache_clear()
+    try:
+        first = _motored_cylinder()
+        first.update_motored_pressure()
+        assert MotoredCylinder.cache_info()[:2] == (0, 1)
+
+        second = _motored_cylinder()
+        second.update_motored_pressure()
+        assert MotoredCylinder.cache_info()[:2] == (1, 1)
+        angles = np.linspace(0, 4 * np.pi, 37)
+        np.testing.assert_array_equal(first.motored_pressure(angles), second.motored_pressure(angles))
+
+        second.invalidate()
+        second.update_motored_pressure()
+        assert MotoredCylinder.cache_info()[:2] == (1, 2)
+
+        MotoredCylinder.cache_clear()
+        disk = DiskCache(tmp_path)
+        _motored_cylinder(disk).update_motored_pressure()
+        assert disk.cache_info().curr_bytes > 0
+        MotoredCylinder.cache_clear()
+        cached = _motored_cylinder(disk)
+        cached.update_motored_pressure()
+        assert MotoredCylinder.cache_info()[:2] == (1, 0)
+        assert cached.cycles is None
+        np.testing.assert_allclose(cached.motored_pressure(angles), first.motored_pressure(angles))
+    finally:
+        MotoredCylinder.cache_clear()
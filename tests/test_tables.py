@@ -0,0 +1,89 @@
+# -*- coding:utf-8 -*-
+"""
+数据表与机理简化: 火焰速度查表与直接求解一致, 失败点补齐, 简化机理的着火延迟误差限与缓存
+@Author: MoonCake Without Moon
+@Time: 2025/7/20
+"""
+import numpy as np
+import pytest
+from cantera import FreeFlame, Solution
+from loguru import logger
+
+from moon.flame_speed import TabulatedFlameSpeed
+from moon.flame_speed._tabulated_flame_speed import _fill_failed
+from moon.tools.flame_speed_table import generate_flame_speed_table
+from moon.tools.mechanism_reduction import ignition_delay, reduce_mechanism
+
+FUEL = 'H2:1'
+OXIDIZER = 'O2:1, AR:3.76'
+
+
+@pytest.fixture(autouse=True)
+def _quiet():
+    """关闭求解过程中的日志"""
+    logger.disable('moon')
+    yield
+    logger.enable('moon')
+
+
+@pytest.fixture(scope='module')
+def flame_speed_table():
+    """h2o2 机理的 2x2x1 火焰速度表"""
+    return generate_flame_speed_table('h2o2.yaml', FUEL, OXIDIZER, [0.8, 1.2], [300, 400], [1e5], workers=1)
+
+
+def _direct_flame_speed(phi: float, temperature: float) -> float:
+    """直接求解一维自由传播火焰"""
+    gas = Solution('h2o2.yaml')
+    gas.set_equivalence_ratio(phi, FUEL, OXIDIZER)
+    gas.TP = temperature, 1e5
+    flame = FreeFlame(gas, width=0.03)
+    flame.set_refine_criteria(ratio=3, slope=0.1, curve=0.2)
+    flame.solve(loglevel=0, auto=True)
+    return float(flame.velocity[0])
+
+
+@pytest.mark.parametrize('phi, temperature', [(0.8, 300), (1.2, 400)])
+def test_table_node_matches_direct_solve(flame_speed_table, phi, temperature):
+    """节点处的查表结果与直接求解一致"""
+    model = TabulatedFlameSpeed(flame_speed_table, False)
+    assert model.speed(phi, temperature, 1e5, 0.) == pytest.approx(_direct_flame_speed(phi, temperature), rel=0.01)
+
+
+def test_table_interpolation_is_close_to_direct_solve(flame_speed_table):
+    """节点之间的插值结果与直接求解相差不大"""
+    model = TabulatedFlameSpeed(flame_speed_table, False)
+    assert model.speed(1.0, 350, 1e5, 0.) == pytest.approx(_direct_flame_speed(1.0, 350), rel=0.05)
+    assert not np.isnan(flame_speed_table.speed).any()
+
+
+def test_fill_failed_uses_neighbours():
+    """失败点由相邻有效节点的平均值补齐, 逐轮向外扩展, 全部失败时报错"""
+    speed = np.array([[1., np.nan, 3.], [np.nan, np.nan, 5.]])
+    filled = _fill_failed(speed)
+    assert np.isnan(speed).sum() == 3
+    # 第一轮中 (1, 1) 的相邻有效节点只有 5, 不使用同一轮补齐的点
+    np.testing.assert_allclose(filled, [[1., 2., 3.], [1., 5., 5.]])
+    with pytest.raises(ValueError):
+        _fill_failed(np.full((2, 2), np.nan))
+
+
+def test_reduction_respects_error_bound(tmp_path):
+    """简化机理在工况网格上的着火延迟误差不超过误差限, 再次调用读取缓存"""
+    tolerance = 0.1
+    oxidizer = 'O2:1, N2:3.76'
+    reduced = reduce_mechanism('gri30.yaml', 'CH4:1', oxidizer, [1.0], [1200, 1400], [1e6], tolerance=tolerance,
+                               flame_tp=None, cache_dir=tmp_path)
+    assert reduced.ignition_delay_error <= tolerance
+    assert len(reduced.species) < reduced.source_n_species
+    detailed, skeletal = Solution('gri30.yaml'), Solution(str(reduced.path))
+    for temperature in (1200, 1400):
+        detailed.set_equivalence_ratio(1.0, 'CH4:1', oxidizer)
+        skeletal.set_equivalence_ratio(1.0, 'CH4:1', oxidizer)
+        reference = ignition_delay(detailed, temperature, 1e6, detailed.X)[0]
+        value = ignition_delay(skeletal, temperature, 1e6, skeletal.X)[0]
+        assert abs(value - reference) / reference <= tolerance + 1e-6
+
+    cached = reduce_mechanism('gri30.yaml', 'CH4:1', oxidizer, [1.0], [1200, 1400], [1e6], tolerance=tolerance,
+                              flame_tp=None, cache_dir=tmp_path)
+    assert cached == reduced